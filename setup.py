@@ -1,11 +1,17 @@
+import re
+
 from setuptools import setup, find_packages
 
 with open("README.md", "r", encoding="utf-8") as f:
     long_description = f.read() 
 
+# version of the package, also part of the keys of the parse cache
+with open("src/monkey/__init__.py", "r", encoding="utf-8") as f:
+    version = re.search(r'__version__ = "(.*)"', f.read()).group(1)
+
 setup(
     name="monkey",
-    version="0.1.0",
+    version=version,
     author="Vara prasad(S3v3ru5)",
     author_email="vara10110@gmail.com",
     description="Interpreter for Monkey Language",
@@ -16,6 +22,11 @@ setup(
         include=["monkey", "monkey.*"]
     ),
     package_dir={"": "src"},
+    # the transpiler generates assignment expressions
+    python_requires=">=3.8",
+    extras_require={
+        "vec": ["numpy"]
+    },
     entry_points={
         "console_scripts": ["monkey=monkey.command_line:main"]
     }
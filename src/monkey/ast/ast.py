@@ -1,10 +1,11 @@
 """Base classes for Syntax Tree nodes"""
 
-from typing import List
+from typing import Iterator, List, Optional, Tuple
 
 class Node(object):
     node_type: str = "Node"
-    pass
+    # names of the attributes holding child nodes
+    fields: Tuple[str, ...] = ()
 
 class Statement(Node):
     node_type: str = "Statement"
@@ -16,100 +17,183 @@ class Expression(Node):
 
 class Program(Node):
     node_type: str = "Program"
+    fields: Tuple[str, ...] = ("statements",)
     def __init__(self):
         self.statements: List[Statement] = []
+        # set once the resolver annotated the tree
+        self.resolved: bool = False
 
 class LetStatement(Statement):
     node_type: str = "LetStatement"
+    fields: Tuple[str, ...] = ("identifier", "expression")
     def __init__(self, identifier, expression):
         self.identifier = identifier
         self.expression = expression
+        # frame slot of the variable, None for global variables
+        self.slot: Optional[int] = None
 
 class ReturnStatement(Statement):
     node_type: str = "ReturnStatement"
+    fields: Tuple[str, ...] = ("expression",)
     def __init__(self, expression) -> None:
         self.expression = expression
 
 class ExpressionStatement(Statement):
     node_type: str = "ExpressionStatement"
+    fields: Tuple[str, ...] = ("expression",)
     def __init__(self, expression = None) -> None:
         self.expression = expression
 
 class Identifier(Expression):
     node_type: str = "Identifier"
+    fields: Tuple[str, ...] = ()
     def __init__(self, name: str) -> None:
         self.name = name
+        # lexical address assigned by the resolver, number of frames to
+        # go up and slot in that frame. None for global names.
+        self.depth: Optional[int] = None
+        self.slot: Optional[int] = None
+        # inline cache of global look ups, global environment and its
+        # version when the name was last resolved, and the builtin it
+        # resolved to (None if it was found in the global store).
+        self.cache_env = None
+        self.cache_version: int = -1
+        self.cache_value = None
 
 class IntegerLiteral(Expression):
     node_type: str = "IntegerLiteral"
+    fields: Tuple[str, ...] = ()
     def __init__(self, value: int) -> None:
         self.value = value
+        # runtime object of the literal, materialized by the evaluator
+        self.constant = None
 
 class StringLiteral(Expression):
     node_type: str = "StringLiteral"
+    fields: Tuple[str, ...] = ()
     def __init__(self, value: str) -> None:
         self.value: str = value
+        # runtime object of the literal, materialized by the evaluator
+        self.constant = None
 
 class ArrayLiteral(Expression):
     node_type: str = "ArrayLiteral"
+    fields: Tuple[str, ...] = ("elements",)
     def __init__(self, elements):
         self.elements = elements
 
 class Boolean(Expression):
     node_type: str = "Boolean"
+    fields: Tuple[str, ...] = ()
     def __init__(self, value: bool) -> None:
         self.value: bool = value
 
 class PrefixExpression(Expression):
     node_type: str = "PrefixExpression"
+    fields: Tuple[str, ...] = ("right",)
     def __init__(self, operator, expression) -> None:
         self.operator = operator
         self.right = expression
 
 class InfixExpression(Expression):
     node_type: str = "InfixExpression"
+    fields: Tuple[str, ...] = ("left", "right")
     def __init__(self, left, operator, right):
         self.left = left
         self.operator = operator
         self.right = right
+        # operator specialized for the operand types seen by the
+        # evaluator, see evaluator.m_quicken_infix
+        self.specialized = None
 
 class BlockStatement(Statement):
     node_type: str = "BlockStatement"
+    fields: Tuple[str, ...] = ("statements",)
     def __init__(self):
         self.statements = []
+        # tokens of a function body which isn't parsed yet (statements
+        # is empty until then), None once parsed, see Parser lazy mode
+        self.tokens = None
+        # scopes enclosing the body saved by the resolver, the body is
+        # resolved with them once it is parsed
+        self.scopes = None
+        # optimization level of the program, the passes run on the body
+        # once it is parsed
+        self.opt_level = 0
 
 class IfExpression(Expression):
     node_type: str = "IfExpression"
+    fields: Tuple[str, ...] = ("condition", "consequence", "alternative")
     def __init__(self, condition, consequence, alternative = None) -> None:
         self.condition = condition
         self.consequence = consequence
         self.alternative = alternative
+        # integer comparison of the condition fused into the if by the
+        # evaluator, False once it is known not to apply, see
+        # evaluator.m_quicken_if
+        self.specialized = None
 
 class WhileExpression(Expression):
     node_type: str = "WhileExpression"
+    fields: Tuple[str, ...] = ("condition", "body")
     def __init__(self, condition, body) -> None:
         self.condition = condition
         self.body = body
+        # iterations run by m_eval, and the closures compiled once the
+        # loop got hot, see evaluator.tiering
+        self.iterations = 0
+        self.compiled = None
 
 class IndexExpression(Expression):
     node_type: str = "IndexExpression"
+    fields: Tuple[str, ...] = ("left", "index")
     def __init__(self, left, index):
         self.left = left
         self.index = index
 
+class SliceExpression(Expression):
+    node_type: str = "SliceExpression"
+    fields: Tuple[str, ...] = ("left", "start", "end")
+    def __init__(self, left, start, end):
+        self.left = left
+        # bounds, None when omitted
+        self.start = start
+        self.end = end
+
 class FunctionLiteral(Expression):
     node_type: str = "FunctionLiteral"
+    fields: Tuple[str, ...] = ("parameters", "body")
     def __init__(self, parameters, body):
         self.parameters = parameters
         self.body: BlockStatement = body
+        # resolver.Scope of the function
+        self.scope = None
 
 class CallExpression(Expression):
     node_type: str = "CallExpression"
+    fields: Tuple[str, ...] = ("function", "arguments")
     def __init__(self, function, arguments):
         self.function = function
         self.arguments = arguments
 
 class HashLiteral(Expression):
     node_type: str = "HashLiteral"
+    fields: Tuple[str, ...] = ("pairs",)
     def __init__(self, pairs):
-        self.pairs = pairs
\ No newline at end of file
+        self.pairs = pairs
+
+def iter_child_nodes(node: Node) -> Iterator[Node]:
+    """yield all direct child nodes of node."""
+    for field in node.fields:
+        yield from _iter_nodes(getattr(node, field))
+
+def _iter_nodes(value) -> Iterator[Node]:
+    if isinstance(value, Node):
+        yield value
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _iter_nodes(item)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            yield from _iter_nodes(key)
+            yield from _iter_nodes(item)
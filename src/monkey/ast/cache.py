@@ -0,0 +1,193 @@
+"""On disk cache of parsed scripts.
+
+Syntax trees are stored in .monc files named after a hash of the script,
+the options used to parse it, the format version, the version of the
+interpreter (its parser and optimizer produce the tree) and of python. A tree is encoded
+as nested tuples, a node is the tuple (number of its class, its
+attributes...), and written with marshal. Function bodies which aren't
+parsed yet (see Parser lazy mode) are stored with their tokens. Loading
+maps the file in memory and creates the nodes with the initial
+attributes of their class, so annotations of the resolver and caches of
+the evaluators (which hold closures) are never stored and start empty.
+The cyclic garbage collector is paused while loading, the tree has no
+cycles and would otherwise be scanned repeatedly while its nodes are
+allocated.
+
+The cache lives in the directory of the transpiler cache, see
+monkey.transpiler.cache.default_directory.
+"""
+
+from typing import BinaryIO, Optional
+import gc
+import hashlib
+import marshal
+import mmap
+import os
+import sys
+import tempfile
+
+from monkey import __version__
+from monkey.ast import ast
+from monkey.lexer.token import Token
+from monkey.transpiler.cache import default_directory
+
+# change when the syntax tree or its encoding changes
+AST_VERSION = 3
+
+# bytes hashed at a time
+CHUNK_SIZE = 1 << 16
+
+# classes of the nodes and the attributes passed to their constructors,
+# the number of a class is its index
+NODE_TYPES = [
+    (ast.Program, ()),
+    (ast.LetStatement, ("identifier", "expression")),
+    (ast.ReturnStatement, ("expression",)),
+    (ast.ExpressionStatement, ("expression",)),
+    (ast.Identifier, ("name",)),
+    (ast.IntegerLiteral, ("value",)),
+    (ast.StringLiteral, ("value",)),
+    (ast.ArrayLiteral, ("elements",)),
+    (ast.Boolean, ("value",)),
+    (ast.PrefixExpression, ("operator", "right")),
+    (ast.InfixExpression, ("left", "operator", "right")),
+    (ast.BlockStatement, ()),
+    (ast.IfExpression, ("condition", "consequence", "alternative")),
+    (ast.WhileExpression, ("condition", "body")),
+    (ast.IndexExpression, ("left", "index")),
+    (ast.SliceExpression, ("left", "start", "end")),
+    (ast.FunctionLiteral, ("parameters", "body")),
+    (ast.CallExpression, ("function", "arguments")),
+    (ast.HashLiteral, ("pairs",)),
+]
+
+NODE_NUMBERS = {node_class: number for number, (node_class, _) in enumerate(NODE_TYPES)}
+
+# classes whose statements are set after construction
+BLOCKS = (ast.Program, ast.BlockStatement)
+
+# number of an encoded dict, (DICT, keys, values)
+DICT = len(NODE_TYPES)
+
+def encode(value):
+    """value of the syntax tree as nested tuples, lists and constants."""
+    if isinstance(value, ast.Node):
+        node_class = type(value)
+        _, attributes = NODE_TYPES[NODE_NUMBERS[node_class]]
+        encoded = [encode(getattr(value, name)) for name in attributes]
+        if node_class in BLOCKS:
+            encoded.append(encode(value.statements))
+        if node_class is ast.BlockStatement and value.tokens is not None:
+            # body of a function parsed lazily
+            encoded.append([(token.type, token.value, token.line, token.column)
+                            for token in value.tokens])
+            encoded.append(value.opt_level)
+        return (NODE_NUMBERS[node_class], *encoded)
+    if isinstance(value, list):
+        return [encode(item) for item in value]
+    if isinstance(value, dict):
+        return (DICT, [encode(key) for key in value], [encode(item) for item in value.values()])
+    return value
+
+def initial_state(node_class, attributes):
+    """attributes of a new node of node_class other than attributes."""
+    if node_class in BLOCKS:
+        state = vars(node_class())
+    else:
+        state = vars(node_class(*[None] * len(attributes)))
+    return {name: value for name, value in state.items() if name not in attributes}
+
+# initial attributes of the nodes of every class, the evaluators' caches
+# and the resolver's annotations
+INITIAL_STATES = [initial_state(node_class, attributes) for node_class, attributes in NODE_TYPES]
+
+def decode(value):
+    """syntax tree encoded by encode.
+
+    nodes are created without calling their constructors, their
+    attributes are the initial ones updated with the decoded ones.
+    """
+    if type(value) is tuple:
+        number = value[0]
+        if number == DICT:
+            return dict(zip(map(decode, value[1]), map(decode, value[2])))
+        node_class, attributes = NODE_TYPES[number]
+        node = object.__new__(node_class)
+        state = node.__dict__
+        state.update(INITIAL_STATES[number])
+        if node_class in BLOCKS:
+            state["statements"] = decode(value[1])
+            if len(value) > 2:
+                state["tokens"] = [Token(*token) for token in value[2]]
+                state["opt_level"] = value[3]
+        else:
+            state.update(zip(attributes, map(decode, value[1:])))
+        return node
+    if type(value) is list:
+        return [decode(item) for item in value]
+    return value
+
+class AstCache:
+    """syntax trees stored in a directory.
+
+    Args:
+        directory: where to store the trees, see default_directory.
+    """
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self.directory = directory or default_directory()
+
+    def key(self, source: BinaryIO, *options) -> str:
+        """key of the tree parsed from a binary file with given options.
+
+        source is read to its end.
+        """
+        digest = hashlib.sha256()
+        versions = (AST_VERSION, __version__, sys.version_info[:2], marshal.version)
+        digest.update(repr((versions, options)).encode())
+        data = source.read(CHUNK_SIZE)
+        while data:
+            digest.update(data)
+            data = source.read(CHUNK_SIZE)
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".monc")
+
+    def load(self, key: str) -> Optional[ast.Program]:
+        """return cached tree, None if there is none or it can't be read."""
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            with open(self.path(key), "rb") as f:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    encoded = marshal.loads(data)
+            program = decode(encoded)
+        except (OSError, EOFError, ValueError, TypeError, IndexError, KeyError, RecursionError):
+            return None
+        finally:
+            if collecting:
+                gc.enable()
+        if not isinstance(program, ast.Program):
+            return None
+        return program
+
+    def store(self, key: str, program: ast.Program) -> None:
+        """cache program, failures to write the cache are ignored.
+
+        trees too deeply nested to encode or marshal aren't cached.
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # write to a temporary file first, concurrent runs never
+            # read a partially written file
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    marshal.dump(encode(program), f)
+                os.replace(tmp_path, self.path(key))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except (OSError, ValueError, RecursionError):
+            pass
@@ -1,10 +1,18 @@
-"""Parser for Monkey language"""
+"""Parser for Monkey language
+
+In lazy mode the bodies of function literals are only brace matched, the
+BlockStatement of a body keeps its tokens and is parsed by parse_body
+when the function is called for the first time. Syntax errors in a body
+are then raised by the call, unless the parser validates bodies eagerly.
+"""
 
 import typing
 from types import SimpleNamespace
 
 from monkey.exceptions import SyntaxError
 from monkey.ast import ast
+from monkey.ast.resolver import Resolver
+from monkey.lexer.token import Token
 from monkey.lexer.token_types import TOKEN_TYPES
 
 PRECEDENCE_ORDERS = {
@@ -33,11 +41,31 @@ PRECEDENCES = {
     TOKEN_TYPES.LBRACKET:       PRECEDENCE_ORDERS.INDEX,
 }
 
+class TokenList:
+    """lexer replaying a list of tokens, then EOF forever."""
+
+    def __init__(self, tokens: typing.List[Token]) -> None:
+        self.tokens = iter(tokens)
+        last = tokens[-1]
+        self.eof = Token(TOKEN_TYPES.EOF, "EOF", last.line, last.column)
+
+    def get_next_token(self) -> Token:
+        return next(self.tokens, self.eof)
+
 class Parser:
-    """Main Parser Class for Monkey language"""
+    """Main Parser Class for Monkey language
+
+    Args:
+        lexer: lexer producing the tokens.
+        lazy: don't parse bodies of function literals, see parse_body.
+        validate: parse bodies of function literals in lazy mode anyway
+            to raise their syntax errors, the trees are discarded.
+    """
 
-    def __init__(self, lexer) -> None:
+    def __init__(self, lexer, lazy = False, validate = False) -> None:
         self.lexer = lexer
+        self.lazy = lazy
+        self.validate = validate
         
         self.prev_token = None
         self.current_token = None
@@ -182,6 +210,7 @@ class Parser:
         self._register_prefix(TOKEN_TYPES.MINUS, self.p_prefix_expression)
         self._register_prefix(TOKEN_TYPES.LPAREN, self.p_grouped_expression)
         self._register_prefix(TOKEN_TYPES.LBRACKET, self.p_array_literal)
+        self._register_prefix(TOKEN_TYPES.LBRACE, self.p_hash_literal)
         self._register_prefix(TOKEN_TYPES.IF, self.p_if_expression)
         self._register_prefix(TOKEN_TYPES.FUNCTION, self.p_function_literal)
         self._register_prefix(TOKEN_TYPES.WHILE, self.p_while_expression)
@@ -225,6 +254,36 @@ class Parser:
         elements = self.p_expression_list(TOKEN_TYPES.RBRACKET)
         return ast.ArrayLiteral(elements)
     
+    def p_hash_literal(self) -> ast.HashLiteral:
+        """parse hashes.
+
+        pair :: <expression> ":" <expression>
+        HashLiteral :: "{" <pair>, <pair>, ... "}"
+        """
+        pairs = {}
+        self._advance()
+        if self._iscurrenttoken(TOKEN_TYPES.RBRACE):
+            return ast.HashLiteral(pairs)
+        while True:
+            key = self.p_expression(PRECEDENCE_ORDERS.LOWEST)
+            self._advance()
+            self._eat(TOKEN_TYPES.COLON)
+            value = self.p_expression(PRECEDENCE_ORDERS.LOWEST)
+            self._advance()
+            pairs[key] = value
+            if not self._iscurrenttoken(TOKEN_TYPES.COMMA):
+                break
+            self._eat(TOKEN_TYPES.COMMA)
+        if not self._iscurrenttoken(TOKEN_TYPES.RBRACE):
+            msg = self._get_error_msg(TOKEN_TYPES.RBRACE,
+                        self.current_token.type,
+                        self.current_token.line,
+                        self.current_token.column,
+                        self.prev_token
+                    )
+            self._error(msg)
+        return ast.HashLiteral(pairs)
+
     def p_prefix_expression(self) -> ast.PrefixExpression:
         """parse prefix expressions(unary).
 
@@ -371,14 +430,29 @@ class Parser:
 
         return ast.WhileExpression(condition, body)
 
-    def p_index_expression(self, left) -> ast.IndexExpression:
-        """parse an index expression.
+    def p_index_expression(self, left) -> ast.Expression:
+        """parse an index or slice expression.
 
         IndexExpression :: <expression> "[" <expression> "]"
+        SliceExpression :: <expression> "[" [<expression>] ":" [<expression>] "]"
         """
         self._advance()
-        index = self.p_expression(PRECEDENCE_ORDERS.LOWEST)
-        self._advance()
+        index = None
+        if not self._iscurrenttoken(TOKEN_TYPES.COLON):
+            index = self.p_expression(PRECEDENCE_ORDERS.LOWEST)
+            self._advance()
+        if self._iscurrenttoken(TOKEN_TYPES.COLON):
+            self._advance()
+            end = None
+            if not self._iscurrenttoken(TOKEN_TYPES.RBRACKET):
+                end = self.p_expression(PRECEDENCE_ORDERS.LOWEST)
+                self._advance()
+            self._expect_rbracket()
+            return ast.SliceExpression(left, index, end)
+        self._expect_rbracket()
+        return ast.IndexExpression(left, index)
+
+    def _expect_rbracket(self):
         if not self._iscurrenttoken(TOKEN_TYPES.RBRACKET):
             msg = self._get_error_msg(TOKEN_TYPES.RBRACKET,
                         self.current_token.type,
@@ -387,7 +461,6 @@ class Parser:
                         self.prev_token
                     )
             self._error(msg)
-        return ast.IndexExpression(left, index)
 
     def p_expression_list(self, end_marker):
         """parse comma separated expressions until end_marker."""
@@ -473,10 +546,53 @@ class Parser:
                     )
             self._error(msg)
 
-        body = self.p_block_statement()
+        if self.lazy:
+            body = self.p_lazy_block_statement()
+        else:
+            body = self.p_block_statement()
 
         return ast.FunctionLiteral(parameters, body)
 
+    def p_lazy_block_statement(self) -> ast.BlockStatement:
+        """collect the tokens of a block from "{" to the matching "}".
+
+        the block is parsed later by parse_body.
+        """
+        # tokens are taken from the lexer directly, the cursor is moved
+        # to the last "}" at the end
+        tokens = [self.current_token]
+        get_next_token = self.lexer.get_next_token
+        lbrace, rbrace, eof = TOKEN_TYPES.LBRACE, TOKEN_TYPES.RBRACE, TOKEN_TYPES.EOF
+        depth = 1
+        token = self.peek_token
+        while True:
+            token_type = token.type
+            if token_type == rbrace:
+                depth -= 1
+                if depth == 0:
+                    break
+            elif token_type == lbrace:
+                depth += 1
+            elif token_type == eof:
+                msg = self._get_error_msg(TOKEN_TYPES.RBRACE,
+                            token.type,
+                            token.line,
+                            token.column,
+                            tokens[-1]
+                        )
+                self._error(msg)
+            tokens.append(token)
+            token = get_next_token()
+        self.prev_token = tokens[-1]
+        tokens.append(token)
+        self.current_token = token
+        self.peek_token = get_next_token()
+        if self.validate:
+            Parser(TokenList(tokens)).p_block_statement()
+        block = ast.BlockStatement()
+        block.tokens = tokens
+        return block
+
     def p_block_statement(self) -> ast.BlockStatement:
         """parse a block of statements.
 
@@ -519,6 +635,36 @@ class Parser:
             program.statements.append(stmt)
         return program
     
+def parse_body(body: ast.BlockStatement) -> None:
+    """parse a function body collected in lazy mode, in place.
+
+    function literals in the body are parsed lazily too. The body is
+    optimized at the level of the program, see optimizer.optimize_body,
+    and if the function was resolved the body is resolved, see
+    Resolver.resolve_body.
+
+    Raises:
+        SyntaxError if the body isn't a valid block.
+    """
+    parser = Parser(TokenList(body.tokens), lazy=True)
+    statements = parser.p_block_statement().statements
+    if not parser._ispeektoken(TOKEN_TYPES.EOF):
+        parser._advance()
+        parser._error()
+    body.statements = statements
+    body.tokens = None
+    if body.opt_level:
+        from monkey.optimizer.optimizer import optimize_body
+        optimize_body(body, body.opt_level)
+    if body.scopes is not None:
+        Resolver().resolve_body(body)
+
+def parse_bodies(node: ast.Node) -> None:
+    """parse all bodies in node not parsed yet, see parse_body."""
+    if isinstance(node, ast.BlockStatement) and node.tokens is not None:
+        parse_body(node)
+    for child in ast.iter_child_nodes(node):
+        parse_bodies(child)
 
 if __name__ == "__main__":
     pass
@@ -0,0 +1,137 @@
+"""Static scope resolution for Monkey syntax trees.
+
+Every function literal gets a Scope, the slots of a scope are its
+parameters (a name repeated in the parameters is bound to the last
+one) followed by the names bound with let anywhere in its body
+(let statements in nested if/while blocks bind in the function scope).
+Identifiers are annotated with their lexical address (depth, slot),
+depth is the number of function scopes to go up from the innermost one.
+Names which aren't bound by any enclosing function are global and keep
+depth None, they are looked up by name at run time.
+
+As let statements are executed at run time a slot can still be empty
+when the identifier is evaluated, evaluators then continue the look up
+by name in the outer scopes.
+
+Bodies of functions which aren't parsed yet (see Parser lazy mode) keep
+the enclosing scopes, they are resolved when they are parsed.
+"""
+
+from typing import Dict, List
+
+from monkey.ast import ast
+
+class Scope:
+    """slots of a function scope.
+
+    Attributes:
+        names: slot index of every name bound in the scope.
+        size: number of slots.
+    """
+    def __init__(self) -> None:
+        self.names: Dict[str, int] = dict()
+        self.size = 0
+
+    def declare(self, name: str) -> int:
+        """return slot of name, assigning a new one if needed."""
+        slot = self.names.get(name)
+        if slot is None:
+            slot = self.declare_parameter(name)
+        return slot
+
+    def declare_parameter(self, name: str) -> int:
+        """assign a new slot to a parameter and return it.
+
+        every parameter gets its own slot, a name repeated in the
+        parameters is bound to the last one.
+        """
+        slot = self.names[name] = self.size
+        self.size += 1
+        return slot
+
+    def __str__(self):
+        return f"Scope({self.names})"
+
+    def __repr__(self):
+        return self.__str__()
+
+class Resolver:
+    """annotate syntax tree with lexical addresses"""
+
+    def __init__(self) -> None:
+        # enclosing function scopes, innermost last
+        self.scopes: List[Scope] = []
+
+    def resolve(self, program: ast.Program) -> ast.Program:
+        for stmt in program.statements:
+            self.r_node(stmt)
+        program.resolved = True
+        return program
+
+    def r_node(self, node: ast.Node) -> None:
+        if isinstance(node, ast.Identifier):
+            self.r_identifier(node)
+        elif isinstance(node, ast.LetStatement):
+            self.r_let_statement(node)
+        elif isinstance(node, ast.FunctionLiteral):
+            self.r_function_literal(node)
+        else:
+            for child in ast.iter_child_nodes(node):
+                self.r_node(child)
+
+    def r_identifier(self, node: ast.Identifier) -> None:
+        depth = 0
+        for scope in reversed(self.scopes):
+            slot = scope.names.get(node.name)
+            if slot is not None:
+                node.depth = depth
+                node.slot = slot
+                return
+            depth += 1
+        node.depth = None
+        node.slot = None
+
+    def r_let_statement(self, node: ast.LetStatement) -> None:
+        self.r_node(node.expression)
+        self.r_identifier(node.identifier)
+        node.slot = node.identifier.slot
+
+    def r_function_literal(self, node: ast.FunctionLiteral) -> None:
+        scope = Scope()
+        for parameter in node.parameters:
+            scope.declare_parameter(parameter.name)
+        declare_lets(node.body, scope)
+        node.scope = scope
+
+        self.scopes.append(scope)
+        for parameter in node.parameters:
+            self.r_identifier(parameter)
+        if node.body.tokens is None:
+            self.r_node(node.body)
+        else:
+            # not parsed yet, see resolve_body
+            node.body.scopes = list(self.scopes)
+        self.scopes.pop()
+
+    def resolve_body(self, body: ast.BlockStatement) -> None:
+        """resolve a function body parsed after its function was resolved.
+
+        names bound by let in the body are added to the scope of the
+        function, frames of its calls must be created afterwards.
+        """
+        self.scopes = body.scopes
+        body.scopes = None
+        declare_lets(body, self.scopes[-1])
+        self.r_node(body)
+
+def declare_lets(node: ast.Node, scope: Scope) -> None:
+    """declare names bound by let statements in node, skipping nested functions."""
+    for child in ast.iter_child_nodes(node):
+        if isinstance(child, ast.LetStatement):
+            scope.declare(child.identifier.name)
+        if not isinstance(child, ast.FunctionLiteral):
+            declare_lets(child, scope)
+
+def resolve(program: ast.Program) -> ast.Program:
+    """annotate program with lexical addresses, see Resolver."""
+    return Resolver().resolve(program)
@@ -1,14 +1,26 @@
 
 import argparse
+import atexit
 import os.path
 import sys
 from datetime import datetime
 
-from monkey.lexer.lexer import Lexer
+from monkey.lexer.lexer import Lexer, token_dfa
+from monkey.lexer.regex_lexer import RegexLexer
 from monkey.ast.parser import Parser
+from monkey.ast.cache import AstCache
 from monkey.evaluator.environment import Environment
 from monkey.evaluator.evaluator import m_eval
+from monkey.evaluator import closure_compiler
+from monkey.evaluator import stack_evaluator
+from monkey.vm import vm
+from monkey.transpiler import transpiler
+from monkey.transpiler import runtime as transpiler_runtime
+from monkey.transpiler.cache import CodeCache
+from monkey.optimizer.optimizer import optimize
 from monkey.evaluator import mobjects
+from monkey.evaluator import memo
+from monkey.evaluator import tiering
 from monkey import exceptions
 
 MONKEY_FACE = '''            __,__
@@ -26,24 +38,110 @@ MONKEY_FACE = '''            __,__
 
 PROMPT = ">>> "
 
-def run_script(script_path):
+# execution engines, each takes (program, env) and returns the result
+ENGINES = {
+    "eval": m_eval,
+    "closure": closure_compiler.run_program,
+    "stack": stack_evaluator.run_program,
+    "vm": vm.run_program,
+    "python": transpiler.run_program,
+}
+
+def dfa_lexer(source):
+    """Lexer recognising tokens with the table driven DFA."""
+    return Lexer(source, token_dfa())
+
+# lexers, they produce the same tokens
+LEXERS = {
+    "scan": Lexer,
+    "regex": RegexLexer,
+    "dfa": dfa_lexer,
+}
+
+# engines running syntax trees with function bodies parsed lazily
+LAZY_ENGINES = {"eval", "closure"}
+
+# engines memoizing functions, see monkey.evaluator.memo
+MEMO_ENGINES = {"eval", "closure", "stack"}
+
+def parse_script(src, opt_level = 0, lexer = "scan", lazy = False, validate = False):
+    """parse and optimize src, a string or binary file, None if there are syntax errors.
+
+    see Parser for lazy and validate.
+    """
+    l = LEXERS[lexer](src)
+    p = Parser(l, lazy, validate)
+    program = p.parse()
+    if len(p.errors) > 0:
+        print(p.errors)
+        return None
+    return optimize(program, opt_level)
+
+def load_python_code(src, script_path, opt_level = 0, use_cache = True, lexer = "scan"):
+    """python code of a script for the python engine.
+
+    code is cached on disk by the source of the script, None if there
+    are syntax errors.
+    """
+    code_cache = CodeCache()
+    key = code_cache.key(src, opt_level)
+    if use_cache:
+        code = code_cache.load(key)
+        if code is not None:
+            return code
+    program = parse_script(src, opt_level, lexer)
+    if program is None:
+        return None
+    code = transpiler.compile_program(program, script_path)
+    if use_cache:
+        code_cache.store(key, code)
+    return code
+
+def load_program(script, opt_level = 0, use_cache = True, lexer = "scan", lazy = False,
+                 validate = False):
+    """syntax tree of a script opened in binary mode.
+
+    trees are cached on disk by the content of the script, None if there
+    are syntax errors.
+    """
+    if use_cache:
+        ast_cache = AstCache()
+        key = ast_cache.key(script, opt_level, lazy, validate)
+        program = ast_cache.load(key)
+        if program is not None:
+            return program
+        script.seek(0)
+    program = parse_script(script, opt_level, lexer, lazy, validate)
+    if program is not None and use_cache:
+        ast_cache.store(key, program)
+    return program
+
+def run_script(script_path, engine = "eval", opt_level = 0, use_cache = True, lexer = "scan",
+               lazy = False, validate = False):
     if not os.path.isfile(script_path):
         print(f"Error: {script_path} is not a file")
         return
     if not script_path.endswith(".mon"):
         print(f"Error: {script_path} is not a monkey script")
         return
-    with open(script_path) as f:
-        src = f.read()
     try:
         env = Environment()
-        l = Lexer(src)
-        p = Parser(l)
-        program = p.parse()
-        if len(p.errors) > 0:
-            print(p.errors)
-            return
-        result = m_eval(program, env)
+        if engine == "python":
+            # the source is the key of the code cache
+            with open(script_path) as f:
+                src = f.read()
+            code = load_python_code(src, script_path, opt_level, use_cache, lexer)
+            if code is None:
+                return
+            result = transpiler_runtime.run_code(code, env)
+        else:
+            # the lexer reads the script while the parser consumes tokens
+            with open(script_path, "rb") as f:
+                program = load_program(f, opt_level, use_cache, lexer,
+                                       lazy and engine in LAZY_ENGINES, validate)
+            if program is None:
+                return
+            result = ENGINES[engine](program, env)
         if not result.type() == "NULL":
             print(result)
     except exceptions.MonkeyError as e:
@@ -51,7 +149,7 @@ def run_script(script_path):
         exit()
         
 
-def repl():
+def repl(engine = "eval", opt_level = 0, lexer = "scan"):
     print(MONKEY_FACE)
     print("Monkey v0.1 ", end="")
     print(datetime.now().strftime("(%b %d %Y, %I:%M:%S %p)"))
@@ -61,11 +159,12 @@ def repl():
         while True:
             src = input(PROMPT)
             try:
-                l = Lexer(src)
+                l = LEXERS[lexer](src)
                 p = Parser(l)
                 program = p.parse()
+                program = optimize(program, opt_level)
 
-                result = m_eval(program, env)
+                result = ENGINES[engine](program, env)
                 if not result.type() == "NULL":
                     print(result)
             except (exceptions.LexicalError, exceptions.SyntaxError) as e:
@@ -74,14 +173,64 @@ def repl():
         print()
         sys.exit(0)
 
+def print_memo_stats():
+    stats = memo.stats()
+    print("memo:", ", ".join(f"{name}={value}" for name, value in stats.items()),
+          file=sys.stderr)
+
+def print_tier_stats():
+    stats = tiering.stats()
+    print(f"tiering: promoted {stats['functions']} functions and {stats['loops']} loops"
+          f" in {stats['compile_time']:.6f}s", file=sys.stderr)
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("file", nargs="?", default=None)
+    parser.add_argument("--engine", choices=list(ENGINES), default="eval",
+                        help="execution engine (default: eval)")
+    parser.add_argument("-O", dest="opt_level", type=int, choices=[0, 1, 2],
+                        default=0, help="optimization level -O0, -O1 or -O2 (default: 0)")
+    parser.add_argument("--memo", action="store_true",
+                        help="memoize results of pure functions"
+                        " (eval, closure and stack engines)")
+    parser.add_argument("--memo-size", type=int, default=memo.DEFAULT_SIZE,
+                        help="results kept per memoized function, 0 keeps all"
+                        f" (default: {memo.DEFAULT_SIZE})")
+    parser.add_argument("--memo-stats", action="store_true",
+                        help="print memoization counters on exit")
+    parser.add_argument("--tier-calls", type=int, default=tiering.DEFAULT_CALL_THRESHOLD,
+                        help="calls after which the eval engine compiles a function,"
+                        f" 0 never does (default: {tiering.DEFAULT_CALL_THRESHOLD})")
+    parser.add_argument("--tier-loops", type=int, default=tiering.DEFAULT_LOOP_THRESHOLD,
+                        help="iterations after which the eval engine compiles a while loop,"
+                        f" 0 never does (default: {tiering.DEFAULT_LOOP_THRESHOLD})")
+    parser.add_argument("--tier-stats", action="store_true",
+                        help="print functions and loops compiled by the eval engine on exit")
+    parser.add_argument("--lexer", choices=list(LEXERS), default="scan",
+                        help="lexer, regex matches tokens with one regular expression, dfa with"
+                        " a table driven automaton (default: scan)")
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false",
+                        help="don't use the on disk cache of parsed and translated scripts")
+    parser.add_argument("--lazy", action="store_true",
+                        help="parse function bodies when they are first called"
+                        " (eval and closure engines)")
+    parser.add_argument("--validate", action="store_true",
+                        help="with --lazy, report syntax errors of function bodies before running")
     args = parser.parse_args()
+    if args.memo and args.engine not in MEMO_ENGINES:
+        parser.error(f"--memo isn't supported by the {args.engine} engine")
+    if args.memo:
+        memo.enable_auto_memo(args.memo_size or None)
+    if args.memo_stats:
+        atexit.register(print_memo_stats)
+    tiering.configure(args.tier_calls, args.tier_loops)
+    if args.tier_stats:
+        atexit.register(print_tier_stats)
     if args.file is None:
-        repl()
+        repl(args.engine, args.opt_level, args.lexer)
     else:
-        run_script(args.file)
+        run_script(args.file, args.engine, args.opt_level, args.use_cache, args.lexer,
+                   args.lazy, args.validate)
 
 if __name__ == "__main__":
     repl()
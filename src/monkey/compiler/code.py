@@ -0,0 +1,104 @@
+"""Opcodes and bytecode containers for the Monkey virtual machine.
+
+Instructions are a flat list of integers. Every instruction starts with
+an opcode which is followed by its operands (if any), operands are
+always a single integer.
+"""
+
+from typing import Any, List
+
+OP_CONSTANT = 0
+OP_POP = 1
+OP_TRUE = 2
+OP_FALSE = 3
+OP_NULL = 4
+
+OP_ADD = 5
+OP_SUB = 6
+OP_MUL = 7
+OP_DIV = 8
+OP_EQUAL = 9
+OP_NOT_EQUAL = 10
+OP_LESS_THAN = 11
+OP_GREATER_THAN = 12
+
+OP_MINUS = 13
+OP_NOT = 14
+
+OP_JUMP = 15
+OP_JUMP_IF_FALSE = 16
+
+OP_GET_NAME = 17
+OP_SET_NAME = 18
+
+OP_ARRAY = 19
+OP_INDEX = 20
+
+OP_CALL = 21
+OP_RETURN_VALUE = 22
+OP_CLOSURE = 23
+# call in tail position, reuses the frame of the caller.
+# always followed by OP_RETURN_VALUE which is used when the frame can't be reused
+OP_TAIL_CALL = 24
+# pops end, start and the sliced value, omitted bounds are pushed as null
+OP_SLICE = 25
+# operand is the number of keys and values on the stack, a key is followed by its value
+OP_HASH = 26
+
+# opcode -> (name, number of operands)
+DEFINITIONS = {
+    OP_CONSTANT:        ("OP_CONSTANT", 1),
+    OP_POP:             ("OP_POP", 0),
+    OP_TRUE:            ("OP_TRUE", 0),
+    OP_FALSE:           ("OP_FALSE", 0),
+    OP_NULL:            ("OP_NULL", 0),
+    OP_ADD:             ("OP_ADD", 0),
+    OP_SUB:             ("OP_SUB", 0),
+    OP_MUL:             ("OP_MUL", 0),
+    OP_DIV:             ("OP_DIV", 0),
+    OP_EQUAL:           ("OP_EQUAL", 0),
+    OP_NOT_EQUAL:       ("OP_NOT_EQUAL", 0),
+    OP_LESS_THAN:       ("OP_LESS_THAN", 0),
+    OP_GREATER_THAN:    ("OP_GREATER_THAN", 0),
+    OP_MINUS:           ("OP_MINUS", 0),
+    OP_NOT:             ("OP_NOT", 0),
+    OP_JUMP:            ("OP_JUMP", 1),
+    OP_JUMP_IF_FALSE:   ("OP_JUMP_IF_FALSE", 1),
+    OP_GET_NAME:        ("OP_GET_NAME", 1),
+    OP_SET_NAME:        ("OP_SET_NAME", 1),
+    OP_ARRAY:           ("OP_ARRAY", 1),
+    OP_INDEX:           ("OP_INDEX", 0),
+    OP_CALL:            ("OP_CALL", 1),
+    OP_RETURN_VALUE:    ("OP_RETURN_VALUE", 0),
+    OP_CLOSURE:         ("OP_CLOSURE", 1),
+    OP_TAIL_CALL:       ("OP_TAIL_CALL", 1),
+    OP_SLICE:           ("OP_SLICE", 0),
+    OP_HASH:            ("OP_HASH", 1),
+}
+
+class Bytecode:
+    """result of compiling a program.
+
+    Attributes:
+        instructions: instructions of the top level code.
+        constants: constants pool shared by all the instructions
+            including the ones of compiled functions. Names of
+            variables are stored in the pool as python strings.
+    """
+    def __init__(self, instructions: List[int], constants: List[Any]) -> None:
+        self.instructions = instructions
+        self.constants = constants
+
+def disassemble(instructions: List[int]) -> str:
+    """return human readable listing of instructions."""
+    lines = []
+    ip = 0
+    while ip < len(instructions):
+        name, n_operands = DEFINITIONS[instructions[ip]]
+        operands = instructions[ip + 1:ip + 1 + n_operands]
+        line = f"{ip:04d} {name}"
+        if operands:
+            line += " " + " ".join(str(operand) for operand in operands)
+        lines.append(line)
+        ip += 1 + n_operands
+    return "\n".join(lines)
@@ -0,0 +1,236 @@
+"""Compiler lowering Monkey syntax tree to bytecode"""
+
+from typing import Any, List
+
+from monkey.ast import ast
+from monkey.evaluator import mobjects
+from monkey.compiler import code
+from monkey.compiler.code import Bytecode
+
+INFIX_OPCODES = {
+    "+": code.OP_ADD,
+    "-": code.OP_SUB,
+    "*": code.OP_MUL,
+    "/": code.OP_DIV,
+    "==": code.OP_EQUAL,
+    "!=": code.OP_NOT_EQUAL,
+    "<": code.OP_LESS_THAN,
+    ">": code.OP_GREATER_THAN,
+}
+
+PREFIX_OPCODES = {
+    "-": code.OP_MINUS,
+    "!": code.OP_NOT,
+}
+
+class Compiler:
+    """Compile ast.Program into Bytecode.
+
+    Every expression leaves exactly one value on the stack. Statements
+    are compiled either for their value (last statement of a block) or
+    for their effect only, in which case nothing is left on the stack.
+    """
+
+    def __init__(self) -> None:
+        self.constants: List[Any] = []
+        self._constant_index = dict()
+        # stack of instruction lists, one for each function being compiled
+        self.scopes: List[List[int]] = [[]]
+
+    @property
+    def instructions(self) -> List[int]:
+        return self.scopes[-1]
+
+    def emit(self, opcode: int, *operands: int) -> int:
+        """append an instruction and return its position."""
+        position = len(self.instructions)
+        self.instructions.append(opcode)
+        self.instructions.extend(operands)
+        return position
+
+    def _patch_operand(self, position: int, operand: int) -> None:
+        self.instructions[position + 1] = operand
+
+    def add_constant(self, obj: Any, key = None) -> int:
+        """add obj to the constants pool and return its index.
+
+        constants with same key are only stored once.
+        """
+        if key is not None and key in self._constant_index:
+            return self._constant_index[key]
+        self.constants.append(obj)
+        index = len(self.constants) - 1
+        if key is not None:
+            self._constant_index[key] = index
+        return index
+
+    def _name_index(self, name: str) -> int:
+        return self.add_constant(name, ("NAME", name))
+
+    def compile(self, program: ast.Program) -> Bytecode:
+        """compile program and return the Bytecode."""
+        self.c_statements(program.statements)
+        self.emit(code.OP_RETURN_VALUE)
+        return self.bytecode()
+
+    def bytecode(self) -> Bytecode:
+        return Bytecode(self.scopes[0], self.constants)
+
+    def c_statements(self, statements: List[ast.Statement]) -> None:
+        """compile statements leaving value of the last one on the stack."""
+        if len(statements) == 0:
+            self.emit(code.OP_NULL)
+            return
+        for stmt in statements[:-1]:
+            self.c_statement(stmt, keep_value=False)
+        self.c_statement(statements[-1], keep_value=True)
+
+    def c_statement(self, stmt: ast.Statement, keep_value: bool) -> None:
+        if isinstance(stmt, ast.LetStatement):
+            self.c_expression(stmt.expression)
+            self.emit(code.OP_SET_NAME, self._name_index(stmt.identifier.name))
+            if keep_value:
+                self.emit(code.OP_NULL)
+        elif isinstance(stmt, ast.ReturnStatement):
+            if isinstance(stmt.expression, ast.CallExpression):
+                self.c_call_expression(stmt.expression, code.OP_TAIL_CALL)
+            else:
+                self.c_expression(stmt.expression)
+            self.emit(code.OP_RETURN_VALUE)
+        elif isinstance(stmt, ast.ExpressionStatement):
+            expression = stmt.expression
+            if isinstance(expression, ast.IfExpression):
+                self.c_if_expression(expression, keep_value)
+            elif isinstance(expression, ast.WhileExpression):
+                self.c_while_expression(expression, keep_value)
+            else:
+                self.c_expression(expression)
+                if not keep_value:
+                    self.emit(code.OP_POP)
+        elif isinstance(stmt, ast.BlockStatement):
+            self.c_block_statement(stmt, keep_value)
+        else:
+            raise TypeError(f"can't compile statement {stmt.node_type}")
+
+    def c_block_statement(self, block: ast.BlockStatement, keep_value: bool) -> None:
+        if keep_value:
+            self.c_statements(block.statements)
+        else:
+            for stmt in block.statements:
+                self.c_statement(stmt, keep_value=False)
+
+    def c_if_expression(self, node: ast.IfExpression, keep_value: bool = True) -> None:
+        """compile if expression.
+
+            <condition>
+            OP_JUMP_IF_FALSE else
+            <consequence>
+            OP_JUMP end
+        else:
+            <alternative> | OP_NULL
+        end:
+        """
+        self.c_expression(node.condition)
+        jump_if_false = self.emit(code.OP_JUMP_IF_FALSE, -1)
+        self.c_block_statement(node.consequence, keep_value)
+        if node.alternative is None and not keep_value:
+            self._patch_operand(jump_if_false, len(self.instructions))
+            return
+        jump = self.emit(code.OP_JUMP, -1)
+        self._patch_operand(jump_if_false, len(self.instructions))
+        if node.alternative is not None:
+            self.c_block_statement(node.alternative, keep_value)
+        else:
+            self.emit(code.OP_NULL)
+        self._patch_operand(jump, len(self.instructions))
+
+    def c_while_expression(self, node: ast.WhileExpression, keep_value: bool = True) -> None:
+        """compile while expression.
+
+        value of a while expression is the value of the last
+        evaluated body or null, it is only kept on the stack if needed.
+
+            [OP_NULL]
+        loop:
+            <condition>
+            OP_JUMP_IF_FALSE end
+            [OP_POP]
+            <body>
+            OP_JUMP loop
+        end:
+        """
+        if keep_value:
+            self.emit(code.OP_NULL)
+        loop_start = len(self.instructions)
+        self.c_expression(node.condition)
+        jump_if_false = self.emit(code.OP_JUMP_IF_FALSE, -1)
+        if keep_value:
+            self.emit(code.OP_POP)
+        self.c_block_statement(node.body, keep_value)
+        self.emit(code.OP_JUMP, loop_start)
+        self._patch_operand(jump_if_false, len(self.instructions))
+
+    def c_function_literal(self, node: ast.FunctionLiteral) -> None:
+        self.scopes.append([])
+        self.c_statements(node.body.statements)
+        self.emit(code.OP_RETURN_VALUE)
+        instructions = self.scopes.pop()
+        parameters = [parameter.name for parameter in node.parameters]
+        function = mobjects.CompiledFunction(instructions, parameters, self.constants)
+        self.emit(code.OP_CLOSURE, self.add_constant(function))
+
+    def c_call_expression(self, node: ast.CallExpression, opcode: int = code.OP_CALL) -> None:
+        self.c_expression(node.function)
+        for argument in node.arguments:
+            self.c_expression(argument)
+        self.emit(opcode, len(node.arguments))
+
+    def c_expression(self, node: ast.Expression) -> None:
+        if isinstance(node, ast.InfixExpression):
+            self.c_expression(node.left)
+            self.c_expression(node.right)
+            self.emit(INFIX_OPCODES[node.operator])
+        elif isinstance(node, ast.Identifier):
+            self.emit(code.OP_GET_NAME, self._name_index(node.name))
+        elif isinstance(node, ast.IntegerLiteral):
+            index = self.add_constant(mobjects.construct_integer(node.value), ("INTEGER", node.value))
+            self.emit(code.OP_CONSTANT, index)
+        elif isinstance(node, ast.CallExpression):
+            self.c_call_expression(node)
+        elif isinstance(node, ast.IfExpression):
+            self.c_if_expression(node)
+        elif isinstance(node, ast.WhileExpression):
+            self.c_while_expression(node)
+        elif isinstance(node, ast.PrefixExpression):
+            self.c_expression(node.right)
+            self.emit(PREFIX_OPCODES[node.operator])
+        elif isinstance(node, ast.Boolean):
+            self.emit(code.OP_TRUE if node.value else code.OP_FALSE)
+        elif isinstance(node, ast.StringLiteral):
+            index = self.add_constant(mobjects.String(node.value), ("STRING", node.value))
+            self.emit(code.OP_CONSTANT, index)
+        elif isinstance(node, ast.IndexExpression):
+            self.c_expression(node.left)
+            self.c_expression(node.index)
+            self.emit(code.OP_INDEX)
+        elif isinstance(node, ast.SliceExpression):
+            self.c_expression(node.left)
+            for bound in (node.start, node.end):
+                if bound is None:
+                    self.emit(code.OP_NULL)
+                else:
+                    self.c_expression(bound)
+            self.emit(code.OP_SLICE)
+        elif isinstance(node, ast.ArrayLiteral):
+            for element in node.elements:
+                self.c_expression(element)
+            self.emit(code.OP_ARRAY, len(node.elements))
+        elif isinstance(node, ast.HashLiteral):
+            for key, value in node.pairs.items():
+                self.c_expression(key)
+                self.c_expression(value)
+            self.emit(code.OP_HASH, 2 * len(node.pairs))
+        elif isinstance(node, ast.FunctionLiteral):
+            self.c_function_literal(node)
+        else:
+            raise TypeError(f"can't compile expression {node.node_type}")
@@ -1,7 +1,17 @@
 """Defines built-in functions for Monkey Language."""
 
+from array import array
+from bisect import bisect_left
+from types import FunctionType
+from typing import Callable, List, Optional, Sequence, Union
+
+from monkey.ast.parser import parse_body
 from monkey.evaluator import mobjects
 from monkey.evaluator import evaluator
+from monkey.evaluator import memo
+from monkey.evaluator import tiering
+from monkey.evaluator import vec
+from monkey.evaluator.environment import Frame
 
 def m_error(msg) -> mobjects.Error:
     """create an error in Monkey"""
@@ -11,9 +21,11 @@ def m_len(*args) -> mobjects.Object:
     if len(args) != 1:
         return m_error(f"len takes exactly one argument ({len(args)} given)")
     if isinstance(args[0], mobjects.String):
-        return mobjects.Integer(value=len(args[0].value))
+        return mobjects.construct_integer(args[0].length())
     if isinstance(args[0], mobjects.Array):
-        return mobjects.Integer(value=len(args[0].elements))
+        return mobjects.construct_integer(args[0].length())
+    if isinstance(args[0], mobjects.Hash):
+        return mobjects.construct_integer(len(args[0].pairs))
     return m_error(f"object of type {args[0].type()} has no len()")
 
 def m_puts(*args) -> mobjects.Object:
@@ -24,18 +36,355 @@ def m_append(*args) -> mobjects.Object:
     if len(args) != 2:
         return m_error(f"append takes exactly 2 arguments ({len(args)} given)")
     array, value = args
-    if array.type() != mobjects.ARRAY_OBJ:
+    if array.tag != mobjects.ARRAY_OBJ:
         return m_error(f"object of type {args[0].type()} has no append()")
-    array.elements.append(value)
+    array.append(value)
+    return evaluator.NULL
+
+def m_array(*args) -> mobjects.Object:
+    if len(args) not in (1, 2):
+        return m_error(f"array takes 1 or 2 arguments ({len(args)} given)")
+    n = args[0]
+    if n.tag != mobjects.INTEGER_OBJ or n.value < 0:
+        return m_error("array size must be a non negative integer")
+    # every element is the same fill value, 0 by default
+    fill = args[1] if len(args) == 2 else mobjects.construct_integer(0)
+    if type(fill) is mobjects.Integer:
+        try:
+            return mobjects.Array(packed=array("q", [fill.value]) * n.value)
+        except OverflowError:
+            pass
+    return mobjects.Array([fill] * n.value)
+
+def m_keys(*args) -> mobjects.Object:
+    if len(args) != 1:
+        return m_error(f"keys takes exactly one argument ({len(args)} given)")
+    if args[0].tag != mobjects.HASH_OBJ:
+        return m_error(f"object of type {args[0].type()} has no keys()")
+    return mobjects.Array([key for key, _ in args[0].pairs.values()])
+
+def m_values(*args) -> mobjects.Object:
+    if len(args) != 1:
+        return m_error(f"values takes exactly one argument ({len(args)} given)")
+    if args[0].tag != mobjects.HASH_OBJ:
+        return m_error(f"object of type {args[0].type()} has no values()")
+    return mobjects.Array([value for _, value in args[0].pairs.values()])
+
+def m_has(*args) -> mobjects.Object:
+    if len(args) != 2:
+        return m_error(f"has takes exactly 2 arguments ({len(args)} given)")
+    hash_obj, key = args
+    if hash_obj.tag != mobjects.HASH_OBJ:
+        return m_error(f"object of type {hash_obj.type()} has no has()")
+    if not isinstance(key, mobjects.Hashable):
+        return m_error(f"unusable as hash key: {key.type()}")
+    return evaluator.construct_boolean(key.hash_key() in hash_obj.pairs)
+
+def caller(function: mobjects.Object, n_args: int, n_calls: int
+           ) -> Union[Callable[..., mobjects.Object], mobjects.Error]:
+    """python callable calling function with n_args arguments.
+
+    used by builtins calling a function for every element of an array.
+    The arguments are checked once here instead of on every call, calls
+    raise ErrorSignal on errors. n_calls is the expected number of calls,
+    it counts towards promoting the function (see tiering).
+    """
+    if type(function) is mobjects.Builtin:
+        body = function.function
+        check = evaluator.m_check
+        return lambda *args: check(body(*args))
+    if type(function) is mobjects.Closure:
+        from monkey.vm import vm
+        parameters = function.function.parameters
+        if len(parameters) != n_args:
+            return m_error(f"function expected {len(parameters)} arguments but"
+                           f" {n_args} were given")
+        check = evaluator.m_check
+        return lambda *args: check(vm.call_closure(function, args))
+    if type(function) is not mobjects.Function:
+        return m_error(f"{function.type()} is not callable")
+    if function.parameters is None:
+        # python function of the transpiler
+        from monkey.transpiler import runtime
+        code = function.code
+        if type(code) is not FunctionType:
+            return m_error(f"{function.type()} is not callable")
+        if code.__code__.co_argcount != n_args:
+            return m_error(f"function expected {code.__code__.co_argcount} arguments"
+                           f" but {n_args} were given")
+        box, unbox, trampoline = runtime.box, runtime.unbox, runtime.trampoline
+        return lambda *args: box(trampoline(code(*map(unbox, args))))
+    if len(function.parameters) != n_args:
+        return m_error(f"function expected {len(function.parameters)} arguments but"
+                       f" {n_args} were given")
+    if function.memo is not None or function.scope is None:
+        call_expression = evaluator.m_eval_call_expression
+        return lambda *args: call_expression(function, list(args))
+    if function.body.tokens is not None:
+        parse_body(function.body)
+    code = function.code
+    if code is None and tiering.call_threshold:
+        function.calls += n_calls
+        if function.calls >= tiering.call_threshold:
+            code = tiering.promote_function(function)
+    scope, env, body = function.scope, function.env, function.body
+    m_eval, unwrap = evaluator.m_eval, evaluator.m_unwrap_return_value
+    ReturnSignal = evaluator.ReturnSignal
+
+    def call(*args):
+        frame = Frame(scope, env)
+        frame.slots[:n_args] = args
+        try:
+            if code is not None:
+                return code(frame)
+            return m_eval(body, frame)
+        except ReturnSignal as signal:
+            return unwrap(signal.value)
+    return call
+
+def m_map(*args) -> mobjects.Object:
+    if len(args) != 2:
+        return m_error(f"map takes exactly 2 arguments ({len(args)} given)")
+    elements, function = args
+    if elements.tag != mobjects.ARRAY_OBJ:
+        return m_error(f"object of type {elements.type()} has no map()")
+    call = caller(function, 1, elements.length())
+    if type(call) is mobjects.Error:
+        return call
+    try:
+        return mobjects.Array([call(element) for element in elements.objects()])
+    except evaluator.ErrorSignal as signal:
+        return signal.error
+
+def m_filter(*args) -> mobjects.Object:
+    if len(args) != 2:
+        return m_error(f"filter takes exactly 2 arguments ({len(args)} given)")
+    elements, function = args
+    if elements.tag != mobjects.ARRAY_OBJ:
+        return m_error(f"object of type {elements.type()} has no filter()")
+    call = caller(function, 1, elements.length())
+    if type(call) is mobjects.Error:
+        return call
+    is_true = evaluator.m_is_true
+    try:
+        return mobjects.Array([element for element in elements.objects()
+                               if is_true(call(element))])
+    except evaluator.ErrorSignal as signal:
+        return signal.error
+
+def m_reduce(*args) -> mobjects.Object:
+    if len(args) != 3:
+        return m_error(f"reduce takes exactly 3 arguments ({len(args)} given)")
+    elements, result, function = args
+    if elements.tag != mobjects.ARRAY_OBJ:
+        return m_error(f"object of type {elements.type()} has no reduce()")
+    call = caller(function, 2, elements.length())
+    if type(call) is mobjects.Error:
+        return call
+    try:
+        for element in elements.objects():
+            result = call(result, element)
+    except evaluator.ErrorSignal as signal:
+        return signal.error
+    return result
+
+def m_sum(*args) -> mobjects.Object:
+    if len(args) != 1:
+        return m_error(f"sum takes exactly one argument ({len(args)} given)")
+    elements = args[0]
+    if elements.tag != mobjects.ARRAY_OBJ:
+        return m_error(f"object of type {elements.type()} has no sum()")
+    integers = elements.integers()
+    if integers is not None:
+        return mobjects.construct_integer(sum(integers))
+    result = mobjects.construct_integer(0)
+    for element in elements.objects():
+        result = evaluator.m_eval_infix_expression(result, "+", element)
+        if type(result) is mobjects.Error:
+            break
+    return result
+
+def m_range(*args) -> mobjects.Object:
+    if len(args) not in (1, 2, 3):
+        return m_error(f"range takes 1 to 3 arguments ({len(args)} given)")
+    for arg in args:
+        if arg.tag != mobjects.INTEGER_OBJ:
+            return m_error(f"range arguments must be integers, not {arg.type()}")
+    if len(args) == 3 and args[2].value == 0:
+        return m_error("range step must not be zero")
+    if len(args) == 1:
+        values = range(args[0].value)
+    else:
+        values = range(*[arg.value for arg in args])
+    try:
+        length = len(values)
+    except OverflowError:
+        return m_error("range is too long")
+    # the integers are created when they are read, see Array
+    result = mobjects.Array()
+    result.view = (values, 0, length)
+    return result
+
+def ordering_keys(name: str, elements: mobjects.Array
+                  ) -> Union[Sequence[Union[int, str]], mobjects.Error]:
+    """python values ordering the elements of an array.
+
+    the values of packed arrays are used as they are, otherwise the
+    elements must be all integers or all strings.
+    """
+    integers = elements.integers()
+    if integers is not None:
+        return integers
+    keys = []
+    kind = None
+    for element in elements.objects():
+        if kind is None and element.tag in (mobjects.INTEGER_OBJ, mobjects.STRING_OBJ):
+            kind = element.tag
+        if element.tag != kind:
+            return m_error(f"{name} needs all integers or all strings, not {element.type()}")
+        keys.append(element.value)
+    return keys
+
+def sorted_array(name: str, elements: mobjects.Array,
+                 function: Optional[mobjects.Object]) -> mobjects.Object:
+    """sorted copy of elements, ordered by function(element) if given."""
+    if function is None:
+        keys = ordering_keys(name, elements)
+        if type(keys) is mobjects.Error:
+            return keys
+        integers = elements.integers()
+        if integers is not None:
+            try:
+                return mobjects.Array(packed=array("q", sorted(integers)))
+            except OverflowError:
+                # range of integers above 64 bits
+                return mobjects.Array([mobjects.construct_integer(value)
+                                       for value in sorted(integers)])
+        objects = list(elements.objects())
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        return mobjects.Array([objects[index] for index in order])
+    call = caller(function, 1, elements.length())
+    if type(call) is mobjects.Error:
+        return call
+    try:
+        keys = mobjects.Array([call(element) for element in elements.objects()])
+    except evaluator.ErrorSignal as signal:
+        return signal.error
+    keys = ordering_keys(name, keys)
+    if type(keys) is mobjects.Error:
+        return keys
+    # sorting the positions keeps the sort stable without comparing elements
+    order = sorted(range(len(keys)), key=keys.__getitem__)
+    integers = elements.integers()
+    if integers is not None:
+        try:
+            return mobjects.Array(packed=array("q", [integers[index] for index in order]))
+        except OverflowError:
+            pass
+    objects = list(elements.objects())
+    return mobjects.Array([objects[index] for index in order])
+
+def m_sorted(*args) -> mobjects.Object:
+    if len(args) not in (1, 2):
+        return m_error(f"sorted takes 1 or 2 arguments ({len(args)} given)")
+    if args[0].tag != mobjects.ARRAY_OBJ:
+        return m_error(f"object of type {args[0].type()} can't be sorted")
+    return sorted_array("sorted", args[0], args[1] if len(args) == 2 else None)
+
+def m_sort(*args) -> mobjects.Object:
+    if len(args) not in (1, 2):
+        return m_error(f"sort takes 1 or 2 arguments ({len(args)} given)")
+    elements = args[0]
+    if elements.tag != mobjects.ARRAY_OBJ:
+        return m_error(f"object of type {elements.type()} can't be sorted")
+    result = sorted_array("sort", elements, args[1] if len(args) == 2 else None)
+    if type(result) is mobjects.Error:
+        return result
+    # the sorted storage replaces the old one, views of the array keep
+    # the old storage which is never modified
+    elements._elements = result._elements
+    elements.packed = result.packed
+    elements.view = None
     return evaluator.NULL
 
+def m_bsearch(*args) -> mobjects.Object:
+    if len(args) != 2:
+        return m_error(f"bsearch takes exactly 2 arguments ({len(args)} given)")
+    elements, value = args
+    if elements.tag != mobjects.ARRAY_OBJ:
+        return m_error(f"object of type {elements.type()} can't be searched")
+    keys = ordering_keys("bsearch", elements)
+    if type(keys) is mobjects.Error:
+        return keys
+    if len(keys) == 0 or type(value) is not type(elements.get(0)):
+        return mobjects.construct_integer(-1)
+    index = bisect_left(keys, value.value)
+    if index < len(keys) and keys[index] == value.value:
+        return mobjects.construct_integer(index)
+    return mobjects.construct_integer(-1)
+
+def extreme(name: str, args, pick: Callable) -> mobjects.Object:
+    """smallest or largest element of an array, picked by min or max."""
+    if len(args) != 1:
+        return m_error(f"{name} takes exactly one argument ({len(args)} given)")
+    elements = args[0]
+    if elements.tag != mobjects.ARRAY_OBJ:
+        return m_error(f"object of type {elements.type()} has no {name}()")
+    if elements.length() == 0:
+        return m_error(f"{name}() of empty array")
+    integers = elements.integers()
+    if integers is not None:
+        return mobjects.construct_integer(pick(integers))
+    keys = ordering_keys(name, elements)
+    if type(keys) is mobjects.Error:
+        return keys
+    return elements.get(pick(range(len(keys)), key=keys.__getitem__))
+
+def m_min(*args) -> mobjects.Object:
+    return extreme("min", args, min)
+
+def m_max(*args) -> mobjects.Object:
+    return extreme("max", args, max)
+
+def m_unique(*args) -> mobjects.Object:
+    if len(args) != 1:
+        return m_error(f"unique takes exactly one argument ({len(args)} given)")
+    elements = args[0]
+    if elements.tag != mobjects.ARRAY_OBJ:
+        return m_error(f"object of type {elements.type()} has no unique()")
+    integers = elements.integers()
+    if integers is not None:
+        # dicts keep the first position of every value
+        values = dict.fromkeys(integers)
+        try:
+            return mobjects.Array(packed=array("q", values))
+        except OverflowError:
+            # range of integers above 64 bits
+            return mobjects.Array([mobjects.construct_integer(value) for value in values])
+    seen = set()
+    others: List[mobjects.Object] = []
+    result = []
+    for element in elements.objects():
+        if isinstance(element, mobjects.Hashable):
+            key = element.hash_key()
+            if key in seen:
+                continue
+            seen.add(key)
+        else:
+            # arrays, hashes and functions are compared one by one
+            if any(mobjects.equal(element, other) for other in others):
+                continue
+            others.append(element)
+        result.append(element)
+    return mobjects.Array(result)
+
 def m_input(*args) -> mobjects.Object:
     if len(args) > 1:
         return m_error(f"input takes atmost one argument ({len(args)} given)")
     print(*args, end="")
     value = input()
     try:
-        return mobjects.Integer(int(value))
+        return mobjects.construct_integer(int(value))
     except ValueError:
         return m_error(f"invalid literal for integer: '{value}'")
 
@@ -46,10 +395,62 @@ def m_raw_input(*args) -> mobjects.Object:
     value = input()
     return mobjects.String(value)
 
+MEMO_UNSUPPORTED = "memo is only supported by the eval, closure and stack engines"
+
+def m_memo(*args) -> mobjects.Object:
+    if len(args) not in (1, 2):
+        return m_error(f"memo takes 1 or 2 arguments ({len(args)} given)")
+    function = args[0]
+    maxsize = memo.DEFAULT_SIZE
+    if len(args) == 2:
+        if args[1].tag != mobjects.INTEGER_OBJ or args[1].value < 0:
+            return m_error("memo size must be a non negative integer")
+        # 0 keeps all results
+        maxsize = args[1].value or None
+    if type(function) is mobjects.Function and function.body is not None:
+        return memo.memoize(function, maxsize)
+    if function.tag == mobjects.FUNCTION_OBJ:
+        # compiled functions of the vm and python functions of the
+        # transpiler, their bodies aren't known
+        return m_error(MEMO_UNSUPPORTED)
+    return m_error(f"object of type {function.type()} can't be memoized")
+
+def m_memo_stats(*args) -> mobjects.Object:
+    if len(args) != 1:
+        return m_error(f"memo_stats takes exactly one argument ({len(args)} given)")
+    table = getattr(args[0], "memo", None)
+    if table is None:
+        return m_error(f"object of type {args[0].type()} is not memoized")
+    return mobjects.Array([
+        mobjects.construct_integer(table.hits),
+        mobjects.construct_integer(table.misses),
+        mobjects.construct_integer(table.evictions),
+        mobjects.construct_integer(len(table.results)),
+    ])
+
 builtins = {
-    "len": mobjects.Builtin(m_len),
+    "len": mobjects.Builtin(m_len, pure=True),
     "puts": mobjects.Builtin(m_puts),
     "append": mobjects.Builtin(m_append),
+    "array": mobjects.Builtin(m_array, pure=True),
+    "keys": mobjects.Builtin(m_keys, pure=True),
+    "values": mobjects.Builtin(m_values, pure=True),
+    "has": mobjects.Builtin(m_has, pure=True),
+    "map": mobjects.Builtin(m_map),
+    "filter": mobjects.Builtin(m_filter),
+    "reduce": mobjects.Builtin(m_reduce),
+    "sum": mobjects.Builtin(m_sum, pure=True),
+    "range": mobjects.Builtin(m_range, pure=True),
+    "sort": mobjects.Builtin(m_sort),
+    "sorted": mobjects.Builtin(m_sorted, pure=True),
+    "bsearch": mobjects.Builtin(m_bsearch, pure=True),
+    "min": mobjects.Builtin(m_min, pure=True),
+    "max": mobjects.Builtin(m_max, pure=True),
+    "unique": mobjects.Builtin(m_unique, pure=True),
+    # hash of vector functions, see vec
+    "vec": vec.module,
     "input": mobjects.Builtin(m_input),
     "raw_input": mobjects.Builtin(m_raw_input),
+    "memo": mobjects.Builtin(m_memo),
+    "memo_stats": mobjects.Builtin(m_memo_stats),
 }
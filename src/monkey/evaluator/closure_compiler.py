@@ -0,0 +1,396 @@
+"""Closure compiler for Monkey Language.
+
+Translates the syntax tree once into nested python closures, every
+closure takes the current Environment (or Frame inside functions) and
+returns the value of its node.
+Node types and operators are resolved at compile time so no dispatch is
+left for the run time.
+
+Non-local control flow (return statements and evaluation errors) is
+implemented with the same python exceptions as m_eval.
+"""
+
+from typing import Callable, List
+import operator as py_operator
+
+from monkey.ast import ast
+from monkey.ast.resolver import resolve
+from monkey.ast.parser import parse_body
+from monkey.evaluator import mobjects
+from monkey.evaluator import evaluator
+from monkey.evaluator import memo
+from monkey.evaluator import tiering
+from monkey.evaluator.builtins import builtins
+from monkey.evaluator.environment import Environment, Frame
+
+TRUE = evaluator.TRUE
+FALSE = evaluator.FALSE
+NULL = evaluator.NULL
+
+Integer = mobjects.Integer
+construct_integer = mobjects.construct_integer
+Function = mobjects.Function
+Builtin = mobjects.Builtin
+TailCall = mobjects.TailCall
+
+ReturnSignal = evaluator.ReturnSignal
+ErrorSignal = evaluator.ErrorSignal
+check = evaluator.m_check
+
+Code = Callable[[Environment], mobjects.Object]
+
+INTEGER_ARITHMETIC_OPERATORS = {
+    "+": py_operator.add,
+    "-": py_operator.sub,
+    "*": py_operator.mul,
+    "/": py_operator.floordiv,
+}
+
+INTEGER_COMPARISON_OPERATORS = {
+    "<": py_operator.lt,
+    ">": py_operator.gt,
+    "==": py_operator.eq,
+    "!=": py_operator.ne,
+}
+
+def is_true(value: mobjects.Object) -> bool:
+    if value is TRUE:
+        return True
+    if value is FALSE:
+        return False
+    return evaluator.m_is_true(value)
+
+def apply_function(function: mobjects.Object, args: List[mobjects.Object]) -> mobjects.Object:
+    """call function with args.
+
+    returned tail calls are performed in a loop, see TailCall.
+    memoized functions are handled like evaluator.m_eval_call_expression.
+    functions created by m_eval and functions parsed lazily are compiled
+    on their first call here.
+    """
+    pending = None
+    while True:
+        if type(function) is Function:
+            parameters = function.parameters
+            if len(parameters) != len(args):
+                msg = f"function expected {len(parameters)} arguments but"
+                msg += f" {len(args)} were given"
+                raise ErrorSignal(evaluator.m_error(msg))
+            table = function.memo
+            if table is not None:
+                key = table.key(function, args)
+                if key is not None:
+                    value = table.get(key)
+                    if value is not None:
+                        break
+                    if pending is None:
+                        pending = []
+                    pending.append((table, key))
+            code = function.code
+            if code is None:
+                # created by m_eval before its body was compiled (see
+                # tiering), or its body wasn't parsed yet
+                if function.body.tokens is not None:
+                    parse_body(function.body)
+                code = tiering.promote_function(function)
+            env = Frame(function.scope, function.env)
+            env.slots[:len(args)] = args
+            try:
+                value = code(env)
+                break
+            except ReturnSignal as signal:
+                value = signal.value
+                if type(value) is not TailCall:
+                    break
+                function = value.function
+                args = value.args
+                continue
+        if type(function) is Builtin:
+            value = check(function.function(*args))
+            break
+        raise ErrorSignal(evaluator.m_error(f"{function.type()} is not callable"))
+    if pending is not None:
+        for table, key in pending:
+            table.put(key, value)
+    return value
+
+def c_statements(statements: List[ast.Statement]) -> Code:
+    """compile statements, result of the code is value of the last one."""
+    if len(statements) == 0:
+        return lambda env: NULL
+    codes = [c_node(stmt) for stmt in statements]
+    if len(codes) == 1:
+        return codes[0]
+    *init, last = codes
+    def statements_code(env):
+        for code in init:
+            code(env)
+        return last(env)
+    return statements_code
+
+def c_block_statement(node: ast.BlockStatement) -> Code:
+    return c_statements(node.statements)
+
+def c_let_statement(node: ast.LetStatement) -> Code:
+    name = node.identifier.name
+    value = c_node(node.expression)
+    slot = node.slot
+    if slot is None:
+        def global_let_code(env):
+            env.set(name, value(env))
+            return NULL
+        return global_let_code
+    def let_code(env):
+        env.slots[slot] = value(env)
+        return NULL
+    return let_code
+
+def c_return_statement(node: ast.ReturnStatement) -> Code:
+    if isinstance(node.expression, ast.CallExpression):
+        function = c_node(node.expression.function)
+        arguments = [c_node(argument) for argument in node.expression.arguments]
+        def tail_call_code(env):
+            callee = function(env)
+            raise ReturnSignal(TailCall(callee, [argument(env) for argument in arguments]))
+        return tail_call_code
+    value = c_node(node.expression)
+    def return_code(env):
+        raise ReturnSignal(value(env))
+    return return_code
+
+def c_expression_statement(node: ast.ExpressionStatement) -> Code:
+    return c_node(node.expression)
+
+def c_identifier(node: ast.Identifier) -> Code:
+    name = node.name
+    builtin = builtins.get(name)
+
+    def not_found():
+        if builtin is not None:
+            return builtin
+        raise ErrorSignal(evaluator.m_error(f"name '{name}' is not defined"))
+
+    depth = node.depth
+    slot = node.slot
+    if depth is None:
+        # inline cache, see evaluator.m_eval_identifier
+        def global_code(env):
+            global_env = env.globals
+            if node.cache_env is global_env and node.cache_version == global_env.version:
+                value = node.cache_value
+                if value is None:
+                    return global_env.store[name]
+                return value
+            return evaluator.m_eval_global_identifier(node, global_env)
+        return global_code
+    if depth == 0:
+        def local_code(env):
+            value = env.slots[slot]
+            if value is not None:
+                return value
+            value = env.outer.get(name)
+            if value is not None:
+                return value
+            return not_found()
+        return local_code
+    def outer_code(env):
+        for _ in range(depth):
+            env = env.outer
+        value = env.slots[slot]
+        if value is not None:
+            return value
+        value = env.outer.get(name)
+        if value is not None:
+            return value
+        return not_found()
+    return outer_code
+
+def c_integer_literal(node: ast.IntegerLiteral) -> Code:
+    value = construct_integer(node.value)
+    return lambda env: value
+
+def c_string_literal(node: ast.StringLiteral) -> Code:
+    value = mobjects.String(node.value)
+    return lambda env: value
+
+def c_boolean(node: ast.Boolean) -> Code:
+    value = evaluator.construct_boolean(node.value)
+    return lambda env: value
+
+def c_array_literal(node: ast.ArrayLiteral) -> Code:
+    elements = [c_node(element) for element in node.elements]
+    def array_code(env):
+        return mobjects.Array([element(env) for element in elements])
+    return array_code
+
+def c_hash_literal(node: ast.HashLiteral) -> Code:
+    items = []
+    for key, value in node.pairs.items():
+        items.append(c_node(key))
+        items.append(c_node(value))
+    def hash_code(env):
+        return check(evaluator.m_eval_hash_pairs([item(env) for item in items]))
+    return hash_code
+
+def c_prefix_expression(node: ast.PrefixExpression) -> Code:
+    right = c_node(node.right)
+    if node.operator == "-":
+        def minus_code(env):
+            value = right(env)
+            if type(value) is Integer:
+                return construct_integer(-value.value)
+            raise ErrorSignal(evaluator.m_eval_prefix_sub_operator(value))
+        return minus_code
+    if node.operator == "!":
+        def not_code(env):
+            return FALSE if is_true(right(env)) else TRUE
+        return not_code
+    error = evaluator.m_error(f"unknown prefix operator: {node.operator}")
+    def unknown_code(env):
+        raise ErrorSignal(error)
+    return unknown_code
+
+def c_infix_expression(node: ast.InfixExpression) -> Code:
+    left = c_node(node.left)
+    right = c_node(node.right)
+    operator = node.operator
+
+    func = INTEGER_ARITHMETIC_OPERATORS.get(operator)
+    if func is not None:
+        def arithmetic_code(env):
+            lvalue = left(env)
+            rvalue = right(env)
+            if type(lvalue) is Integer and type(rvalue) is Integer:
+                return construct_integer(func(lvalue.value, rvalue.value))
+            return check(evaluator.m_eval_infix_expression(lvalue, operator, rvalue))
+        return arithmetic_code
+
+    func = INTEGER_COMPARISON_OPERATORS.get(operator)
+    if func is not None:
+        def comparison_code(env):
+            lvalue = left(env)
+            rvalue = right(env)
+            if type(lvalue) is Integer and type(rvalue) is Integer:
+                return TRUE if func(lvalue.value, rvalue.value) else FALSE
+            return check(evaluator.m_eval_infix_expression(lvalue, operator, rvalue))
+        return comparison_code
+
+    def infix_code(env):
+        return check(evaluator.m_eval_infix_expression(left(env), operator, right(env)))
+    return infix_code
+
+def c_if_expression(node: ast.IfExpression) -> Code:
+    condition = c_node(node.condition)
+    consequence = c_node(node.consequence)
+    if node.alternative is None:
+        def if_code(env):
+            if is_true(condition(env)):
+                return consequence(env)
+            return NULL
+        return if_code
+    alternative = c_node(node.alternative)
+    def if_else_code(env):
+        if is_true(condition(env)):
+            return consequence(env)
+        return alternative(env)
+    return if_else_code
+
+def c_while_expression(node: ast.WhileExpression) -> Code:
+    condition = c_node(node.condition)
+    body = c_node(node.body)
+    def while_code(env):
+        result = NULL
+        while is_true(condition(env)):
+            result = body(env)
+        return result
+    return while_code
+
+def c_index_expression(node: ast.IndexExpression) -> Code:
+    left = c_node(node.left)
+    index = c_node(node.index)
+    def index_code(env):
+        return check(evaluator.m_eval_index_expression(left(env), index(env)))
+    return index_code
+
+def c_slice_expression(node: ast.SliceExpression) -> Code:
+    left = c_node(node.left)
+    start = c_node(node.start) if node.start is not None else lambda env: None
+    end = c_node(node.end) if node.end is not None else lambda env: None
+    def slice_code(env):
+        return check(evaluator.m_eval_slice_expression(left(env), start(env), end(env)))
+    return slice_code
+
+def c_function_literal(node: ast.FunctionLiteral) -> Code:
+    parameters = node.parameters
+    body = node.body
+    scope = node.scope
+    # bodies parsed lazily are parsed and compiled by the first call, see
+    # apply_function
+    compiled = c_node(body) if body.tokens is None else None
+    def function_code(env):
+        code = compiled if compiled is not None else tiering.compiled_body(body)
+        if memo.auto_memo:
+            return Function(parameters, body, env, code, scope, memo.MemoTable(memo.auto_memo_size))
+        return Function(parameters, body, env, code, scope)
+    return function_code
+
+def c_call_expression(node: ast.CallExpression) -> Code:
+    function = c_node(node.function)
+    arguments = [c_node(argument) for argument in node.arguments]
+    def call_code(env):
+        return apply_function(function(env), [argument(env) for argument in arguments])
+    return call_code
+
+COMPILERS = {
+    ast.LetStatement: c_let_statement,
+    ast.ReturnStatement: c_return_statement,
+    ast.ExpressionStatement: c_expression_statement,
+    ast.BlockStatement: c_block_statement,
+    ast.Identifier: c_identifier,
+    ast.IntegerLiteral: c_integer_literal,
+    ast.StringLiteral: c_string_literal,
+    ast.Boolean: c_boolean,
+    ast.ArrayLiteral: c_array_literal,
+    ast.HashLiteral: c_hash_literal,
+    ast.PrefixExpression: c_prefix_expression,
+    ast.InfixExpression: c_infix_expression,
+    ast.IfExpression: c_if_expression,
+    ast.WhileExpression: c_while_expression,
+    ast.IndexExpression: c_index_expression,
+    ast.SliceExpression: c_slice_expression,
+    ast.FunctionLiteral: c_function_literal,
+    ast.CallExpression: c_call_expression,
+}
+
+def c_node(node: ast.Node) -> Code:
+    """compile a statement or expression node."""
+    compiler = COMPILERS.get(type(node))
+    if compiler is None:
+        return lambda env: NULL
+    return compiler(node)
+
+def compile_program(program: ast.Program) -> Code:
+    """compile program into a callable taking the global Environment.
+
+    the callable returns the result of the program, Error objects are
+    returned (not raised) same as m_eval.
+    """
+    if not program.resolved:
+        resolve(program)
+    code = c_statements(program.statements)
+    def program_code(env):
+        try:
+            try:
+                return code(env)
+            except ReturnSignal as signal:
+                value = signal.value
+                if type(value) is TailCall:
+                    return apply_function(value.function, value.args)
+                return value
+        except ErrorSignal as signal:
+            return signal.error
+    return program_code
+
+def run_program(program: ast.Program, env: Environment) -> mobjects.Object:
+    """compile program to closures and run it in given environment."""
+    return compile_program(program)(env)
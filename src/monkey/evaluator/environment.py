@@ -4,10 +4,22 @@ from typing import Optional
 from monkey.evaluator import mobjects
 
 class Environment():
+    """names bound in a scope without resolved slots, and the global scope.
+
+    version changes whenever a new name is added to the store, inline
+    caches of identifiers (see evaluator.m_eval_identifier) are valid as
+    long as the version of the global environment is unchanged.
+    """
     def __init__(self, outer = None):
         self.store = dict()
         self.outer = outer
+        self.version = 0
     
+    @property
+    def globals(self) -> "Environment":
+        """environment to look up global names in."""
+        return self
+
     def get(self, name: str) -> Optional[mobjects.Object]:
         value = self.store.get(name, None)
         if value is None and self.outer is not None:
@@ -15,7 +27,11 @@ class Environment():
         return value
 
     def set(self, name: str, value: mobjects.Object) -> mobjects.Object:
-        self.store[name] = value
+        store = self.store
+        if name not in store:
+            # the new name can shadow a builtin remembered by a cache
+            self.version += 1
+        store[name] = value
         return value
     
     def __str__(self):
@@ -23,3 +39,38 @@ class Environment():
     
     def __repr__(self):
         return self.__str__()
+
+class Frame():
+    """array backed environment of a function call.
+
+    Variables live in the slots assigned to them by the resolver
+    (see monkey.ast.resolver), empty slots hold None. The outer chain of
+    frames always ends in an Environment holding the global names.
+    """
+    __slots__ = ("slots", "scope", "outer", "globals")
+
+    def __init__(self, scope, outer):
+        self.slots = [None] * scope.size
+        self.scope = scope
+        self.outer = outer
+        self.globals = outer.globals
+
+    def get(self, name: str) -> Optional[mobjects.Object]:
+        """look up name by walking the chain, used when no slot is known."""
+        slot = self.scope.names.get(name)
+        if slot is not None:
+            value = self.slots[slot]
+            if value is not None:
+                return value
+        return self.outer.get(name)
+
+    def set(self, name: str, value: mobjects.Object) -> mobjects.Object:
+        self.slots[self.scope.names[name]] = value
+        return value
+
+    def __str__(self):
+        names = self.scope.names
+        return str({name: self.slots[slot] for name, slot in names.items()})
+
+    def __repr__(self):
+        return self.__str__()
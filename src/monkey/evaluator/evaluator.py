@@ -1,27 +1,50 @@
-"""Evaluator of Monkey Language"""
+"""Evaluator of Monkey Language
+
+Return statements and evaluation errors unwind the evaluator with python
+exceptions (ReturnSignal and ErrorSignal), evaluation of a node never
+returns an Error object. m_eval_program catches them and returns the
+value or the Error like before.
+Helpers evaluating operators on values (m_eval_infix_expression,
+m_eval_index_expression, ...) still return Error objects as they are
+shared with the other engines.
+"""
 
 from typing import List
 import operator as py_operator
 
 from monkey.ast import ast
+from monkey.ast.resolver import resolve
+from monkey.ast.parser import parse_body
 from monkey.evaluator import mobjects
-from monkey.evaluator.environment import Environment
+from monkey.evaluator.environment import Environment, Frame
 from monkey.evaluator.builtins import builtins
+from monkey.evaluator import memo
+from monkey.evaluator import tiering
 
 TRUE = mobjects.Boolean(True)
 FALSE = mobjects.Boolean(False)
 NULL = mobjects.Null()
 
+class ReturnSignal(Exception):
+    """raised by return statements, caught by the enclosing call."""
+    def __init__(self, value: mobjects.Object) -> None:
+        self.value = value
+
+class ErrorSignal(Exception):
+    """raised when evaluation results in an Error object."""
+    def __init__(self, error: mobjects.Error) -> None:
+        self.error = error
+
 def construct_boolean(value: bool) -> mobjects.Boolean:
     return TRUE if value else FALSE
 
 def m_type(value_obj: mobjects.Object) -> str:
     """return type of the value_obj."""
-    return value_obj.type()
+    return value_obj.tag
 
 def m_is_type(value_obj: mobjects.Object, obj_type: str) -> bool:
     """check if value_obj is of given type"""
-    return m_type(value_obj) == obj_type
+    return value_obj.tag == obj_type
 
 def m_error(msg) -> mobjects.Error:
     """create an error in Monkey"""
@@ -30,6 +53,12 @@ def m_error(msg) -> mobjects.Error:
 def m_is_error(obj: mobjects.Object) -> bool:
     return m_is_type(obj, mobjects.ERROR_OBJ)
 
+def m_check(value: mobjects.Object) -> mobjects.Object:
+    """raise ErrorSignal if value is an Error else return it."""
+    if type(value) is mobjects.Error:
+        raise ErrorSignal(value)
+    return value
+
 def m_is_true(value_obj: mobjects.Object) -> bool:
     """determine whether an value/object evaluates to true.
 
@@ -51,14 +80,64 @@ def m_is_true(value_obj: mobjects.Object) -> bool:
     return True
 
 def m_eval_identifier(node: ast.Identifier, env: Environment) -> mobjects.Object:
-    """evaluate a identifier."""
-    value = env.get(node.name)
-    if value is not None:
-        return value
-    value = builtins.get(node.name)
-    if value is not None:
+    """evaluate a identifier.
+
+    resolved identifiers are read directly from their frame slot, if the
+    slot is still empty the look up continues by name in outer scopes.
+    global names are looked up in the global environment and builtins,
+    the node remembers where the name was found until a new global name
+    is added (see Environment.version).
+    """
+    depth = node.depth
+    if depth is not None:
+        frame = env
+        while depth > 0:
+            frame = frame.outer
+            depth -= 1
+        value = frame.slots[node.slot]
+        if value is None:
+            value = frame.outer.get(node.name)
+        if value is not None:
+            return value
+        value = builtins.get(node.name)
+        if value is not None:
+            return value
+        raise ErrorSignal(m_error(f"name '{node.name}' is not defined"))
+
+    global_env = env.globals
+    if node.cache_env is global_env and node.cache_version == global_env.version:
+        value = node.cache_value
+        if value is None:
+            return global_env.store[node.name]
         return value
-    return m_error(f"name '{node.name}' is not defined")
+    return m_eval_global_identifier(node, global_env)
+
+def m_eval_global_identifier(node: ast.Identifier, global_env: Environment) -> mobjects.Object:
+    """look up a global name and fill the inline cache of node."""
+    value = global_env.get(node.name)
+    builtin = None
+    if value is None:
+        value = builtin = builtins.get(node.name)
+        if value is None:
+            raise ErrorSignal(m_error(f"name '{node.name}' is not defined"))
+    if global_env.outer is None:
+        # names of nested environments (unresolved functions) can be
+        # added to any environment of the chain, those aren't cached.
+        node.cache_env = global_env
+        node.cache_version = global_env.version
+        node.cache_value = builtin
+    return value
+
+def m_eval_literal(node: ast.Expression, construct) -> mobjects.Object:
+    """evaluate integer or string literal.
+
+    literal values are immutable, the object is constructed on first
+    evaluation and cached on the node.
+    """
+    value = node.constant
+    if value is None:
+        value = node.constant = construct(node.value)
+    return value
 
 def m_eval_not_operator(right: mobjects.Object) -> mobjects.Boolean:
     """evaluate boolean not operator
@@ -87,7 +166,7 @@ def m_eval_prefix_sub_operator(right: mobjects.Object) -> mobjects.Integer:
     """
     if not m_is_type(right, mobjects.INTEGER_OBJ):
         return m_error(f"unsupported operand type for -: '{right.type()}'")
-    return mobjects.Integer(-right.value)
+    return mobjects.construct_integer(-right.value)
 
 def m_eval_prefix_expression(operator: str, right: mobjects.Object) -> mobjects.Object:
     """evaluate prefix(unary) expression.
@@ -116,7 +195,7 @@ def m_eval_infix_integer_expression(
     }.get(operator)
     if func is not None:
         result = func(left.value, right.value)
-        return mobjects.Integer(value = result)
+        return mobjects.construct_integer(result)
     func = {
         "<": py_operator.lt,
         ">": py_operator.gt,
@@ -141,7 +220,7 @@ def m_eval_infix_string_expression(
         above mentioned otherwise returns the evaluated result. 
     """
     if operator == "+":
-        return mobjects.String(left.value + right.value)
+        return left.concat(right)
     elif operator == "==":
         return construct_boolean(left.value == right.value)
     elif operator == "!=":
@@ -170,6 +249,135 @@ def m_eval_infix_expression(
         return construct_boolean(left != right)
     return m_error(f"unsupported operand type for {operator}: '{left.type()}' and '{right.type()}'")
 
+# Quickening: infix and if nodes replace the generic operator with one
+# specialized for the operand types they observe on their first
+# evaluation. Specialized operators guard on the operand types and return
+# None when the guard fails, the node then falls back to the generic
+# operator for good.
+
+Integer = mobjects.Integer
+String = mobjects.String
+construct_integer = mobjects.construct_integer
+
+def m_int_add(left, right):
+    if type(left) is Integer and type(right) is Integer:
+        return construct_integer(left.value + right.value)
+    return None
+
+def m_int_sub(left, right):
+    if type(left) is Integer and type(right) is Integer:
+        return construct_integer(left.value - right.value)
+    return None
+
+def m_int_mul(left, right):
+    if type(left) is Integer and type(right) is Integer:
+        return construct_integer(left.value * right.value)
+    return None
+
+def m_int_div(left, right):
+    if type(left) is Integer and type(right) is Integer:
+        return construct_integer(left.value // right.value)
+    return None
+
+def m_int_lt(left, right):
+    if type(left) is Integer and type(right) is Integer:
+        return TRUE if left.value < right.value else FALSE
+    return None
+
+def m_int_gt(left, right):
+    if type(left) is Integer and type(right) is Integer:
+        return TRUE if left.value > right.value else FALSE
+    return None
+
+def m_int_eq(left, right):
+    if type(left) is Integer and type(right) is Integer:
+        return TRUE if left.value == right.value else FALSE
+    return None
+
+def m_int_ne(left, right):
+    if type(left) is Integer and type(right) is Integer:
+        return TRUE if left.value != right.value else FALSE
+    return None
+
+def m_str_add(left, right):
+    if type(left) is String and type(right) is String:
+        return left.concat(right)
+    return None
+
+def m_str_eq(left, right):
+    if type(left) is String and type(right) is String:
+        return TRUE if left.value == right.value else FALSE
+    return None
+
+def m_str_ne(left, right):
+    if type(left) is String and type(right) is String:
+        return TRUE if left.value != right.value else FALSE
+    return None
+
+INTEGER_SPECIALIZATIONS = {
+    "+": m_int_add,
+    "-": m_int_sub,
+    "*": m_int_mul,
+    "/": m_int_div,
+    "<": m_int_lt,
+    ">": m_int_gt,
+    "==": m_int_eq,
+    "!=": m_int_ne,
+}
+
+STRING_SPECIALIZATIONS = {
+    "+": m_str_add,
+    "==": m_str_eq,
+    "!=": m_str_ne,
+}
+
+# integer comparisons of if conditions, evaluate to python bools
+INTEGER_CONDITIONS = {
+    "<": lambda left, right: left.value < right.value if type(left) is Integer and type(right) is Integer else None,
+    ">": lambda left, right: left.value > right.value if type(left) is Integer and type(right) is Integer else None,
+    "==": lambda left, right: left.value == right.value if type(left) is Integer and type(right) is Integer else None,
+    "!=": lambda left, right: left.value != right.value if type(left) is Integer and type(right) is Integer else None,
+}
+
+def m_generic_infix(operator: str):
+    """operator of infix nodes whose specialization failed."""
+    def generic(left, right):
+        return m_check(m_eval_infix_expression(left, operator, right))
+    return generic
+
+GENERIC_INFIX = {operator: m_generic_infix(operator) for operator in
+                 ("+", "-", "*", "/", "<", ">", "==", "!=")}
+
+def m_quicken_infix(node: ast.InfixExpression, left: mobjects.Object,
+                    right: mobjects.Object) -> mobjects.Object:
+    """evaluate infix node with the generic operator and specialize it.
+
+    on the first evaluation the node is specialized for the types of
+    left and right, after a failed guard it stays generic.
+    """
+    operator = node.operator
+    if node.specialized is None:
+        specialized = None
+        if type(left) is Integer and type(right) is Integer:
+            specialized = INTEGER_SPECIALIZATIONS.get(operator)
+        elif type(left) is String and type(right) is String:
+            specialized = STRING_SPECIALIZATIONS.get(operator)
+        node.specialized = specialized or GENERIC_INFIX.get(operator)
+    else:
+        node.specialized = GENERIC_INFIX.get(operator)
+    return m_check(m_eval_infix_expression(left, operator, right))
+
+def m_quicken_if(node: ast.IfExpression) -> None:
+    """fuse integer comparisons into if nodes.
+
+    called after the condition is evaluated for the first time, so an
+    infix condition is already specialized.
+    """
+    condition = node.condition
+    node.specialized = False
+    if isinstance(condition, ast.InfixExpression) and condition.specialized is INTEGER_SPECIALIZATIONS.get(condition.operator):
+        node.specialized = INTEGER_CONDITIONS.get(condition.operator, False)
+
 def m_eval_if_expression(node: ast.IfExpression, env: Environment) -> mobjects.Object:
     """evaluate if expression.
 
@@ -183,11 +391,21 @@ def m_eval_if_expression(node: ast.IfExpression, env: Environment) -> mobjects.O
     Returns:
         result of last statement of whichever block is executed.
     """
-    condition = m_eval(node.condition, env)
-    if m_is_error(condition):
-        return condition
-
-    if m_is_true(condition):
+    compare = node.specialized
+    if compare:
+        condition = node.condition
+        left = m_eval(condition.left, env)
+        right = m_eval(condition.right, env)
+        truth = compare(left, right)
+        if truth is None:
+            node.specialized = False
+            truth = m_is_true(m_quicken_infix(condition, left, right))
+    else:
+        condition = m_eval(node.condition, env)
+        truth = condition is TRUE or (condition is not FALSE and m_is_true(condition))
+        if compare is None:
+            m_quicken_if(node)
+    if truth:
         return m_eval(node.consequence, env)
     if node.alternative is not None:
         return m_eval(node.alternative, env)
@@ -200,38 +418,102 @@ def m_eval_while_expression(node: ast.WhileExpression, env: Environment) -> mobj
     a return statement is evaluated.
     """
     result = NULL
-    while True:
-        condition = m_eval(node.condition, env)
-        if not m_is_true(condition):
+    compiled = node.compiled
+    if compiled is None:
+        threshold = tiering.loop_threshold
+        # loops of unresolved trees have no closures, see tiering
+        if type(env) is not Frame and env.outer is not None:
+            threshold = 0
+        while m_is_true(m_eval(node.condition, env)):
+            result = m_eval_block_statement(node.body, env)
+            node.iterations += 1
+            if node.iterations == threshold:
+                compiled = tiering.promote_loop(node)
+                break
+        else:
             return result
-        result = m_eval_block_statement(node.body, env)
-        if (m_is_type(result, mobjects.RETURN_VALUE_OBJ)
-            or m_is_type(result, mobjects.ERROR_OBJ)):
+    condition, body = compiled
+    while True:
+        value = condition(env)
+        if not (value is TRUE or (value is not FALSE and m_is_true(value))):
             return result
+        result = body(env)
 
-def m_eval_array_index(left: mobjects.Array, index: mobjects.Integer) -> mobjects.Object:
-    index = index.value
-    if index < 0:
-        return m_error("negative indexes are not supported")
-    if not index < len(left.elements):
-        return m_error(f"array index({index}) out of range")
-    return left.elements[index]
+def m_eval_sequence_index(left: mobjects.Object, index: mobjects.Integer) -> mobjects.Object:
+    """element of an array or character of a string, negative indexes
+    count from the end.
+    """
+    position = index.value
+    length = left.length()
+    if position < 0:
+        position += length
+    if not 0 <= position < length:
+        return m_error(f"{left.type().lower()} index({index.value}) out of range")
+    return left.get(position)
 
 def m_eval_index_expression(left: mobjects.Object, index: mobjects.Object) -> mobjects.Object:
     """evaluate index expression.
 
     Args:
-        left: Object to access from.
+        left: Object to access from, an array or a string.
         index: index of the element to acess.
     Returns:
         value at index if index is in range of array len.
-        returns error object if index is out of bounds or 
-        index is negative. 
+        returns error object if index is out of bounds. 
     """
-    if m_is_type(left, mobjects.ARRAY_OBJ) and m_is_type(index, mobjects.INTEGER_OBJ):
-        return m_eval_array_index(left, index)
+    if ((m_is_type(left, mobjects.ARRAY_OBJ) or m_is_type(left, mobjects.STRING_OBJ))
+            and m_is_type(index, mobjects.INTEGER_OBJ)):
+        return m_eval_sequence_index(left, index)
+    if m_is_type(left, mobjects.HASH_OBJ):
+        if not isinstance(index, mobjects.Hashable):
+            return m_error(f"unusable as hash key: {index.type()}")
+        value = left.get(index)
+        return NULL if value is None else value
     return m_error(f"{left.type()} is not subscriptable")
 
+def m_eval_hash_pairs(items: List[mobjects.Object]) -> mobjects.Object:
+    """build a Hash of evaluated keys and values, items holds a key
+    followed by its value for every pair.
+    """
+    pairs = {}
+    for index in range(0, len(items), 2):
+        key = items[index]
+        if not isinstance(key, mobjects.Hashable):
+            return m_error(f"unusable as hash key: {key.type()}")
+        pairs[key.hash_key()] = (key, items[index + 1])
+    return mobjects.Hash(pairs)
+
+def m_eval_slice_expression(
+        left: mobjects.Object, start: mobjects.Object,
+        end: mobjects.Object) -> mobjects.Object:
+    """evaluate slice expression, left[start:end].
+
+    Args:
+        left: array or string to slice.
+        start: first index, None or NULL when omitted.
+        end: index after the last one, None or NULL when omitted.
+    Returns:
+        a view of the elements (see mobjects.Array) or characters.
+        negative bounds count from the end, bounds out of range are
+        clamped like python does.
+    """
+    if not (m_is_type(left, mobjects.ARRAY_OBJ) or m_is_type(left, mobjects.STRING_OBJ)):
+        return m_error(f"{left.type()} is not subscriptable")
+    length = left.length()
+    bounds = []
+    for bound, default in ((start, 0), (end, length)):
+        if bound is None or bound is NULL:
+            bounds.append(default)
+            continue
+        if not m_is_type(bound, mobjects.INTEGER_OBJ):
+            return m_error(f"slice indexes must be integers, not {bound.type()}")
+        position = bound.value
+        if position < 0:
+            position = max(position + length, 0)
+        bounds.append(min(position, length))
+    start, end = bounds
+    return left.slice(start, max(start, end))
+
 def m_eval_call_expression(
             function: mobjects.Object,
             args: List[mobjects.Object]) -> mobjects.Object:
@@ -242,23 +524,83 @@ def m_eval_call_expression(
         args: arguments to pass to given function.
     Returns:
         returns the result of function call.
+    Raises:
+        ErrorSignal if function is not callable, arguments don't
+        match its parameters or the call results in an error.
+
+    Calls in tail position come back as TailCall objects, they are
+    performed here in a loop (trampoline) instead of recursing.
+    Results of memoized functions are looked up in and stored to their
+    memo tables, a result is stored for every memoized function of a
+    chain of tail calls.
     """
-    if m_is_type(function, mobjects.BUILTIN_OBJ):
-        return function.function(*args)
-    if not m_is_type(function, mobjects.FUNCTION_OBJ):
-        return m_error(f"{function.type()} is not callable")
-    if len(function.parameters) != len(args):
-        msg = f"function expected {len(function.parameters)} arguments but"
-        msg += f" {len(args)} were given"
-        return m_error(msg)
-    extended_env = Environment(outer=function.env)
-    for ind, parameter in enumerate(function.parameters):
-        extended_env.set(parameter.name, args[ind])
-    result = m_eval(function.body, extended_env)
-    if m_is_type(result, mobjects.RETURN_VALUE_OBJ):
-        return result.value
+    pending = None
+    while True:
+        if m_is_type(function, mobjects.BUILTIN_OBJ):
+            result = m_check(function.function(*args))
+            break
+        if not m_is_type(function, mobjects.FUNCTION_OBJ):
+            raise ErrorSignal(m_error(f"{function.type()} is not callable"))
+        if len(function.parameters) != len(args):
+            msg = f"function expected {len(function.parameters)} arguments but"
+            msg += f" {len(args)} were given"
+            raise ErrorSignal(m_error(msg))
+        table = function.memo
+        if table is not None:
+            key = table.key(function, args)
+            if key is not None:
+                result = table.get(key)
+                if result is not None:
+                    break
+                if pending is None:
+                    pending = []
+                pending.append((table, key))
+        if function.body.tokens is not None:
+            # first call of a function parsed lazily, its lets are
+            # added to the scope before the frame is created
+            parse_body(function.body)
+        code = None
+        if function.scope is not None:
+            extended_env = Frame(function.scope, function.env)
+            extended_env.slots[:len(args)] = args
+            code = function.code
+            if code is None:
+                function.calls += 1
+                if function.calls == tiering.call_threshold:
+                    code = tiering.promote_function(function)
+        else:
+            extended_env = Environment(outer=function.env)
+            for ind, parameter in enumerate(function.parameters):
+                extended_env.set(parameter.name, args[ind])
+        try:
+            if code is not None:
+                result = code(extended_env)
+            else:
+                result = m_eval(function.body, extended_env)
+            break
+        except ReturnSignal as signal:
+            result = signal.value
+            if type(result) is not mobjects.TailCall:
+                break
+            function = result.function
+            args = result.args
+    if pending is not None:
+        for table, key in pending:
+            table.put(key, result)
+    return result
+
+def m_unwrap_return_value(result: mobjects.Object) -> mobjects.Object:
+    """return value of a return statement, performing pending tail calls."""
+    if type(result) is mobjects.TailCall:
+        return m_eval_call_expression(result.function, result.args)
     return result
 
+def m_eval_tail_call(node: ast.CallExpression, env: Environment) -> mobjects.TailCall:
+    """evaluate callee and arguments of a returned call without calling it."""
+    function = m_eval(node.function, env)
+    args = m_eval_expressions(node.arguments, env)
+    return mobjects.TailCall(function, args)
+
 def m_eval_expressions(
             expressions: List[ast.Expression],
              env: Environment) -> List[mobjects.Object]:
@@ -268,18 +610,10 @@ def m_eval_expressions(
         expressions: list of expressions to evaluate.
         env: current environment to evaluate expressions in.
     Returns:
-        result: list of result objects corresponding to each expression
-            in given list.
-        error: None if all expressions are evaluated without any error else
-            corresponding error.
+        list of result objects corresponding to each expression
+        in given list.
     """
-    result = []
-    for expr in expressions:
-        value = m_eval(expr, env)
-        if m_is_error(value):
-            return result, value
-        result.append(value)
-    return result, None
+    return [m_eval(expr, env) for expr in expressions]
 
 def m_eval_statements(stmts: List[ast.Statement], env: Environment) -> mobjects.Object:
     """evaluate list of statements.
@@ -295,10 +629,11 @@ def m_eval_statements(stmts: List[ast.Statement], env: Environment) -> mobjects.
         result of evaluating last statement.
     """
     result = NULL
-    for stmt in stmts:
-        result = m_eval(stmt, env)
-        if m_is_type(result, mobjects.RETURN_VALUE_OBJ):
-            return result.value
+    try:
+        for stmt in stmts:
+            result = m_eval(stmt, env)
+    except ReturnSignal as signal:
+        return m_unwrap_return_value(signal.value)
     return result
 
 def m_eval_block_statement(block: ast.BlockStatement, env: Environment) -> mobjects.Object:
@@ -310,24 +645,24 @@ def m_eval_block_statement(block: ast.BlockStatement, env: Environment) -> mobje
     Returns:
         result of last statement evaluated.
     """
+    result = NULL
     for stmt in block.statements:
         result = m_eval(stmt, env)
-        if result is not None:
-            if (m_is_type(result, mobjects.RETURN_VALUE_OBJ)
-                or m_is_type(result, mobjects.ERROR_OBJ)):
-                return result
     return result
 
 def m_eval_program(program: ast.Program, env: Environment) -> mobjects.Object:
-    """evaluate Program node."""
-    result = NULL
-    for stmt in program.statements:
-        result = m_eval(stmt, env)
-        if m_is_type(result, mobjects.RETURN_VALUE_OBJ):
-            return result.value
-        elif m_is_type(result, mobjects.ERROR_OBJ):
-            return result
-    return result
+    """evaluate Program node.
+
+    Returns:
+        result of the program, value of the first evaluated "return"
+        statement or the Error object if evaluation failed.
+    """
+    if not program.resolved:
+        resolve(program)
+    try:
+        return m_eval_statements(program.statements, env)
+    except ErrorSignal as signal:
+        return signal.error
 
 def m_eval(node: ast.Node, env: Environment) -> mobjects.Object:
     """Monkey evaluator function.
@@ -338,73 +673,80 @@ def m_eval(node: ast.Node, env: Environment) -> mobjects.Object:
     Returns:
         An instance of mobjects.Object is returned
         representing the result of evaluating given node.
+    Raises:
+        ReturnSignal when a "return" statement is evaluated.
+        ErrorSignal when evaluation results in an error.
     """
     if isinstance(node, ast.Program):
         return m_eval_program(node, env)
     elif isinstance(node, ast.LetStatement):
         value = m_eval(node.expression, env)
-        if m_is_error(value):
-            return value
-        name = node.identifier.name
-        env.set(name, value)
+        if node.slot is not None:
+            env.slots[node.slot] = value
+        else:
+            env.set(node.identifier.name, value)
         return NULL
     elif isinstance(node, ast.ReturnStatement):
-        value = m_eval(node.expression, env)
-        if m_is_error(value):
-            return value
-        return mobjects.ReturnValue(value = value)
+        if isinstance(node.expression, ast.CallExpression):
+            raise ReturnSignal(m_eval_tail_call(node.expression, env))
+        raise ReturnSignal(m_eval(node.expression, env))
     elif isinstance(node, ast.ExpressionStatement):
         return m_eval(node.expression, env)
     elif isinstance(node, ast.BlockStatement):
         return m_eval_block_statement(node, env)
     elif isinstance(node, ast.PrefixExpression):
         right = m_eval(node.right, env)
-        if m_is_error(right):
-            return right
-        return m_eval_prefix_expression(node.operator, right)
+        return m_check(m_eval_prefix_expression(node.operator, right))
     elif isinstance(node, ast.InfixExpression):
         left = m_eval(node.left, env)
-        if m_is_error(left):
-            return left
         right = m_eval(node.right, env)
-        if m_is_error(right):
-            return right
-        return m_eval_infix_expression(left, node.operator, right)
+        specialized = node.specialized
+        if specialized is not None:
+            result = specialized(left, right)
+            if result is not None:
+                return result
+        return m_quicken_infix(node, left, right)
     elif isinstance(node, ast.IfExpression):
         return m_eval_if_expression(node, env)
     elif isinstance(node, ast.IndexExpression):
         left = m_eval(node.left, env)
-        if m_is_error(left):
-            return left
         index = m_eval(node.index, env)
-        if m_is_error(index):
-            return index
-        return m_eval_index_expression(left, index)
+        return m_check(m_eval_index_expression(left, index))
+    elif isinstance(node, ast.HashLiteral):
+        items = []
+        for key, value in node.pairs.items():
+            items.append(m_eval(key, env))
+            items.append(m_eval(value, env))
+        return m_check(m_eval_hash_pairs(items))
+    elif isinstance(node, ast.SliceExpression):
+        left = m_eval(node.left, env)
+        start = None if node.start is None else m_eval(node.start, env)
+        end = None if node.end is None else m_eval(node.end, env)
+        return m_check(m_eval_slice_expression(left, start, end))
     elif isinstance(node, ast.CallExpression):
         function = m_eval(node.function, env)
-        if m_is_error(function):
-            return function
-        args, error = m_eval_expressions(node.arguments, env)
-        if error is not None:
-            return error
+        args = m_eval_expressions(node.arguments, env)
         return m_eval_call_expression(function, args)
     elif isinstance(node, ast.FunctionLiteral):
         parameters = node.parameters
         body = node.body
-        return mobjects.Function(parameters, body, env)
+        scope = node.scope
+        code = tiering.compiled_body(body) if scope is not None else None
+        function = mobjects.Function(parameters, body, env, code, scope)
+        if memo.auto_memo:
+            function.memo = memo.MemoTable(memo.auto_memo_size)
+        return function
     elif isinstance(node, ast.ArrayLiteral):
-        elements, error = m_eval_expressions(node.elements, env)
-        if error is not None:
-            return error
+        elements = m_eval_expressions(node.elements, env)
         return mobjects.Array(elements)
     elif isinstance(node, ast.Identifier):
         return m_eval_identifier(node, env)
     elif isinstance(node, ast.IntegerLiteral):
-        return mobjects.Integer(node.value)
+        return m_eval_literal(node, mobjects.construct_integer)
     elif isinstance(node, ast.Boolean):
         return construct_boolean(node.value)
     elif isinstance(node, ast.StringLiteral):
-        return mobjects.String(value=node.value)
+        return m_eval_literal(node, mobjects.String)
     elif isinstance(node, ast.WhileExpression):
         return m_eval_while_expression(node, env)
     return NULL
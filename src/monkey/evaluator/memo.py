@@ -0,0 +1,233 @@
+"""Memoization of pure Monkey functions.
+
+A memoized function (see memoize, the memo builtin and auto_memo)
+carries a MemoTable, a bounded LRU cache of its results.
+
+Purity is decided at every call from the values the result can depend
+on. These are the arguments and the current values of the names the
+function reads from enclosing scopes (its free names):
+
+    - integers, strings, booleans and null are part of the cache key.
+    - builtins must be marked pure (Builtin.pure), len is, puts isn't.
+    - functions must be pure themselves, checked recursively.
+    - arrays are mutable (append), calls depending on one aren't cached.
+
+Calls which can't be cached run normally. Only immutable results
+(integers, strings, booleans and null) are stored.
+"""
+
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+import weakref
+
+from monkey.ast import ast
+from monkey.ast.parser import parse_bodies
+from monkey.evaluator import mobjects
+
+DEFAULT_SIZE = 1024
+
+# memoize every function created while True, see enable_auto_memo
+auto_memo: bool = False
+auto_memo_size: Optional[int] = DEFAULT_SIZE
+
+CACHEABLE_RESULTS = (
+    mobjects.INTEGER_OBJ,
+    mobjects.STRING_OBJ,
+    mobjects.BOOLEAN_OBJ,
+    mobjects.NULL_OBJ,
+)
+
+# marks a value which can't be part of a cache key
+UNCACHEABLE = object()
+
+# all live tables, and counters of the collected ones, for stats
+TABLES = weakref.WeakSet()
+RETIRED = {"hits": 0, "misses": 0, "evictions": 0, "skips": 0}
+
+class MemoTable:
+    """results of a memoized function.
+
+    Args:
+        maxsize: number of results to keep, the least recently used one
+            is evicted when the table is full. None keeps all results.
+
+    Attributes:
+        hits: calls answered from the table.
+        misses: calls computed and stored.
+        evictions: results evicted to make room for new ones.
+        skips: calls which couldn't be cached, see module doc.
+    """
+
+    def __init__(self, maxsize: Optional[int] = DEFAULT_SIZE) -> None:
+        self.maxsize = maxsize
+        self.results: "OrderedDict[tuple, mobjects.Object]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.skips = 0
+        TABLES.add(self)
+
+    def key(self, function: mobjects.Function, args: List[mobjects.Object]) -> Optional[tuple]:
+        """cache key of calling function with args, None if it can't be cached."""
+        key = call_key(function, args)
+        if key is None:
+            self.skips += 1
+        return key
+
+    def get(self, key: tuple) -> Optional[mobjects.Object]:
+        value = self.results.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.results.move_to_end(key)
+        return value
+
+    def put(self, key: tuple, value: mobjects.Object) -> None:
+        if value.tag not in CACHEABLE_RESULTS:
+            return
+        results = self.results
+        results[key] = value
+        if self.maxsize is not None and len(results) > self.maxsize:
+            results.popitem(last=False)
+            self.evictions += 1
+
+    def __del__(self):
+        for name in RETIRED:
+            RETIRED[name] += getattr(self, name)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "skips": self.skips,
+            "size": len(self.results),
+        }
+
+    def __str__(self):
+        return f"MemoTable({self.stats()})"
+
+    def __repr__(self):
+        return self.__str__()
+
+def memoize(function: mobjects.Function, maxsize: Optional[int] = DEFAULT_SIZE) -> mobjects.Function:
+    """return a copy of function which caches its results."""
+    return mobjects.Function(function.parameters, function.body, function.env,
+                             function.code, function.scope, MemoTable(maxsize))
+
+def enable_auto_memo(maxsize: Optional[int] = DEFAULT_SIZE) -> None:
+    """memoize every function created from now on."""
+    global auto_memo, auto_memo_size
+    auto_memo = True
+    auto_memo_size = maxsize
+
+def disable_auto_memo() -> None:
+    global auto_memo
+    auto_memo = False
+
+def stats() -> Dict[str, int]:
+    """counters summed over all tables, tables and size count live tables only."""
+    total = {"tables": 0, "size": 0}
+    total.update(RETIRED)
+    for table in list(TABLES):
+        total["tables"] += 1
+        for name, value in table.stats().items():
+            total[name] += value
+    return total
+
+# free names of function bodies, (name, required) pairs. names bound
+# by let in the function itself aren't required, they are only read
+# from enclosing scopes if used before the let is executed.
+_free_names: "weakref.WeakKeyDictionary[ast.BlockStatement, Tuple[Tuple[str, bool], ...]]"
+_free_names = weakref.WeakKeyDictionary()
+
+def free_names(function: mobjects.Function) -> Tuple[Tuple[str, bool], ...]:
+    names = _free_names.get(function.body)
+    if names is None:
+        # names read by nested functions count too
+        parse_bodies(function.body)
+        read: Dict[str, None] = dict()
+        lets: Set[str] = set()
+        parameters = {parameter.name for parameter in function.parameters}
+        collect_names(function.body, parameters, read, lets)
+        names = tuple((name, name not in lets) for name in read)
+        _free_names[function.body] = names
+    return names
+
+def collect_names(node: ast.Node, parameters: Set[str], read: Dict[str, None], lets: Set[str]) -> None:
+    """collect names read in node and names bound by let in node.
+
+    parameters of the function and of nested functions are skipped, they
+    are always bound when they are read.
+    """
+    for child in ast.iter_child_nodes(node):
+        if isinstance(child, ast.Identifier):
+            if child.name not in parameters:
+                read[child.name] = None
+        elif isinstance(child, ast.LetStatement):
+            lets.add(child.identifier.name)
+            collect_names(child.expression, parameters, read, lets)
+        elif isinstance(child, ast.FunctionLiteral):
+            inner = parameters | {parameter.name for parameter in child.parameters}
+            collect_names(child.body, inner, read, lets)
+        else:
+            collect_names(child, parameters, read, lets)
+
+def lookup(env, name: str) -> Optional[mobjects.Object]:
+    value = env.get(name)
+    if value is None:
+        # builtins imports this module
+        from monkey.evaluator.builtins import builtins
+        value = builtins.get(name)
+    return value
+
+def value_key(value: mobjects.Object, visiting: Set[mobjects.Function]):
+    """hashable key of value, UNCACHEABLE if results can't depend on it."""
+    tag = value.tag
+    if tag == mobjects.INTEGER_OBJ or tag == mobjects.STRING_OBJ or tag == mobjects.BOOLEAN_OBJ:
+        return (tag, value.value)
+    if tag == mobjects.NULL_OBJ:
+        return (tag,)
+    if tag == mobjects.BUILTIN_OBJ:
+        return value if value.pure else UNCACHEABLE
+    if type(value) is mobjects.Function:
+        if value in visiting:
+            return value
+        visiting.add(value)
+        key = environment_key(value, visiting)
+        if key is None:
+            return UNCACHEABLE
+        return (value, key)
+    return UNCACHEABLE
+
+def environment_key(function: mobjects.Function, visiting: Set[mobjects.Function]) -> Optional[tuple]:
+    """key of the free names of function, None if function isn't pure."""
+    parts = []
+    for name, required in free_names(function):
+        value = lookup(function.env, name)
+        if value is None:
+            if required:
+                # the call fails, don't hide the error
+                return None
+            parts.append(None)
+            continue
+        key = value_key(value, visiting)
+        if key is UNCACHEABLE:
+            return None
+        parts.append(key)
+    return tuple(parts)
+
+def call_key(function: mobjects.Function, args: List[mobjects.Object]) -> Optional[tuple]:
+    """cache key of calling function with args, None if it can't be cached."""
+    visiting = {function}
+    parts = []
+    for arg in args:
+        key = value_key(arg, visiting)
+        if key is UNCACHEABLE:
+            return None
+        parts.append(key)
+    key = environment_key(function, visiting)
+    if key is None:
+        return None
+    return (tuple(parts), key)
@@ -1,5 +1,9 @@
 """Internal Object representation of Monkey data"""
 
+from array import array
+from itertools import islice
+from typing import Iterable, Optional, Sequence
+
 INTEGER_OBJ = "INTEGER"
 BOOLEAN_OBJ = "BOOLEAN"
 STRING_OBJ = "STRING"
@@ -9,43 +13,156 @@ ERROR_OBJ = "ERROR"
 FUNCTION_OBJ = "FUNCTION"
 BUILTIN_OBJ = "BUILTIN"
 ARRAY_OBJ = "ARRAY"
+HASH_OBJ = "HASH"
+COMPILED_FUNCTION_OBJ = "COMPILED_FUNCTION"
 
 class Object():
+    """Base class of Monkey values.
+
+    Every subclass defines a class level type tag, checking `obj.tag`
+    avoids the method call of `obj.type()`.
+    """
+    __slots__ = ()
+    tag: str = None
+
     def __init__(self):
         pass
 
-class Integer(Object):
+    def type(self):
+        return self.tag
+
+class HashKey:
+    """key of a value in a Hash, its hash is computed once."""
+    __slots__ = ("tag", "value", "hash")
+
+    def __init__(self, tag: str, value) -> None:
+        self.tag = tag
+        self.value = value
+        self.hash = hash((tag, value))
+
+    def __hash__(self):
+        return self.hash
+
+    def __eq__(self, other):
+        return self.tag == other.tag and self.value == other.value
+
+class Hashable(Object):
+    """values usable as keys of a Hash, integers, strings and booleans."""
+    __slots__ = ("_key",)
+
+    def hash_key(self) -> HashKey:
+        """HashKey of the value, created on first use and kept."""
+        try:
+            return self._key
+        except AttributeError:
+            self._key = HashKey(self.tag, self.value)
+            return self._key
+
+class Integer(Hashable):
+    __slots__ = ("value",)
+    tag: str = INTEGER_OBJ
+
     def __init__(self, value: int = None):
         self.value:int = value
     
-    def type(self):
-        return INTEGER_OBJ
-
     def __str__(self):
         return str(self.value)
     
     def __repr__(self):
         return self.__str__()
 
-class Boolean(Object):
+class Boolean(Hashable):
+    __slots__ = ("value",)
+    tag: str = BOOLEAN_OBJ
+
     def __init__(self, value: bool = None):
         self.value: bool = value
     
-    def type(self):
-        return BOOLEAN_OBJ
-
     def __str__(self):
         return "true" if self.value else "false"
     
     def __repr__(self):
         return self.__str__()
 
-class String(Object):
+class String(Hashable):
+    """Monkey string.
+
+    Strings built by concatenation are kept as a list of fragments (a
+    builder) and joined when their value is needed (len, ==, puts, ...),
+    so appending to a string in a loop doesn't copy it every time.
+    Strings concatenated from the same string share its fragment list,
+    a string is the first n_parts fragments of the list. Only the string
+    using all fragments of the list appends to it, the others copy.
+
+    Slices are views, (str, start, stop) of the value of the sliced
+    string, copied when their value is needed.
+    """
+    __slots__ = ("_value", "parts", "n_parts", "view")
+    tag: str = STRING_OBJ
+
+    # shorter strings are concatenated right away
+    MIN_BUILDER_LENGTH = 256
+
     def __init__(self, value: str = None):
-        self.value: str = value
-    
-    def type(self):
-        return STRING_OBJ
+        self._value = value
+        self.parts = None
+        self.n_parts = 0
+        self.view = None
+
+    @property
+    def value(self) -> str:
+        value = self._value
+        if value is None:
+            if self.view is not None:
+                base, start, stop = self.view
+                value = base[start:stop]
+                self.view = None
+            else:
+                parts = self.parts
+                if len(parts) == self.n_parts:
+                    value = "".join(parts)
+                else:
+                    value = "".join(parts[:self.n_parts])
+                self.parts = None
+            self._value = value
+        return value
+
+    def length(self) -> int:
+        if self.view is not None:
+            return self.view[2] - self.view[1]
+        return len(self.value)
+
+    def get(self, index: int) -> "String":
+        if self.view is not None:
+            base, start, _ = self.view
+            return String(base[start + index])
+        return String(self.value[index])
+
+    def slice(self, start: int, stop: int) -> "String":
+        """view of characters start to stop, indexes must be in range."""
+        result = String()
+        if self.view is not None:
+            base, offset, _ = self.view
+            result.view = (base, offset + start, offset + stop)
+        else:
+            result.view = (self.value, start, stop)
+        return result
+
+    def concat(self, other: "String") -> "String":
+        """return self + other without copying self if possible."""
+        right = other.value
+        parts = self.parts
+        if parts is not None and len(parts) == self.n_parts:
+            parts.append(right)
+        else:
+            left = self.value
+            if len(left) < String.MIN_BUILDER_LENGTH:
+                return String(left + right)
+            parts = [left, right]
+        result = String()
+        result.parts = parts
+        result.n_parts = len(parts)
+        return result
 
     def __str__(self):
         return self.value
@@ -54,12 +171,12 @@ class String(Object):
         return self.__str__()
 
 class Null(Object):
+    __slots__ = ()
+    tag: str = NULL_OBJ
+
     def __init__(self):
         pass
 
-    def type(self):
-        return NULL_OBJ
-    
     def __str__(self):
         return "null"
     
@@ -67,25 +184,42 @@ class Null(Object):
         return self.__str__()
 
 class ReturnValue(Object):
+    __slots__ = ("value",)
+    tag: str = RETURN_VALUE_OBJ
+
     def __init__(self, value = None):
         self.value: Object = value
     
-    def type(self):
-        return RETURN_VALUE_OBJ
-
     def __str__(self):
         return str(self.value)
     
     def __repr__(self):
         return self.__str__()
 
+class TailCall(ReturnValue):
+    """return of a call in tail position.
+
+    The call is not evaluated by the return statement, it is performed
+    by the caller of the function after the current call has finished so
+    tail recursion runs in constant python stack.
+    """
+    __slots__ = ("function", "args")
+
+    def __init__(self, function, args):
+        self.value = None
+        self.function: Object = function
+        self.args = args
+
+    def __str__(self):
+        return "<tail call>"
+
 class Error(Object):
+    __slots__ = ("msg",)
+    tag: str = ERROR_OBJ
+
     def __init__(self, msg = None):
         self.msg = msg
     
-    def type(self):
-        return ERROR_OBJ
-
     def __str__(self):
         return f"EvaluationError: {self.msg}"
     
@@ -93,13 +227,22 @@ class Error(Object):
         return self.__str__()
 
 class Function(Object):
-    def __init__(self, parameters = None, body = None, env = None):
+    __slots__ = ("parameters", "body", "env", "code", "scope", "memo", "calls")
+    tag: str = FUNCTION_OBJ
+
+    def __init__(self, parameters = None, body = None, env = None, code = None,
+                 scope = None, memo = None):
         self.parameters = parameters
         self.body = body
         self.env = env
-    
-    def type(self):
-        return FUNCTION_OBJ
+        # body translated to a python callable, see closure_compiler
+        self.code = code
+        # resolver.Scope describing the frame of a call
+        self.scope = scope
+        # memo.MemoTable caching results of the function, if memoized
+        self.memo = memo
+        # calls evaluated by m_eval, see tiering
+        self.calls = 0
     
     def __str__(self):
         return "<function>"
@@ -108,11 +251,14 @@ class Function(Object):
         return self.__str__()
 
 class Builtin(Object):
-    def __init__(self, function):
+    __slots__ = ("function", "pure")
+    tag: str = BUILTIN_OBJ
+
+    def __init__(self, function, pure = False):
         self.function = function
-    
-    def type(self):
-        return BUILTIN_OBJ
+        # result only depends on the arguments and there are no side
+        # effects, calls to pure builtins can be memoized
+        self.pure = pure
     
     def __str__(self):
         return "<built-in function>"
@@ -121,14 +267,252 @@ class Builtin(Object):
         return self.__str__()
 
 class Array(Object):
-    def __init__(self, elements):
-        self.elements = elements
+    """Monkey array.
+
+    Arrays of integers which fit in 64 bits are packed into an
+    array.array("q") (packed), elements are boxed when they are read
+    (get). Otherwise, or once anything else is appended, the elements are
+    a list of objects. Reading the elements attribute unpacks the array,
+    use length, get and append where the array can stay packed.
+
+    Slices are views, (storage, start, stop) of the packed array or list
+    of the sliced array (see slice). Elements are never replaced, append
+    only adds elements past the end of every view, so views stay valid.
+    A view copies its part of the storage before it is appended to.
+    The storage of a view can also be a python range (see the range
+    builtin), its integers exist only once they are read.
+    """
+    __slots__ = ("_elements", "packed", "view")
+    tag: str = ARRAY_OBJ
+
+    def __init__(self, elements = None, packed = None):
+        self._elements = None
+        self.packed = packed
+        self.view = None
+        if elements is not None:
+            self.packed = pack(elements)
+            if self.packed is None:
+                self._elements = elements
+
+    @property
+    def elements(self) -> list:
+        """elements as a list of objects, unpacks the array."""
+        if self.view is not None:
+            self.materialize()
+        if self.packed is not None:
+            self._elements = [construct_integer(value) for value in self.packed]
+            self.packed = None
+        return self._elements
+
+    def materialize(self) -> None:
+        """copy the elements of a view."""
+        storage, start, stop = self.view
+        if type(storage) is array:
+            self.packed = storage[start:stop]
+        elif type(storage) is range:
+            try:
+                self.packed = array("q", storage[start:stop])
+            except OverflowError:
+                self._elements = [construct_integer(value) for value in storage[start:stop]]
+        else:
+            self._elements = storage[start:stop]
+        self.view = None
+
+    def length(self) -> int:
+        if self.packed is not None:
+            return len(self.packed)
+        if self._elements is not None:
+            return len(self._elements)
+        return self.view[2] - self.view[1]
+
+    def get(self, index: int) -> Object:
+        if self.packed is not None:
+            return construct_integer(self.packed[index])
+        if self._elements is not None:
+            return self._elements[index]
+        storage, start, _ = self.view
+        if type(storage) is not list:
+            return construct_integer(storage[start + index])
+        return storage[start + index]
+
+    def objects(self) -> Iterable[Object]:
+        """iterate over the elements without unpacking the array.
+
+        elements appended while iterating are not visited.
+        """
+        if self.view is not None:
+            storage, start, stop = self.view
+        elif self.packed is not None:
+            storage, start, stop = self.packed, 0, len(self.packed)
+        else:
+            storage, start, stop = self._elements, 0, len(self._elements)
+        if type(storage) is range:
+            return map(construct_integer, storage[start:stop])
+        if type(storage) is array:
+            return map(construct_integer, islice(storage, start, stop))
+        return islice(storage, start, stop)
+
+    def integers(self) -> Optional[Sequence[int]]:
+        """values of the elements if they are all stored as integers,
+        None otherwise.
+        """
+        if self.packed is not None:
+            return self.packed
+        if self.view is not None:
+            storage, start, stop = self.view
+            if type(storage) is not list:
+                return storage[start:stop]
+        return None
+
+    def slice(self, start: int, stop: int) -> "Array":
+        """view of elements start to stop, indexes must be in range."""
+        result = Array()
+        if self.view is not None:
+            storage, offset, _ = self.view
+            result.view = (storage, offset + start, offset + stop)
+        else:
+            storage = self.packed if self.packed is not None else self._elements
+            result.view = (storage, start, stop)
+        return result
+
+    def append(self, value: Object) -> None:
+        if self.view is not None:
+            self.materialize()
+        if self.packed is not None and type(value) is Integer:
+            try:
+                self.packed.append(value.value)
+                return
+            except OverflowError:
+                pass
+        self.elements.append(value)
+
+    def __eq__(self, other):
+        """structural equality, used by ==."""
+        if self is other:
+            return True
+        if type(other) is not Array:
+            return False
+        length = self.length()
+        if length != other.length():
+            return False
+        if self.packed is not None and other.packed is not None:
+            return self.packed == other.packed
+        return all(equal(self.get(index), other.get(index)) for index in range(length))
+
+    __hash__ = None
 
-    def type(self):
-        return ARRAY_OBJ
-    
     def __str__(self):
-        return "[" + ", ".join(str(element) for element in self.elements) + "]"
+        if self.view is not None:
+            storage, start, stop = self.view
+            values = storage[start:stop]
+        elif self.packed is not None:
+            values = self.packed
+        else:
+            values = self._elements
+        return "[" + ", ".join(map(str, values)) + "]"
     
     def __repr__(self):
         return self.__str__()
+
+class Hash(Object):
+    """Monkey hash, maps integers, strings and booleans to values.
+
+    pairs maps the HashKey of every key to the (key, value) pair, in the
+    order the keys were inserted.
+    """
+    __slots__ = ("pairs",)
+    tag: str = HASH_OBJ
+
+    def __init__(self, pairs = None):
+        self.pairs = pairs if pairs is not None else {}
+
+    def get(self, key: Hashable) -> Optional[Object]:
+        pair = self.pairs.get(key.hash_key())
+        return None if pair is None else pair[1]
+
+    def __eq__(self, other):
+        """structural equality, used by ==."""
+        if self is other:
+            return True
+        if type(other) is not Hash or len(self.pairs) != len(other.pairs):
+            return False
+        for hash_key, (_, value) in self.pairs.items():
+            pair = other.pairs.get(hash_key)
+            if pair is None or not equal(value, pair[1]):
+                return False
+        return True
+
+    __hash__ = None
+
+    def __str__(self):
+        return "{" + ", ".join(f"{key}: {value}" for key, value in self.pairs.values()) + "}"
+
+    def __repr__(self):
+        return self.__str__()
+
+class CompiledFunction(Object):
+    """function body lowered to bytecode by monkey.compiler"""
+    __slots__ = ("instructions", "parameters", "constants")
+    tag: str = COMPILED_FUNCTION_OBJ
+
+    def __init__(self, instructions, parameters, constants = None):
+        self.instructions = instructions
+        self.parameters = parameters
+        # constants pool of the program, used to call the function
+        # outside of the vm running the program
+        self.constants = constants
+
+    def __str__(self):
+        return "<compiled function>"
+
+    def __repr__(self):
+        return self.__str__()
+
+class Closure(Object):
+    """CompiledFunction bound to the environment it was created in"""
+    __slots__ = ("function", "env")
+    tag: str = FUNCTION_OBJ
+
+    def __init__(self, function, env):
+        self.function = function
+        self.env = env
+
+    def __str__(self):
+        return "<function>"
+
+    def __repr__(self):
+        return self.__str__()
+
+# Integer objects are immutable, like CPython the frequently used
+# small values are allocated once and shared.
+SMALL_INTEGER_MIN = -5
+SMALL_INTEGER_MAX = 256
+SMALL_INTEGERS = [Integer(value) for value in range(SMALL_INTEGER_MIN, SMALL_INTEGER_MAX + 1)]
+
+def construct_integer(value: int) -> Integer:
+    """return Integer object for value, small integers are cached."""
+    if SMALL_INTEGER_MIN <= value <= SMALL_INTEGER_MAX:
+        return SMALL_INTEGERS[value - SMALL_INTEGER_MIN]
+    return Integer(value)
+
+def pack(elements: list) -> Optional[array]:
+    """values of elements packed in an array("q"), None unless all of
+    them are Integers fitting in 64 bits.
+    """
+    for element in elements:
+        if type(element) is not Integer:
+            return None
+    try:
+        return array("q", [element.value for element in elements])
+    except OverflowError:
+        return None
+
+def equal(left: Object, right: Object) -> bool:
+    """Monkey ==, values of different types are never equal."""
+    if left is right:
+        return True
+    if left.tag != right.tag:
+        return False
+    if isinstance(left, Hashable):
+        return left.value == right.value
+    return left == right
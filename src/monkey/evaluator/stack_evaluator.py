@@ -0,0 +1,352 @@
+"""Non recursive evaluator of Monkey Language.
+
+StackEvaluator walks the syntax tree like m_eval but keeps its own
+explicit stacks instead of using the python call stack:
+
+    work:   pending tasks, a task is a tuple (handler, data, env).
+            Tasks either evaluate a node or continue a partially
+            evaluated node with the values computed so far.
+    values: results of evaluated nodes.
+
+so the depth of Monkey recursion is limited only by memory, and the
+evaluation can be suspended between any two tasks and resumed later.
+"""
+
+from typing import Callable, List, Optional
+
+from monkey.ast import ast
+from monkey.ast.resolver import resolve
+from monkey.evaluator import mobjects
+from monkey.evaluator import evaluator
+from monkey.evaluator.environment import Environment, Frame
+
+NULL = evaluator.NULL
+
+class StackEvaluator:
+    """Evaluate a program using explicit work and value stacks.
+
+    Args:
+        program: program to evaluate.
+        env: global environment.
+        hook: called every hook_interval steps with the evaluator,
+            execution pauses if it returns a true value.
+        hook_interval: number of steps between hook calls.
+    """
+
+    def __init__(self, program: ast.Program, env: Environment,
+            hook: Optional[Callable[["StackEvaluator"], bool]] = None,
+            hook_interval: int = 1000) -> None:
+        if not program.resolved:
+            resolve(program)
+        self.hook = hook
+        self.hook_interval = hook_interval
+        self.steps = 0
+        self.paused = False
+        self.finished = False
+        self.result: Optional[mobjects.Object] = None
+
+        self.handlers = {
+            node_type: handler.__get__(self)
+            for node_type, handler in EVAL_HANDLERS.items()
+        }
+        self.values: List[mobjects.Object] = []
+        self.work: List[tuple] = [(self.k_program_end, 0, env)]
+        self.push_statements(program.statements, env)
+
+    def run(self) -> Optional[mobjects.Object]:
+        """run until the program finishes or the hook pauses it.
+
+        Returns:
+            result of the program, None if the execution was paused.
+            calling run again resumes a paused execution.
+        """
+        self.paused = False
+        work = self.work
+        hook = self.hook
+        interval = self.hook_interval
+        while work:
+            handler, data, env = work.pop()
+            try:
+                handler(data, env)
+            except evaluator.ErrorSignal as signal:
+                self.fail(signal.error)
+            self.steps += 1
+            if hook is not None and self.steps % interval == 0 and work:
+                if hook(self):
+                    self.paused = True
+                    return None
+        return self.result
+
+    def step(self) -> bool:
+        """execute a single task, return True when the program finished."""
+        if self.work:
+            handler, data, env = self.work.pop()
+            try:
+                handler(data, env)
+            except evaluator.ErrorSignal as signal:
+                self.fail(signal.error)
+            self.steps += 1
+        return self.finished
+
+    def fail(self, error: mobjects.Error) -> None:
+        """stop evaluation with error as the result.
+
+        handlers raise evaluator.ErrorSignal to fail, the run loop calls this.
+        """
+        self.work.clear()
+        self.values.clear()
+        self.result = error
+        self.finished = True
+
+    def push_value(self, value: mobjects.Object) -> None:
+        self.values.append(evaluator.m_check(value))
+
+    def push_eval(self, node: ast.Node, env: Environment) -> None:
+        handler = self.handlers.get(type(node))
+        if handler is None:
+            self.work.append((self.k_value, NULL, env))
+        else:
+            self.work.append((handler, node, env))
+
+    def push_statements(self, statements: List[ast.Statement], env: Environment) -> None:
+        if len(statements) == 0:
+            self.work.append((self.k_value, NULL, env))
+        else:
+            self.work.append((self.k_statements, (statements, 0), env))
+
+    # evaluation of nodes
+
+    def e_statements(self, node: ast.BlockStatement, env: Environment) -> None:
+        self.push_statements(node.statements, env)
+
+    def e_expression_statement(self, node: ast.ExpressionStatement, env: Environment) -> None:
+        self.push_eval(node.expression, env)
+
+    def e_let_statement(self, node: ast.LetStatement, env: Environment) -> None:
+        self.work.append((self.k_let, node, env))
+        self.push_eval(node.expression, env)
+
+    def e_return_statement(self, node: ast.ReturnStatement, env: Environment) -> None:
+        self.work.append((self.k_return, node, env))
+        self.push_eval(node.expression, env)
+
+    def e_identifier(self, node: ast.Identifier, env: Environment) -> None:
+        self.values.append(evaluator.m_eval_identifier(node, env))
+
+    def e_integer_literal(self, node: ast.IntegerLiteral, env: Environment) -> None:
+        self.values.append(evaluator.m_eval_literal(node, mobjects.construct_integer))
+
+    def e_string_literal(self, node: ast.StringLiteral, env: Environment) -> None:
+        self.values.append(evaluator.m_eval_literal(node, mobjects.String))
+
+    def e_boolean(self, node: ast.Boolean, env: Environment) -> None:
+        self.values.append(evaluator.construct_boolean(node.value))
+
+    def e_prefix_expression(self, node: ast.PrefixExpression, env: Environment) -> None:
+        self.work.append((self.k_prefix, node, env))
+        self.push_eval(node.right, env)
+
+    def e_infix_expression(self, node: ast.InfixExpression, env: Environment) -> None:
+        self.work.append((self.k_infix, node, env))
+        self.push_eval(node.right, env)
+        self.push_eval(node.left, env)
+
+    def e_if_expression(self, node: ast.IfExpression, env: Environment) -> None:
+        self.work.append((self.k_if, node, env))
+        self.push_eval(node.condition, env)
+
+    def e_while_expression(self, node: ast.WhileExpression, env: Environment) -> None:
+        self.values.append(NULL)
+        self.work.append((self.k_while_condition, node, env))
+        self.push_eval(node.condition, env)
+
+    def e_index_expression(self, node: ast.IndexExpression, env: Environment) -> None:
+        self.work.append((self.k_index, node, env))
+        self.push_eval(node.index, env)
+        self.push_eval(node.left, env)
+
+    def e_slice_expression(self, node: ast.SliceExpression, env: Environment) -> None:
+        self.work.append((self.k_slice, node, env))
+        # omitted bounds are NULL
+        for bound in (node.end, node.start):
+            if bound is None:
+                self.work.append((self.k_value, NULL, env))
+            else:
+                self.push_eval(bound, env)
+        self.push_eval(node.left, env)
+
+    def e_array_literal(self, node: ast.ArrayLiteral, env: Environment) -> None:
+        self.work.append((self.k_array, len(node.elements), env))
+        for element in reversed(node.elements):
+            self.push_eval(element, env)
+
+    def e_hash_literal(self, node: ast.HashLiteral, env: Environment) -> None:
+        self.work.append((self.k_hash, 2 * len(node.pairs), env))
+        for key, value in reversed(list(node.pairs.items())):
+            self.push_eval(value, env)
+            self.push_eval(key, env)
+
+    def e_function_literal(self, node: ast.FunctionLiteral, env: Environment) -> None:
+        self.values.append(evaluator.m_eval(node, env))
+
+    def e_call_expression(self, node: ast.CallExpression, env: Environment) -> None:
+        self.work.append((self.k_call, len(node.arguments), env))
+        for argument in reversed(node.arguments):
+            self.push_eval(argument, env)
+        self.push_eval(node.function, env)
+
+    # continuations
+
+    def k_value(self, value: mobjects.Object, env: Environment) -> None:
+        self.values.append(value)
+
+    def k_statements(self, data, env: Environment) -> None:
+        statements, index = data
+        if index > 0:
+            self.values.pop()
+        if index + 1 < len(statements):
+            self.work.append((self.k_statements, (statements, index + 1), env))
+        self.push_eval(statements[index], env)
+
+    def k_let(self, node: ast.LetStatement, env: Environment) -> None:
+        value = self.values.pop()
+        if node.slot is not None:
+            env.slots[node.slot] = value
+        else:
+            env.set(node.identifier.name, value)
+        self.values.append(NULL)
+
+    def k_return(self, node: ast.ReturnStatement, env: Environment) -> None:
+        """unwind the stacks to the enclosing call (or program)."""
+        value = self.values.pop()
+        work = self.work
+        while True:
+            handler, height, frame_env = work.pop()
+            if handler == self.k_call_end or handler == self.k_program_end:
+                break
+        del self.values[height:]
+        self.values.append(value)
+        handler(height, frame_env)
+
+    def k_prefix(self, node: ast.PrefixExpression, env: Environment) -> None:
+        right = self.values.pop()
+        self.push_value(evaluator.m_eval_prefix_expression(node.operator, right))
+
+    def k_infix(self, node: ast.InfixExpression, env: Environment) -> None:
+        right = self.values.pop()
+        left = self.values.pop()
+        self.push_value(evaluator.m_eval_infix_expression(left, node.operator, right))
+
+    def k_if(self, node: ast.IfExpression, env: Environment) -> None:
+        condition = self.values.pop()
+        if evaluator.m_is_true(condition):
+            self.push_eval(node.consequence, env)
+        elif node.alternative is not None:
+            self.push_eval(node.alternative, env)
+        else:
+            self.values.append(NULL)
+
+    def k_while_condition(self, node: ast.WhileExpression, env: Environment) -> None:
+        condition = self.values.pop()
+        if evaluator.m_is_true(condition):
+            # drop value of the previous iteration
+            self.values.pop()
+            self.work.append((self.k_while_body, node, env))
+            self.push_eval(node.body, env)
+
+    def k_while_body(self, node: ast.WhileExpression, env: Environment) -> None:
+        self.work.append((self.k_while_condition, node, env))
+        self.push_eval(node.condition, env)
+
+    def k_index(self, node: ast.IndexExpression, env: Environment) -> None:
+        index = self.values.pop()
+        left = self.values.pop()
+        self.push_value(evaluator.m_eval_index_expression(left, index))
+
+    def k_slice(self, node: ast.SliceExpression, env: Environment) -> None:
+        end = self.values.pop()
+        start = self.values.pop()
+        left = self.values.pop()
+        self.push_value(evaluator.m_eval_slice_expression(left, start, end))
+
+    def k_hash(self, n_items: int, env: Environment) -> None:
+        values = self.values
+        items = values[len(values) - n_items:]
+        del values[len(values) - n_items:]
+        self.push_value(evaluator.m_eval_hash_pairs(items))
+
+    def k_array(self, n_elements: int, env: Environment) -> None:
+        values = self.values
+        elements = values[len(values) - n_elements:]
+        del values[len(values) - n_elements:]
+        values.append(mobjects.Array(elements))
+
+    def k_call(self, n_args: int, env: Environment) -> None:
+        values = self.values
+        args = values[len(values) - n_args:]
+        del values[len(values) - n_args:]
+        function = values.pop()
+        if function.tag != mobjects.FUNCTION_OBJ:
+            # builtins, errors for everything else which is not callable
+            self.values.append(evaluator.m_eval_call_expression(function, args))
+            return
+        if len(function.parameters) != len(args):
+            msg = f"function expected {len(function.parameters)} arguments but"
+            msg += f" {len(args)} were given"
+            raise evaluator.ErrorSignal(evaluator.m_error(msg))
+        table = function.memo
+        if table is not None:
+            key = table.key(function, args)
+            if key is not None:
+                value = table.get(key)
+                if value is not None:
+                    values.append(value)
+                    return
+                # runs after the call returned its value
+                self.work.append((self.k_memo_store, (table, key), env))
+        if function.scope is not None:
+            call_env = Frame(function.scope, function.env)
+            call_env.slots[:len(args)] = args
+        else:
+            call_env = Environment(outer=function.env)
+            for ind, parameter in enumerate(function.parameters):
+                call_env.set(parameter.name, args[ind])
+        self.work.append((self.k_call_end, len(values), call_env))
+        self.push_eval(function.body, call_env)
+
+    def k_call_end(self, height: int, env: Environment) -> None:
+        """marks the bottom of a function call on the work stack."""
+        pass
+
+    def k_memo_store(self, data, env: Environment) -> None:
+        table, key = data
+        table.put(key, self.values[-1])
+
+    def k_program_end(self, height: int, env: Environment) -> None:
+        self.result = self.values.pop()
+        self.finished = True
+
+EVAL_HANDLERS = {
+    ast.BlockStatement: StackEvaluator.e_statements,
+    ast.ExpressionStatement: StackEvaluator.e_expression_statement,
+    ast.LetStatement: StackEvaluator.e_let_statement,
+    ast.ReturnStatement: StackEvaluator.e_return_statement,
+    ast.Identifier: StackEvaluator.e_identifier,
+    ast.IntegerLiteral: StackEvaluator.e_integer_literal,
+    ast.StringLiteral: StackEvaluator.e_string_literal,
+    ast.Boolean: StackEvaluator.e_boolean,
+    ast.PrefixExpression: StackEvaluator.e_prefix_expression,
+    ast.InfixExpression: StackEvaluator.e_infix_expression,
+    ast.IfExpression: StackEvaluator.e_if_expression,
+    ast.WhileExpression: StackEvaluator.e_while_expression,
+    ast.IndexExpression: StackEvaluator.e_index_expression,
+    ast.SliceExpression: StackEvaluator.e_slice_expression,
+    ast.ArrayLiteral: StackEvaluator.e_array_literal,
+    ast.HashLiteral: StackEvaluator.e_hash_literal,
+    ast.FunctionLiteral: StackEvaluator.e_function_literal,
+    ast.CallExpression: StackEvaluator.e_call_expression,
+}
+
+def run_program(program: ast.Program, env: Environment) -> mobjects.Object:
+    """evaluate program with StackEvaluator in given environment."""
+    return StackEvaluator(program, env).run()
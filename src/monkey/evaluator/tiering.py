@@ -0,0 +1,74 @@
+"""Tiered execution for m_eval.
+
+m_eval starts every function and loop on the syntax tree, which costs
+nothing up front. Calls of a function and iterations of a while loop are
+counted, once a count reaches its threshold the function body (or the
+loop condition and body) is translated by the closure compiler and the
+closures run from then on:
+
+    - Function.calls counts calls, the compiled body is stored in
+      Function.code and shared by all functions of the same literal.
+    - WhileExpression.iterations counts iterations over all runs of the
+      loop, the compiled closures are stored in WhileExpression.compiled.
+
+A threshold of 0 disables promotion.
+"""
+
+from typing import Callable, Dict, Optional, Tuple
+import time
+import weakref
+
+from monkey.ast import ast
+from monkey.evaluator import mobjects
+
+DEFAULT_CALL_THRESHOLD = 100
+DEFAULT_LOOP_THRESHOLD = 1000
+
+call_threshold: int = DEFAULT_CALL_THRESHOLD
+loop_threshold: int = DEFAULT_LOOP_THRESHOLD
+
+Code = Callable[..., mobjects.Object]
+
+# compiled function bodies by BlockStatement
+_bodies: "weakref.WeakKeyDictionary[ast.BlockStatement, Code]"
+_bodies = weakref.WeakKeyDictionary()
+
+COUNTERS = {"functions": 0, "loops": 0, "compile_time": 0.0}
+
+def configure(calls: Optional[int] = None, loops: Optional[int] = None) -> None:
+    """set thresholds of calls and loop iterations, None keeps the current one."""
+    global call_threshold, loop_threshold
+    if calls is not None:
+        call_threshold = calls
+    if loops is not None:
+        loop_threshold = loops
+
+def compiled_body(body: ast.BlockStatement) -> Optional[Code]:
+    """compiled body of a function literal if it was promoted."""
+    return _bodies.get(body)
+
+def promote_function(function: mobjects.Function) -> Code:
+    """compile body of function, future calls run the compiled body."""
+    code = _bodies.get(function.body)
+    if code is None:
+        from monkey.evaluator import closure_compiler
+        start = time.perf_counter()
+        code = closure_compiler.c_node(function.body)
+        COUNTERS["compile_time"] += time.perf_counter() - start
+        COUNTERS["functions"] += 1
+        _bodies[function.body] = code
+    function.code = code
+    return code
+
+def promote_loop(node: ast.WhileExpression) -> Tuple[Code, Code]:
+    """compile condition and body of a while loop."""
+    from monkey.evaluator import closure_compiler
+    start = time.perf_counter()
+    node.compiled = (closure_compiler.c_node(node.condition), closure_compiler.c_node(node.body))
+    COUNTERS["compile_time"] += time.perf_counter() - start
+    COUNTERS["loops"] += 1
+    return node.compiled
+
+def stats() -> Dict[str, float]:
+    """number of promoted functions and loops and the time spent compiling."""
+    return dict(COUNTERS)
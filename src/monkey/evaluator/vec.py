@@ -0,0 +1,128 @@
+"""Vector operations on arrays of integers, backed by NumPy.
+
+NumPy is optional, it is imported by the first call of a vec function so
+the interpreter starts without it. The functions are the values of the
+`vec` hash of the builtins:
+
+    let v = vec["mul"]([1, 2, 3], 2);           // [2, 4, 6]
+    vec["sum"](vec["mask"](v, vec["gt"](v, 3)))  // 10
+
+Arguments are arrays of integers, masks (arrays of booleans) and
+integers, which apply to every element. Packed arrays are passed to NumPy
+without copying and integer results come back packed, so the elements
+are only boxed when Monkey code reads them. Arithmetic wraps around at 64
+bits like it does in NumPy.
+"""
+
+from array import array
+from typing import Any, Callable, Dict
+
+from monkey.evaluator import mobjects
+from monkey.evaluator import evaluator
+
+# imported by load
+numpy = None
+
+def m_error(msg) -> mobjects.Error:
+    return mobjects.Error(msg)
+
+def load() -> None:
+    """import numpy, raise ErrorSignal if it isn't installed."""
+    global numpy
+    if numpy is None:
+        try:
+            import numpy as module
+        except ImportError:
+            raise evaluator.ErrorSignal(m_error("vec needs numpy, install it with: pip install numpy"))
+        numpy = module
+
+def to_numpy(value: mobjects.Object) -> Any:
+    """numpy array of an Array, python int of an Integer."""
+    if value.tag == mobjects.INTEGER_OBJ:
+        return value.value
+    if value.tag != mobjects.ARRAY_OBJ:
+        raise evaluator.ErrorSignal(m_error(f"vec needs arrays or integers, not {value.type()}"))
+    integers = value.integers()
+    if type(integers) is range:
+        return numpy.arange(integers.start, integers.stop, integers.step, dtype=numpy.int64)
+    if integers is not None:
+        return numpy.frombuffer(integers, dtype=numpy.int64)
+    elements = list(value.objects())
+    if all(type(element) is mobjects.Boolean for element in elements):
+        return numpy.array([element.value for element in elements], dtype=numpy.bool_)
+    for element in elements:
+        if type(element) is not mobjects.Integer:
+            raise evaluator.ErrorSignal(m_error(
+                f"vec needs arrays of integers or booleans, not {element.type()}"))
+    # packing failed, the integers don't fit in 64 bits
+    raise evaluator.ErrorSignal(m_error("vec needs integers of 64 bits"))
+
+def from_numpy(value: Any) -> mobjects.Object:
+    """Monkey value of a numpy array or scalar."""
+    if isinstance(value, numpy.ndarray):
+        if value.dtype == numpy.bool_:
+            return mobjects.Array([evaluator.construct_boolean(item) for item in value.tolist()])
+        packed = array("q")
+        packed.frombytes(value.astype(numpy.int64, copy=False).tobytes())
+        return mobjects.Array(packed=packed)
+    if isinstance(value, numpy.bool_):
+        return evaluator.construct_boolean(bool(value))
+    return mobjects.construct_integer(int(value))
+
+def v_div(left, right):
+    if numpy.any(numpy.asarray(right) == 0):
+        raise evaluator.ErrorSignal(m_error("division by zero"))
+    return numpy.floor_divide(left, right)
+
+def v_reduce(name: str) -> Callable[[Any], Any]:
+    def reduce(values):
+        if numpy.ndim(values) == 0:
+            raise evaluator.ErrorSignal(m_error(f"vec {name} needs an array"))
+        if name in ("min", "max") and len(values) == 0:
+            raise evaluator.ErrorSignal(m_error(f"{name}() of empty array"))
+        return getattr(numpy, name)(values)
+    return reduce
+
+def v_mask(values, mask):
+    if numpy.ndim(values) == 0 or numpy.ndim(mask) == 0 or mask.dtype != numpy.bool_:
+        raise evaluator.ErrorSignal(m_error("vec mask needs an array and an array of booleans"))
+    return values[mask]
+
+def vec_builtin(name: str, function: Callable[..., Any], n_args: int) -> mobjects.Builtin:
+    """Builtin converting the arguments and result of function."""
+    def call(*args):
+        if len(args) != n_args:
+            return m_error(f"vec {name} takes exactly {n_args} arguments ({len(args)} given)")
+        try:
+            load()
+            values = [to_numpy(arg) for arg in args]
+            lengths = {len(value) for value in values if numpy.ndim(value) == 1}
+            if len(lengths) > 1:
+                return m_error(f"vec {name} needs arrays of the same length")
+            try:
+                return from_numpy(function(*values))
+            except OverflowError:
+                return m_error("vec needs integers of 64 bits")
+        except evaluator.ErrorSignal as signal:
+            return signal.error
+    return mobjects.Builtin(call, pure=True)
+
+def build_module() -> mobjects.Hash:
+    functions: Dict[str, mobjects.Builtin] = {}
+    # numpy attributes are looked up on call, numpy isn't imported yet
+    for name, numpy_name in (("add", "add"), ("sub", "subtract"), ("mul", "multiply"),
+                             ("lt", "less"), ("gt", "greater"),
+                             ("eq", "equal"), ("ne", "not_equal"), ("dot", "dot")):
+        functions[name] = vec_builtin(
+            name, lambda left, right, numpy_name=numpy_name: getattr(numpy, numpy_name)(left, right), 2)
+    functions["div"] = vec_builtin("div", v_div, 2)
+    functions["mask"] = vec_builtin("mask", v_mask, 2)
+    for name in ("sum", "min", "max"):
+        functions[name] = vec_builtin(name, v_reduce(name), 1)
+    pairs = {}
+    for name, builtin in functions.items():
+        key = mobjects.String(name)
+        pairs[key.hash_key()] = (key, builtin)
+    return mobjects.Hash(pairs)
+
+module = build_module()
@@ -1,49 +1,175 @@
-from typing import Callable, Tuple
+"""Table driven deterministic finite automata recognising tokens.
+
+Every kind of token is described by a TokenSpec, a small DFA over sets of
+characters. DFA combines the specs of all kinds into one automaton (the
+product of the specs, a state is the tuple of their states) and runs it
+on a string with maximal munch: the longest prefix ending in an accepting
+state is the match, its span is reported instead of copying it.
+
+Characters are grouped in classes, characters of a class are in the same
+character sets of every spec so they take the same transitions. The
+transition table is dense, table[char_class][state] is the next state.
+Classes of ASCII characters are computed when the DFA is built, other
+characters are classified on their first use, a class (and the states it
+leads to) is added to the table if none matches.
+"""
+
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+# string of the characters in the set, or predicate of a character
+CharSet = Union[str, Callable[[str], bool]]
+
+# next state of a transition to no state
+DEAD = -1
+
+class TokenSpec:
+    """DFA recognising tokens of one or more kinds.
+
+    Args:
+        start: start state.
+        finals: kind of the token recognised in every accepting state.
+        transitions: pairs (chars, next state) of every state, the
+            first pair matching a character is taken.
+    """
+    def __init__(self, start: str, finals: Dict[str, str],
+                 transitions: Dict[str, List[Tuple[CharSet, str]]]) -> None:
+        self.start = start
+        self.finals = finals
+        self.transitions = transitions
+
+    def charsets(self) -> List[CharSet]:
+        return [chars for pairs in self.transitions.values() for chars, _ in pairs]
+
+def contains(chars: CharSet, char: str) -> bool:
+    if isinstance(chars, str):
+        return char in chars
+    return chars(char)
 
 class DFA:
-    """The class simulates DFA Finite Machine"""
-    def __init__(self, states: set, start_state: str, final_states: set, transition: Callable[[str, str], str]):
-        """Create a DFA
+    """The class simulates a DFA combining token specifications.
 
-        Args:
-            states: set of all states in the DFA.
-            start_state: start state of the DFA.
-            final_states: set of accepting states.
-            transition: A transition function should take current state and
-                symbol and return next state if any otherwise None. 
+    Attributes:
+        table: next state by character class and state, DEAD if there
+            is no transition.
+        accepting: kind of token accepted in every state, None if the
+            state isn't accepting.
+    """
+    def __init__(self, specs: Sequence[TokenSpec]) -> None:
+        """Build the DFA of specs, earlier specs take priority if more
+        than one accept the same input.
         """
-        self.states = states
-        self.start = start_state
-        self.final_states = final_states
-        self.transition = transition
-        
-    def run(self, input: str) -> Tuple[bool, str]:
-        """simulates self DFA against given input. 
+        self.specs = specs
+        self.charsets: List[CharSet] = []
+        for spec in specs:
+            for chars in spec.charsets():
+                if chars not in self.charsets:
+                    self.charsets.append(chars)
+        self.table: List[List[int]] = []
+        self.accepting: List[Optional[str]] = []
+        # states of the product, tuples of the states of every spec
+        self.states: List[Tuple[Optional[str], ...]] = []
+        self.state_numbers: Dict[Tuple[Optional[str], ...], int] = {}
+        # class of every character signature, see signature
+        self.class_numbers: Dict[Tuple[bool, ...], int] = {}
+        self.class_signatures: List[Tuple[bool, ...]] = []
+        self.classes: Dict[str, int] = {}
 
-        Args:
-            input: character string to simulate
+        self._add_state(tuple(spec.start for spec in specs))
+        self.ascii_classes = [self.char_class(chr(code)) for code in range(128)]
 
-        Returns:
-            A tuple of (accepted, value) where the
-            accepted is a boolean represents whether
-            starting part of input is accepted by DFA
-            and value is a str contains part of the
-            input accepted.
-        """
+    def signature(self, char: str) -> Tuple[bool, ...]:
+        """membership of char in every character set."""
+        return tuple(contains(chars, char) for chars in self.charsets)
+
+    def char_class(self, char: str) -> int:
+        """class of char, new classes are added to the table."""
+        char_class = self.classes.get(char)
+        if char_class is None:
+            signature = self.signature(char)
+            char_class = self.class_numbers.get(signature)
+            if char_class is None:
+                char_class = self._add_class(signature)
+            self.classes[char] = char_class
+        return char_class
 
-        current_state = self.start
+    def _step(self, spec: TokenSpec, state: Optional[str], signature: Tuple[bool, ...]) -> Optional[str]:
+        """next state of spec from state for characters of signature."""
+        if state is None:
+            return None
+        for chars, next_state in spec.transitions.get(state, ()):
+            if signature[self.charsets.index(chars)]:
+                return next_state
+        return None
 
-        buffer = ""
+    def _next_state(self, state: int, signature: Tuple[bool, ...]) -> int:
+        components = tuple(self._step(spec, component, signature)
+                           for spec, component in zip(self.specs, self.states[state]))
+        if all(component is None for component in components):
+            return DEAD
+        number = self.state_numbers.get(components)
+        if number is None:
+            number = self._add_state(components)
+        return number
 
-        for symbol in input:
-            next_state = self.transition(current_state, symbol)
-            if next_state is None:
+    def _add_state(self, components: Tuple[Optional[str], ...]) -> int:
+        """add a state and its transitions by every known class."""
+        number = len(self.states)
+        self.states.append(components)
+        self.state_numbers[components] = number
+        kind = None
+        for spec, component in zip(self.specs, components):
+            if component in spec.finals:
+                kind = spec.finals[component]
                 break
-            buffer += symbol
-            current_state = next_state
-        
-        accepted = current_state in self.final_states
-        value = buffer
-        
-        return accepted, value
+        self.accepting.append(kind)
+        # states added by _next_state extend the rows after this one
+        for row in self.table:
+            row.append(DEAD)
+        for char_class, signature in enumerate(self.class_signatures):
+            self.table[char_class][number] = self._next_state(number, signature)
+        return number
+
+    def _add_class(self, signature: Tuple[bool, ...]) -> int:
+        """add a class and the transitions of every state by it."""
+        char_class = len(self.class_signatures)
+        self.class_signatures.append(signature)
+        self.class_numbers[signature] = char_class
+        row = [DEAD] * len(self.states)
+        self.table.append(row)
+        # states added meanwhile extend the row themselves
+        for state in range(len(row)):
+            row[state] = self._next_state(state, signature)
+        return char_class
+
+    def match(self, text: str, start: int = 0) -> Tuple[Optional[str], int, int]:
+        """longest match of a token in text at start (maximal munch).
 
+        Args:
+            text: string to match.
+            start: position of the first character of the token.
+
+        Returns:
+            A tuple (kind, end, stop) where kind is the kind of the
+            matched token (None if no prefix is accepted), end is the
+            end of the match and stop the position of the character the
+            DFA stopped on, len(text) if it reached the end of text.
+        """
+        table = self.table
+        ascii_classes = self.ascii_classes
+        accepting = self.accepting
+        state = 0
+        kind = None
+        end = start
+        position = start
+        length = len(text)
+        while position < length:
+            char = text[position]
+            code = ord(char)
+            state = table[ascii_classes[code] if code < 128 else self.char_class(char)][state]
+            if state == DEAD:
+                break
+            position += 1
+            if accepting[state] is not None:
+                kind = accepting[state]
+                end = position
+        return kind, end, position
@@ -1,20 +1,116 @@
 """Lexical Analyser for Monkey language"""
 
-from typing import List, Type
+from functools import lru_cache
+from typing import List, Optional, Type
 
 from monkey.exceptions import LexicalError
+from monkey.lexer.fsm import DFA, TokenSpec
+from monkey.lexer.reader import CHUNK_SIZE, Source, TextReader
 from monkey.lexer.token import Token
-from monkey.lexer.token_types import TOKEN_TYPES, look_up_identifier
+from monkey.lexer.token_types import TOKEN_TYPES, KEYWORDS, look_up_identifier
+
+def is_nonzero_digit(char: str) -> bool:
+    return char.isdigit() and char != "0"
+
+def is_identifier_start(char: str) -> bool:
+    return char.isalpha() or char == "_"
+
+def is_identifier_char(char: str) -> bool:
+    return char.isalpha() or char.isdigit() or char == "_"
+
+def is_string_char(char: str) -> bool:
+    return char != '"'
+
+# tokens recognised by the DFA of Lexer, the same as the _recognise
+# methods and the operators of get_next_token
+TOKEN_SPECS = [
+    TokenSpec("start", {"nonzero": TOKEN_TYPES.INTEGER, "zero": TOKEN_TYPES.INTEGER}, {
+        "start": [("0", "zero"), (is_nonzero_digit, "nonzero")],
+        "nonzero": [(str.isdigit, "nonzero"), ("_", "nonzero_")],
+        "nonzero_": [(str.isdigit, "nonzero")],
+        "zero": [("0", "zero"), ("_", "zero_")],
+        "zero_": [("0", "zero")],
+    }),
+    TokenSpec("start", {"identifier": TOKEN_TYPES.IDENTIFIER}, {
+        "start": [(is_identifier_start, "identifier")],
+        "identifier": [(is_identifier_char, "identifier")],
+    }),
+    # strings without the closing quote end with the input
+    TokenSpec("start", {"open": TOKEN_TYPES.STRING, "closed": TOKEN_TYPES.STRING}, {
+        "start": [('"', "open")],
+        "open": [(is_string_char, "open"), ('"', "closed")],
+    }),
+    TokenSpec("start", {
+        "+": TOKEN_TYPES.PLUS, "-": TOKEN_TYPES.MINUS,
+        "*": TOKEN_TYPES.MUL, "/": TOKEN_TYPES.DIV,
+        "=": TOKEN_TYPES.ASSIGN, "==": TOKEN_TYPES.EQUAL,
+        "!": TOKEN_TYPES.NOT, "!=": TOKEN_TYPES.NOT_EQUAL,
+        "<": TOKEN_TYPES.LESSTHAN, ">": TOKEN_TYPES.GREATERTHAN,
+        "(": TOKEN_TYPES.LPAREN, ")": TOKEN_TYPES.RPAREN,
+        "[": TOKEN_TYPES.LBRACKET, "]": TOKEN_TYPES.RBRACKET,
+        "{": TOKEN_TYPES.LBRACE, "}": TOKEN_TYPES.RBRACE,
+        ",": TOKEN_TYPES.COMMA, ";": TOKEN_TYPES.SEMICOLON,
+        ":": TOKEN_TYPES.COLON,
+    }, {
+        "start": [(char, char) for char in "+-*/=!<>()[]{},;:"],
+        "=": [("=", "==")],
+        "!": [("=", "!=")],
+    }),
+]
+
+# operators taking the column after them, see get_next_token
+ARITHMETIC_TOKENS = {TOKEN_TYPES.PLUS, TOKEN_TYPES.MINUS, TOKEN_TYPES.MUL, TOKEN_TYPES.DIV}
+
+@lru_cache(maxsize=None)
+def token_dfa() -> DFA:
+    """DFA of TOKEN_SPECS, built on first use."""
+    return DFA(TOKEN_SPECS)
+
+def integer_token(text: str, following: str, line: int, column: int) -> Type[Token]:
+    """check the character following an integer, see Lexer._recognise_integer.
+
+    Args:
+        text: digits of the integer, with "_" separators.
+        following: character after the integer, empty at the end of input.
+
+    Returns:
+        returns INTEGER token with the value of text.
+    Raises:
+        raises LexicalError if the integer ends with "_" or a letter.
+    """
+    if following == "_":
+        if text[0] != "0":
+            error_msg = f"invalid integer {text.replace('_', '') + '_'}\n"
+            error_msg += "integers cannot end with '_',"
+            error_msg += "'_' can only used in the middle as"
+            error_msg += " visual separator.\n"
+            error_msg += "LexicalError: Invalid integer literal"
+            raise LexicalError(error_msg)
+        raise LexicalError("LexicalError: invalid integer literal 0_")
+    if following.isalpha():
+        error_msg = "identifiers cannot start with a number\n"
+        raise LexicalError(f"{error_msg}\nLexicalError: Invalid Identifier")
+    return Token(TOKEN_TYPES.INTEGER, int(text), line, column)
 
 class Lexer:
     """A class for lexical analysis"""
-    def __init__(self, source: str) -> None:
-        """Initialise Lexer with source code string.
+    def __init__(self, source: Source, dfa: Optional[DFA] = None) -> None:
+        """Initialise Lexer with source code.
 
         Args:
-            source: input source code to tokenize.
+            source: input source code to tokenize, a string or a binary
+                file object or mmap which is read while tokenizing. input
+                then only holds the part of the source around the cursor.
+            dfa: DFA recognising the tokens (see token_dfa) instead of
+                the _recognise methods, None scans characters one by one.
         """
-        self.input = source
+        self.dfa = dfa
+        if isinstance(source, str):
+            self.reader = None
+            self.input = source
+        else:
+            self.reader = TextReader(source)
+            self.input = self.reader.read(CHUNK_SIZE)
         self.input_len = len(self.input)
         self.current_char = None
         self.position = 0
@@ -34,18 +130,38 @@ class Lexer:
             input length limits else empty string. 
         """
         if not self.position + offset < self.input_len:
-            return ""
+            if self.reader is None or not self._read_input():
+                return ""
+            return self._peek_char(offset)
         return self.input[self.position + offset]
     
     def _advance(self) -> None:
         """advance the position of cursor and set current character"""
         if not self.position < self.input_len:
-            self.current_char = None
-            return
+            if self.reader is None or not self._read_input():
+                self.current_char = None
+                return
         self.current_char = self.input[self.position]
         self.position += 1
         self.current_column += 1
 
+    def _read_input(self) -> bool:
+        """replace the consumed part of input with the next part of the source.
+
+        Returns:
+            False if the whole source was read.
+        """
+        text = self.reader.read(CHUNK_SIZE)
+        if not text:
+            self.reader = None
+            return False
+        # keep the current character, tokens are matched from it
+        start = max(self.position - 1, 0)
+        self.input = self.input[start:] + text
+        self.input_len = len(self.input)
+        self.position -= start
+        return True
+
     def _skip_whitespace(self) -> None:
         """skip whitespaces from the cursor position"""
         while (self.current_char is not None
@@ -82,6 +198,9 @@ class Lexer:
         if self.current_char is None:
             return Token(TOKEN_TYPES.EOF, "EOF", self.current_line, self.current_column)
 
+        if self.dfa is not None:
+            return self._recognise_token()
+
         # Literals
         if self.current_char.isdigit():
             return self._recognise_integer()
@@ -157,6 +276,7 @@ class Lexer:
             "}": TOKEN_TYPES.RBRACE,
             ",": TOKEN_TYPES.COMMA,
             ";": TOKEN_TYPES.SEMICOLON,
+            ":": TOKEN_TYPES.COLON,
         }.get(self.current_char, None)
         
         if tmp_token_type is not None:
@@ -168,6 +288,41 @@ class Lexer:
                      
         raise LexicalError(f"LexicalError: unrecognised token at or near {self.current_char}")
 
+    def _recognise_token(self) -> Type[Token]:
+        """recognise the token at the cursor with the DFA.
+
+        Returns:
+            the same token as the scanning get_next_token.
+        Raises:
+            raises LexicalError if no token starts at the cursor.
+        """
+        line = self.current_line
+        column = self.current_column
+        while True:
+            start = self.position - 1
+            kind, end, stop = self.dfa.match(self.input, start)
+            # the token may continue in the part of the source not read yet
+            if stop < self.input_len or self.reader is None or not self._read_input():
+                break
+        if kind is None:
+            raise LexicalError(f"LexicalError: unrecognised token at or near {self.current_char}")
+        text = self.input[start:end]
+        # move the cursor to the character after the token
+        self.position = end
+        self.current_column += end - start - 1
+        self._advance()
+        if kind == TOKEN_TYPES.IDENTIFIER:
+            return Token(KEYWORDS.get(text, kind), text, line, column)
+        if kind == TOKEN_TYPES.INTEGER:
+            return integer_token(text, self.current_char or "", line, column)
+        if kind == TOKEN_TYPES.STRING:
+            if len(text) > 1 and text[-1] == '"':
+                return Token(kind, text[1:-1], line, column)
+            return Token(kind, text[1:], line, column)
+        if kind in ARITHMETIC_TOKENS:
+            column = self.current_column
+        return Token(kind, text, line, column)
+
     def _recognise_integer(self) -> Type[Token]:
         """recognise integers.
         
@@ -0,0 +1,39 @@
+"""Incremental reading of source code from binary files.
+
+The lexers accept a binary file object or an mmap instead of a string,
+its text is read in chunks while the tokens are produced so the whole
+source is never held in memory.
+"""
+
+import codecs
+import io
+import mmap
+from typing import BinaryIO, Union
+
+# bytes read at a time
+CHUNK_SIZE = 1 << 16
+
+Source = Union[str, BinaryIO, mmap.mmap]
+
+class TextReader:
+    """text of a binary stream, read on demand.
+
+    bytes are decoded as UTF-8 and newlines are translated like a file
+    opened in text mode does ("\\r\\n" and "\\r" become "\\n"), so the
+    tokens are the same as for the string read from the file.
+    """
+    def __init__(self, stream: Union[BinaryIO, mmap.mmap]) -> None:
+        self.stream = stream
+        self.decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder("utf-8")(), translate=True)
+        self.finished = False
+
+    def read(self, size: int = CHUNK_SIZE) -> str:
+        """next part of the text, about size characters, empty at the end."""
+        text = ""
+        while not text and not self.finished:
+            data = self.stream.read(size)
+            if not data:
+                self.finished = True
+            text = self.decoder.decode(data, final=self.finished)
+        return text
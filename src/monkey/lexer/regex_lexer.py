@@ -0,0 +1,200 @@
+"""Lexical Analyser for Monkey language using a single regular expression.
+
+RegexLexer produces the same tokens (values, lines and columns) and
+raises the same LexicalErrors as Lexer, but every token is recognised by
+one match of a compiled master pattern instead of a python loop over its
+characters. Lines and columns follow the rules of Lexer:
+
+    - only newlines between tokens start a new line, newlines inside
+      strings don't.
+    - the column of a token is the column of its first character, except
+      for "+", "-", "*" and "/" which take the column after them (unless
+      they end the input).
+    - EOF takes the column of the last character of the input.
+"""
+
+import re
+from typing import Iterator, List, Type
+
+from monkey.exceptions import LexicalError
+from monkey.lexer.lexer import integer_token
+from monkey.lexer.reader import CHUNK_SIZE, Source, TextReader
+from monkey.lexer.token import Token
+from monkey.lexer.token_types import TOKEN_TYPES, KEYWORDS
+
+# whitespace before the token is part of every match, the groups are
+# disjoint and ordered by how common they are
+TOKEN_PATTERN = re.compile(r"""
+    \s*
+    (?:
+        (?P<identifier>[^\W\d]\w*)
+      | (?P<operator>==|!=|[-+*/=<>!(){}\[\],;:])
+      | (?P<integer>(?!0)\d+(?:_\d+)*|0+(?:_0+)*)
+      | (?P<string>"[^"]*"?)
+      | (?P<end>\Z)
+    )
+""", re.VERBOSE)
+
+OPERATORS = {
+    "+": TOKEN_TYPES.PLUS,
+    "-": TOKEN_TYPES.MINUS,
+    "*": TOKEN_TYPES.MUL,
+    "/": TOKEN_TYPES.DIV,
+    "=": TOKEN_TYPES.ASSIGN,
+    "==": TOKEN_TYPES.EQUAL,
+    "!=": TOKEN_TYPES.NOT_EQUAL,
+    "<": TOKEN_TYPES.LESSTHAN,
+    ">": TOKEN_TYPES.GREATERTHAN,
+    "!": TOKEN_TYPES.NOT,
+    "(": TOKEN_TYPES.LPAREN,
+    ")": TOKEN_TYPES.RPAREN,
+    "[": TOKEN_TYPES.LBRACKET,
+    "]": TOKEN_TYPES.RBRACKET,
+    "{": TOKEN_TYPES.LBRACE,
+    "}": TOKEN_TYPES.RBRACE,
+    ",": TOKEN_TYPES.COMMA,
+    ";": TOKEN_TYPES.SEMICOLON,
+    ":": TOKEN_TYPES.COLON,
+}
+
+# numbers of the groups of TOKEN_PATTERN
+INTEGER = TOKEN_PATTERN.groupindex["integer"]
+IDENTIFIER = TOKEN_PATTERN.groupindex["identifier"]
+STRING = TOKEN_PATTERN.groupindex["string"]
+OPERATOR = TOKEN_PATTERN.groupindex["operator"]
+
+# characters after a token deciding where it ends, "_" and a digit
+# continue an integer
+LOOKAHEAD = 2
+
+# operators taking the column after them, see Lexer.get_next_token
+ARITHMETIC_OPERATORS = frozenset("+-*/")
+
+class RegexLexer:
+    """A class for lexical analysis, see Lexer.
+
+    tokens are produced by the generator _scan, the get_next_token
+    attribute of an instance is the __next__ method of its generator. It
+    returns the next token and raises LexicalError if the input at the
+    cursor is not a valid lexeme.
+    """
+    def __init__(self, source: Source) -> None:
+        """Initialise RegexLexer with source code.
+
+        Args:
+            source: input source code to tokenize, a string or a binary
+                file object or mmap which is read while tokenizing.
+        """
+        if isinstance(source, str):
+            self.reader = None
+            text = source
+        else:
+            self.reader = TextReader(source)
+            text = self.reader.read(CHUNK_SIZE)
+        # bound to the generator, skips a python call per token
+        self.get_next_token = self._scan(text).__next__
+
+    def tokenize(self) -> List[Type[Token]]:
+        """collect all tokens from input.
+
+        Returns:
+            List of all tokens including EOF token.
+        """
+        tokens = []
+        token = self.get_next_token()
+        while token.type != TOKEN_TYPES.EOF:
+            tokens.append(token)
+            token = self.get_next_token()
+        tokens.append(token)
+        return tokens
+
+    def _scan(self, source: str) -> Iterator[Type[Token]]:
+        """generate the tokens of the input, EOF is repeated forever.
+
+        source is the text read so far. A match ending less than
+        LOOKAHEAD characters before its end may be different once the text
+        which isn't read yet follows, the consumed part of source is then
+        replaced by the next part of the input and the token is matched
+        again.
+        """
+        reader = self.reader
+        input_len = len(source)
+        match_next = TOKEN_PATTERN.scanner(source).match
+        keyword = KEYWORDS.get
+        identifier_type = TOKEN_TYPES.IDENTIFIER
+        string_type = TOKEN_TYPES.STRING
+        line = 1
+        # position of the first character of the current line
+        line_start = 0
+        position = 0
+        while True:
+            match = match_next()
+            if match is None:
+                char = source[position:].lstrip()[0]
+                raise LexicalError(f"LexicalError: unrecognised token at or near {char}")
+            kind = match.lastindex
+            start, end = match.span(kind)
+            if input_len - end < LOOKAHEAD and reader is not None:
+                # read at least as much as is pending, long tokens are
+                # matched again a logarithmic number of times
+                text = reader.read(max(CHUNK_SIZE, input_len - position))
+                if not text:
+                    reader = self.reader = None
+                source = source[position:] + text
+                input_len = len(source)
+                line_start -= position
+                position = 0
+                match_next = TOKEN_PATTERN.scanner(source).match
+                continue
+            if start != position:
+                newlines = source.count("\n", position, start)
+                if newlines:
+                    line += newlines
+                    line_start = source.rfind("\n", position, start) + 1
+            position = end
+            column = start - line_start + 1
+
+            if kind == IDENTIFIER:
+                text = match.group(kind)
+                if not text.isascii():
+                    text = self._identifier_prefix(text)
+                    if start + len(text) != end:
+                        position = start + len(text)
+                        match_next = TOKEN_PATTERN.scanner(source, position).match
+                yield Token(keyword(text, identifier_type), text, line, column)
+            elif kind == OPERATOR:
+                text = match.group(kind)
+                if text in ARITHMETIC_OPERATORS and end < input_len:
+                    column += 1
+                yield Token(OPERATORS[text], text, line, column)
+            elif kind == INTEGER:
+                yield integer_token(match.group(kind), source[end:end + 1], line, column)
+            elif kind == STRING:
+                text = match.group(kind)
+                if len(text) > 1 and text[-1] == '"':
+                    yield Token(string_type, text[1:-1], line, column)
+                else:
+                    # not terminated, the string ends with the input
+                    yield Token(string_type, text[1:], line, column)
+            else:
+                break
+        # the end of input takes the column of the last character
+        eof = Token(TOKEN_TYPES.EOF, "EOF", line, input_len - line_start)
+        while True:
+            yield eof
+
+    def _identifier_prefix(self, text: str) -> str:
+        """part of text which is an identifier for Lexer.
+
+        \\w also matches numeric characters which aren't letters or
+        digits (like "½"), those end the identifier.
+
+        Raises:
+            raises LexicalError if text doesn't start with an identifier.
+        """
+        for index, char in enumerate(text):
+            if not (char.isalpha() or char == "_" or (index > 0 and char.isdigit())):
+                if index == 0:
+                    raise LexicalError(f"LexicalError: unrecognised token at or near {char}")
+                return text[:index]
+        return text
@@ -9,6 +9,8 @@ class Token:
         type: Token type.
         value: value of the Token.
     """
+    __slots__ = ("type", "value", "line", "column")
+
     def __init__(self, token_type: str, value: Any, line = 0, column = 0) -> None:
         """define a token."""
         self.type = token_type
@@ -40,6 +40,7 @@ token_types = {
     "RBRACE"    : "}",
     "COMMA"     : ",",
     "SEMICOLON" : ";",
+    "COLON"     : ":",
 
     # Literals
     "IDENTIFIER": "IDENTIFIER",
@@ -54,6 +55,17 @@ token_types = {
 
 TOKEN_TYPES = SimpleNamespace(**token_types)
 
+KEYWORDS = {
+    "let"       : TOKEN_TYPES.LET,
+    "fn"        : TOKEN_TYPES.FUNCTION,
+    "true"      : TOKEN_TYPES.TRUE,
+    "false"     : TOKEN_TYPES.FALSE,
+    "if"        : TOKEN_TYPES.IF,
+    "else"      : TOKEN_TYPES.ELSE,
+    "return"    : TOKEN_TYPES.RETURN,
+    "while"     : TOKEN_TYPES.WHILE,
+}
+
 def look_up_identifier(identifier: str) -> Optional[str]:
     """check whether given identifier is keyword or not.
 
@@ -64,14 +76,4 @@ def look_up_identifier(identifier: str) -> Optional[str]:
         returns keyword token type if identifier is keyword
         else None.
     """
-    keywords = {
-        "let"       : TOKEN_TYPES.LET,
-        "fn"        : TOKEN_TYPES.FUNCTION,
-        "true"      : TOKEN_TYPES.TRUE,
-        "false"     : TOKEN_TYPES.FALSE,
-        "if"        : TOKEN_TYPES.IF,
-        "else"      : TOKEN_TYPES.ELSE,
-        "return"    : TOKEN_TYPES.RETURN,
-        "while"     : TOKEN_TYPES.WHILE,
-    }
-    return keywords.get(identifier, None)
+    return KEYWORDS.get(identifier, None)
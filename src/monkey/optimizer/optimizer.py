@@ -0,0 +1,87 @@
+"""Pass manager running optimization passes between parsing and evaluation.
+
+    program = Parser(Lexer(src)).parse()
+    program = optimize(program, level=2)
+
+the passes run before the resolver, optimize leaves the program
+unresolved so the evaluators annotate the optimized tree. Function
+bodies which aren't parsed yet (see Parser lazy mode) keep the level,
+parse_body optimizes them with optimize_body.
+"""
+
+from typing import Dict, Iterable, List, Tuple, Type
+
+from monkey.ast import ast
+from monkey.optimizer import passes
+from monkey.optimizer.passes import Pass
+
+# passes of each optimization level, in the order they run
+LEVELS: Dict[int, Tuple[Type[Pass], ...]] = {
+    0: (),
+    1: (
+        passes.ConstantFolding,
+        passes.BranchPruning,
+        passes.DeadCodeElimination,
+    ),
+    2: (
+        passes.ConstantFolding,
+        passes.BranchPruning,
+        passes.DeadCodeElimination,
+        passes.UnusedLetElimination,
+    ),
+}
+
+class PassManager:
+    """run a sequence of passes over a program.
+
+    Args:
+        optimization_passes: passes to run, in order.
+    """
+
+    def __init__(self, optimization_passes: Iterable[Pass] = ()) -> None:
+        self.passes: List[Pass] = list(optimization_passes)
+
+    def add(self, optimization_pass: Pass) -> "PassManager":
+        self.passes.append(optimization_pass)
+        return self
+
+    def run(self, program: ast.Program) -> ast.Program:
+        for optimization_pass in self.passes:
+            program = optimization_pass.run(program)
+        if self.passes:
+            # slots assigned before the rewrite may be stale
+            program.resolved = False
+        return program
+
+def pass_manager(level: int) -> PassManager:
+    """return PassManager with the passes of given optimization level."""
+    if level not in LEVELS:
+        raise ValueError(f"unknown optimization level {level}")
+    return PassManager(pass_class() for pass_class in LEVELS[level])
+
+def optimize(program: ast.Program, level: int = 1) -> ast.Program:
+    """optimize program with the passes of given level, see LEVELS."""
+    program = pass_manager(level).run(program)
+    if level:
+        defer_bodies(program, level)
+    return program
+
+def defer_bodies(node: ast.Node, level: int) -> None:
+    """set the optimization level of the bodies in node not parsed yet."""
+    for child in ast.iter_child_nodes(node):
+        if isinstance(child, ast.BlockStatement) and child.tokens is not None:
+            child.opt_level = level
+        else:
+            defer_bodies(child, level)
+
+def optimize_body(body: ast.BlockStatement, level: int) -> None:
+    """optimize a function body parsed lazily, in place.
+
+    the passes run on a program made of a function with the body, so
+    lets of the body are in a function scope like in the whole program.
+    """
+    function = ast.FunctionLiteral([], body)
+    program = ast.Program()
+    program.statements.append(ast.ExpressionStatement(function))
+    optimize(program, level)
+    body.statements = function.body.statements
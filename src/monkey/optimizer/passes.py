@@ -0,0 +1,235 @@
+"""Optimization passes over Monkey syntax trees.
+
+Every pass preserves the result of the program for all engines, code
+which could fail at run time (type errors, division by zero, unknown
+names) is left untouched so the error is still raised when it runs.
+"""
+
+from typing import List, Optional, Set
+
+from monkey.ast import ast
+from monkey.evaluator import mobjects
+from monkey.evaluator import evaluator
+from monkey.lexer.token_types import TOKEN_TYPES
+
+class Pass:
+    """base class of optimization passes.
+
+    run takes a program and returns the optimized program, passes are
+    allowed to modify the given tree in place.
+    """
+    name: str = "pass"
+
+    def run(self, program: ast.Program) -> ast.Program:
+        raise NotImplementedError
+
+class Transformer(Pass):
+    """pass rewriting the tree bottom up.
+
+    the children of a node are transformed first, then the
+    visit_<node_type> method (if the pass defines one) returns the
+    replacement of the node.
+    """
+
+    def run(self, program: ast.Program) -> ast.Program:
+        return self.visit(program)
+
+    def visit(self, node: ast.Node) -> ast.Node:
+        for field in node.fields:
+            value = getattr(node, field)
+            if isinstance(value, ast.Node):
+                setattr(node, field, self.visit(value))
+            elif isinstance(value, list):
+                setattr(node, field, [self.visit(item) for item in value])
+            elif isinstance(value, dict):
+                setattr(node, field, {
+                    self.visit(key): self.visit(item) for key, item in value.items()
+                })
+        visitor = getattr(self, "visit_" + node.node_type, None)
+        if visitor is None:
+            return node
+        return visitor(node)
+
+LITERALS = (ast.IntegerLiteral, ast.StringLiteral, ast.Boolean)
+
+def literal_value(node: ast.Node) -> Optional[mobjects.Object]:
+    """runtime object of a literal node, None for any other node."""
+    if isinstance(node, ast.IntegerLiteral):
+        return mobjects.construct_integer(node.value)
+    if isinstance(node, ast.StringLiteral):
+        return mobjects.String(node.value)
+    if isinstance(node, ast.Boolean):
+        return evaluator.construct_boolean(node.value)
+    return None
+
+def literal_node(value: mobjects.Object) -> Optional[ast.Expression]:
+    """literal node evaluating to value, None if there is no such literal."""
+    if value.tag == mobjects.INTEGER_OBJ:
+        return ast.IntegerLiteral(value.value)
+    if value.tag == mobjects.STRING_OBJ:
+        return ast.StringLiteral(value.value)
+    if value.tag == mobjects.BOOLEAN_OBJ:
+        return ast.Boolean(value.value)
+    return None
+
+def is_pure(node: ast.Expression) -> bool:
+    """whether evaluating node can neither fail nor have side effects."""
+    if isinstance(node, (ast.FunctionLiteral,) + LITERALS):
+        return True
+    if isinstance(node, ast.ArrayLiteral):
+        return all(is_pure(element) for element in node.elements)
+    return False
+
+class ConstantFolding(Transformer):
+    """replace infix and prefix expressions on literals by their value.
+
+        let width = 80 * 2 + 1;  ->  let width = 161;
+    """
+    name = "constant-folding"
+
+    def visit_PrefixExpression(self, node: ast.PrefixExpression) -> ast.Expression:
+        right = literal_value(node.right)
+        if right is None:
+            return node
+        folded = literal_node(evaluator.m_eval_prefix_expression(node.operator, right))
+        return node if folded is None else folded
+
+    def visit_InfixExpression(self, node: ast.InfixExpression) -> ast.Expression:
+        left = literal_value(node.left)
+        right = literal_value(node.right)
+        if left is None or right is None:
+            return node
+        try:
+            result = evaluator.m_eval_infix_expression(left, node.operator, right)
+        except ZeroDivisionError:
+            return node
+        folded = literal_node(result)
+        return node if folded is None else folded
+
+def constant_condition(node: ast.IfExpression) -> Optional[bool]:
+    """truth value of a literal if condition, None if it isn't constant."""
+    value = literal_value(node.condition)
+    if value is None:
+        return None
+    return evaluator.m_is_true(value)
+
+class BranchPruning(Transformer):
+    """remove the branch of an if expression which is never taken.
+
+    if statements are replaced by the statements of the taken branch,
+    blocks don't create a scope so lets keep binding in the same place.
+    if expressions used for their value are replaced by the value of the
+    taken branch when it is a single expression.
+    """
+    name = "branch-pruning"
+
+    def visit_Program(self, node: ast.Program) -> ast.Program:
+        node.statements = self.prune_statements(node.statements)
+        return node
+
+    def visit_BlockStatement(self, node: ast.BlockStatement) -> ast.BlockStatement:
+        node.statements = self.prune_statements(node.statements)
+        return node
+
+    def visit_IfExpression(self, node: ast.IfExpression) -> ast.Expression:
+        condition = constant_condition(node)
+        if condition is None:
+            return node
+        taken = node.consequence if condition else node.alternative
+        if taken is not None and len(taken.statements) == 1:
+            stmt = taken.statements[0]
+            if isinstance(stmt, ast.ExpressionStatement):
+                return stmt.expression
+        return node
+
+    def prune_statements(self, statements: List[ast.Statement]) -> List[ast.Statement]:
+        result = []
+        last = len(statements) - 1
+        for index, stmt in enumerate(statements):
+            if (isinstance(stmt, ast.ExpressionStatement)
+                    and isinstance(stmt.expression, ast.IfExpression)):
+                expression = stmt.expression
+                condition = constant_condition(expression)
+                if condition is not None:
+                    taken = expression.consequence if condition else expression.alternative
+                    if taken is not None and len(taken.statements) > 0:
+                        result.extend(taken.statements)
+                        continue
+                    if index != last:
+                        # value of the if (null) isn't used
+                        continue
+            result.append(stmt)
+        return result
+
+class DeadCodeElimination(Transformer):
+    """drop statements following a return statement in the same block."""
+    name = "dead-code-elimination"
+
+    def visit_Program(self, node: ast.Program) -> ast.Program:
+        node.statements = self.live_statements(node.statements)
+        return node
+
+    def visit_BlockStatement(self, node: ast.BlockStatement) -> ast.BlockStatement:
+        node.statements = self.live_statements(node.statements)
+        return node
+
+    def live_statements(self, statements: List[ast.Statement]) -> List[ast.Statement]:
+        for index, stmt in enumerate(statements):
+            if isinstance(stmt, ast.ReturnStatement):
+                return statements[:index + 1]
+        return statements
+
+def read_names(node: ast.Node, names: Set[str]) -> Set[str]:
+    """add names of all identifiers read inside node to names.
+
+    nested functions are included, let targets and parameters aren't reads.
+    all identifiers of function bodies which aren't parsed yet count.
+    """
+    if isinstance(node, ast.BlockStatement) and node.tokens is not None:
+        # function body not parsed yet, every identifier may be a read
+        names.update(token.value for token in node.tokens
+                     if token.type == TOKEN_TYPES.IDENTIFIER)
+    for child in ast.iter_child_nodes(node):
+        if isinstance(child, ast.Identifier):
+            names.add(child.name)
+        elif isinstance(child, ast.LetStatement):
+            read_names(child.expression, names)
+        elif isinstance(child, ast.FunctionLiteral):
+            read_names(child.body, names)
+        else:
+            read_names(child, names)
+    return names
+
+class UnusedLetElimination(Pass):
+    """remove let statements of function scopes whose name is never read.
+
+    only lets binding a pure expression are removed, and never the last
+    statement of a block as it is the value of the block. global lets
+    are kept, they can be read by later programs in the same environment.
+    """
+    name = "unused-let-elimination"
+
+    def run(self, program: ast.Program) -> ast.Program:
+        self.visit(program)
+        return program
+
+    def visit(self, node: ast.Node) -> None:
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.FunctionLiteral):
+                self.remove_lets(child.body, read_names(child.body, set()))
+            self.visit(child)
+
+    def remove_lets(self, node: ast.Node, used: Set[str]) -> None:
+        """remove unused lets in blocks of node, skipping nested functions."""
+        if isinstance(node, ast.BlockStatement):
+            last = len(node.statements) - 1
+            node.statements = [
+                stmt for index, stmt in enumerate(node.statements)
+                if index == last
+                or not isinstance(stmt, ast.LetStatement)
+                or stmt.identifier.name in used
+                or not is_pure(stmt.expression)
+            ]
+        for child in ast.iter_child_nodes(node):
+            if not isinstance(child, ast.FunctionLiteral):
+                self.remove_lets(child, used)
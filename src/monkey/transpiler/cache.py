@@ -0,0 +1,78 @@
+"""On disk cache of code objects generated by the transpiler.
+
+Code objects are stored with marshal in files named after a hash of the
+Monkey source, the options used to translate it, the transpiler version
+and the python version (marshal data is specific to a python version).
+Running an unchanged script again then skips lexing, parsing and
+translating it.
+
+The cache lives in $MONKEY_CACHE_DIR, or monkey/ in $XDG_CACHE_HOME
+(~/.cache by default).
+"""
+
+from types import CodeType
+from typing import Optional
+import hashlib
+import importlib.util
+import marshal
+import os
+import tempfile
+
+# change when the generated code changes
+TRANSPILER_VERSION = 1
+
+def default_directory() -> str:
+    directory = os.environ.get("MONKEY_CACHE_DIR")
+    if directory:
+        return directory
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "monkey")
+
+class CodeCache:
+    """code objects stored in a directory.
+
+    Args:
+        directory: where to store the code, see default_directory.
+    """
+
+    def __init__(self, directory: Optional[str] = None) -> None:
+        self.directory = directory or default_directory()
+
+    def key(self, source: str, *options) -> str:
+        """key of the code translated from source with given options."""
+        digest = hashlib.sha256()
+        digest.update(importlib.util.MAGIC_NUMBER)
+        digest.update(repr((TRANSPILER_VERSION, options)).encode())
+        digest.update(source.encode())
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".code")
+
+    def load(self, key: str) -> Optional[CodeType]:
+        """return cached code, None if there is none or it can't be read."""
+        try:
+            with open(self.path(key), "rb") as f:
+                code = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if not isinstance(code, CodeType):
+            return None
+        return code
+
+    def store(self, key: str, code: CodeType) -> None:
+        """cache code, failures to write the cache are ignored."""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # write to a temporary file first, concurrent runs never
+            # read a partially written file
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    marshal.dump(code, f)
+                os.replace(tmp_path, self.path(key))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError:
+            pass
@@ -0,0 +1,184 @@
+"""Run time support of python code generated by the transpiler.
+
+Generated code works on python values where they behave like the Monkey
+ones: integers are ints, booleans are bools, strings are strs, null is
+None and Monkey functions are python functions. Arrays and builtins stay
+mobjects. Values are converted (boxed/unboxed) only at the boundaries,
+calls to builtins, array elements and the result of the program.
+"""
+
+from types import FunctionType
+from typing import Any, Callable, Dict, List, Optional
+import re
+import weakref
+
+from monkey.evaluator import mobjects
+from monkey.evaluator import evaluator
+from monkey.evaluator.builtins import builtins
+from monkey.evaluator.environment import Environment
+
+ErrorSignal = evaluator.ErrorSignal
+TailCall = mobjects.TailCall
+Array = mobjects.Array
+Builtin = mobjects.Builtin
+
+# initial value of let bound variables, reads of unset variables fall
+# back to enclosing scopes like Frame does
+UNSET = object()
+
+# prefix of Monkey global names in the generated module
+GLOBAL_PREFIX = "m_"
+
+class ProgramReturn(Exception):
+    """raised by a return statement outside of functions."""
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+def box(value: Any) -> mobjects.Object:
+    """Monkey object of a value of generated code."""
+    value_type = type(value)
+    if value_type is int:
+        return mobjects.construct_integer(value)
+    if value_type is bool:
+        return evaluator.TRUE if value else evaluator.FALSE
+    if value_type is str:
+        return mobjects.String(value)
+    if value is None:
+        return evaluator.NULL
+    if value_type is FunctionType:
+        return mobjects.Function(code=value)
+    return value
+
+def unbox(value: mobjects.Object) -> Any:
+    """value of generated code for a Monkey object."""
+    tag = value.tag
+    if tag == mobjects.INTEGER_OBJ or tag == mobjects.BOOLEAN_OBJ or tag == mobjects.STRING_OBJ:
+        return value.value
+    if tag == mobjects.NULL_OBJ:
+        return None
+    if type(value) is mobjects.Function and type(value.code) is FunctionType:
+        return value.code
+    return value
+
+def check(value: mobjects.Object) -> Any:
+    return unbox(evaluator.m_check(value))
+
+def truthy(value: Any) -> bool:
+    if value is None or value is False:
+        return False
+    if type(value) is int:
+        return value != 0
+    return True
+
+def infix(left: Any, operator: str, right: Any) -> Any:
+    """generic infix operator, generated code inlines the integer cases."""
+    return check(evaluator.m_eval_infix_expression(box(left), operator, box(right)))
+
+def prefix(operator: str, right: Any) -> Any:
+    return check(evaluator.m_eval_prefix_expression(operator, box(right)))
+
+def index(left: Any, index: Any) -> Any:
+    if type(left) is Array and type(index) is int and 0 <= index < left.length():
+        if left.packed is not None:
+            return left.packed[index]
+        return unbox(left.get(index))
+    return check(evaluator.m_eval_index_expression(box(left), box(index)))
+
+def slice_value(left: Any, start: Any, end: Any) -> Any:
+    return check(evaluator.m_eval_slice_expression(box(left), box(start), box(end)))
+
+def array(elements: List[Any]) -> mobjects.Array:
+    return Array([box(element) for element in elements])
+
+def call_once(function: Any, args: List[Any]) -> Any:
+    """call function, a call in tail position comes back as TailCall."""
+    if type(function) is FunctionType:
+        n_parameters = function.__code__.co_argcount
+        if n_parameters != len(args):
+            msg = f"function expected {n_parameters} arguments but"
+            msg += f" {len(args)} were given"
+            raise ErrorSignal(evaluator.m_error(msg))
+        return function(*args)
+    if type(function) is Builtin:
+        return check(function.function(*[box(arg) for arg in args]))
+    raise ErrorSignal(evaluator.m_error(f"{box(function).type()} is not callable"))
+
+def adapt(function: Any) -> Callable[..., Any]:
+    """python callable calling function with call_once.
+
+    used for builtins, and for values which fail when called after the
+    arguments are evaluated.
+    """
+    return lambda *args: call_once(function, list(args))
+
+def trampoline(result: Any) -> Any:
+    """perform returned tail calls until a value is returned."""
+    while type(result) is TailCall:
+        result = call_once(result.function, result.args)
+    return result
+
+def hash_pairs(items: List[Any]) -> mobjects.Hash:
+    return check(evaluator.m_eval_hash_pairs([box(item) for item in items]))
+
+RUNTIME = {
+    "_UNSET": UNSET,
+    "_TailCall": TailCall,
+    "_Return": ProgramReturn,
+    "_function": FunctionType,
+    "_truthy": truthy,
+    "_infix": infix,
+    "_prefix": prefix,
+    "_index": index,
+    "_slice": slice_value,
+    "_array": array,
+    "_hash": hash_pairs,
+    "_adapt": adapt,
+    "_trampoline": trampoline,
+}
+
+# module namespace of the generated code for every global environment,
+# programs run in the same environment share their global names
+_namespaces: "weakref.WeakKeyDictionary[Environment, Dict[str, Any]]"
+_namespaces = weakref.WeakKeyDictionary()
+
+def namespace(env: Environment) -> Dict[str, Any]:
+    names = _namespaces.get(env)
+    if names is None:
+        names = dict(RUNTIME)
+        for name, builtin in builtins.items():
+            names[GLOBAL_PREFIX + name] = builtin
+        for name, value in env.store.items():
+            names[GLOBAL_PREFIX + name] = unbox(value)
+        _namespaces[env] = names
+    return names
+
+def undefined_name(error: NameError) -> Optional[str]:
+    """name which isn't defined, NameError has no name before python 3.10."""
+    name = getattr(error, "name", None)
+    if name is None:
+        match = re.match(r"name '(\w+)' is not defined", str(error))
+        if match:
+            name = match.group(1)
+    return name
+
+def run_code(code, env: Environment) -> mobjects.Object:
+    """execute code generated by the transpiler in env.
+
+    Returns:
+        value of the program, errors are returned like m_eval does.
+    """
+    names = namespace(env)
+    try:
+        try:
+            exec(code, names)
+        except ProgramReturn as signal:
+            return box(signal.value)
+    except ErrorSignal as signal:
+        return signal.error
+    except NameError as error:
+        name = undefined_name(error)
+        if name is None or not name.startswith(GLOBAL_PREFIX):
+            # not a Monkey name, a bug of the generated code
+            raise
+        return evaluator.m_error(f"name '{name[len(GLOBAL_PREFIX):]}' is not defined")
+    return box(names.pop("_result", None))
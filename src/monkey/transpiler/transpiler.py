@@ -0,0 +1,347 @@
+"""Transpiler translating Monkey syntax trees to python source.
+
+The program becomes the body of a python module and Monkey functions
+become nested python functions, so python executes the control flow and
+the integer arithmetic directly. See runtime for the values used by the
+generated code.
+
+    Monkey                          python
+    let x = 1;  (global)            m_x = 1
+    let x = 1;  (function level n)  l<n>_x = 1
+    if (c) { a } else { b }         if c: ... else: ...
+    fn(a) { ... }                   def _fn0(l0_a): ...
+    return f(x);                    return _TailCall(f, [x])
+
+If and while expressions are statements in python, when used as a value
+they are executed first storing their value in a temporary variable.
+Operands evaluated before such an expression are stored in temporaries
+too, so the evaluation order of Monkey is kept.
+"""
+
+from typing import List, Optional
+
+from monkey.ast import ast
+from monkey.ast.resolver import resolve
+from monkey.evaluator import mobjects
+from monkey.evaluator.environment import Environment
+from monkey.transpiler import runtime
+from monkey.transpiler.runtime import GLOBAL_PREFIX
+
+# target of a block whose value is returned from the function
+RETURN = "return"
+
+# name of the variable holding the value of the program
+RESULT = "_result"
+
+INTEGER_OPERATORS = {
+    "+": "+",
+    "-": "-",
+    "*": "*",
+    "/": "//",
+    "<": "<",
+    ">": ">",
+}
+
+# expressions always evaluating to python bools
+BOOLEAN_OPERATORS = {"<", ">", "==", "!="}
+
+class Transpiler:
+    """translate ast.Program to python source code."""
+
+    def __init__(self) -> None:
+        self.lines: List[str] = []
+        self.indent = 0
+        self.n_temps = 0
+        self.n_functions = 0
+        # enclosing function literals, innermost last
+        self.functions: List[ast.FunctionLiteral] = []
+
+    def transpile(self, program: ast.Program) -> str:
+        """return python source of the module executing program."""
+        if not program.resolved:
+            resolve(program)
+        self.c_block(program.statements, RESULT)
+        return "\n".join(self.lines) + "\n"
+
+    def emit(self, line: str) -> None:
+        self.lines.append("    " * self.indent + line)
+
+    def temp(self) -> str:
+        self.n_temps += 1
+        return f"_t{self.n_temps}"
+
+    def finish(self, target: Optional[str], value: str) -> None:
+        """store value of the last statement of a block in target."""
+        if target is None:
+            self.emit(value)
+        elif target == RETURN:
+            self.emit(f"return {value}")
+        else:
+            self.emit(f"{target} = {value}")
+
+    # statements
+
+    def c_block(self, statements: List[ast.Statement], target: Optional[str]) -> None:
+        """compile statements, value of the last one is stored in target."""
+        start = len(self.lines)
+        if len(statements) == 0:
+            if target is not None:
+                self.finish(target, "None")
+        else:
+            for stmt in statements[:-1]:
+                self.c_statement(stmt, None)
+            self.c_statement(statements[-1], target)
+        if len(self.lines) == start:
+            self.emit("pass")
+
+    def c_statement(self, stmt: ast.Statement, target: Optional[str]) -> None:
+        if isinstance(stmt, ast.LetStatement):
+            value = self.c_expression(stmt.expression)
+            self.emit(f"{self.variable(stmt.identifier)} = {value}")
+            if target is not None:
+                self.finish(target, "None")
+        elif isinstance(stmt, ast.ReturnStatement):
+            self.c_return_statement(stmt)
+        elif isinstance(stmt, ast.ExpressionStatement):
+            expression = stmt.expression
+            if isinstance(expression, ast.IfExpression):
+                self.c_if_expression(expression, target)
+            elif isinstance(expression, ast.WhileExpression):
+                self.c_while_expression(expression, target)
+            else:
+                self.finish(target, self.c_expression(expression))
+        elif isinstance(stmt, ast.BlockStatement):
+            self.c_block(stmt.statements, target)
+        else:
+            raise TypeError(f"can't transpile statement {stmt.node_type}")
+
+    def c_return_statement(self, stmt: ast.ReturnStatement) -> None:
+        expression = stmt.expression
+        if not self.functions:
+            self.emit(f"raise _Return({self.c_expression(expression)})")
+        elif isinstance(expression, ast.CallExpression):
+            function, *args = self.c_operands([expression.function] + expression.arguments)
+            self.emit(f"return _TailCall({function}, [{', '.join(args)}])")
+        else:
+            self.emit(f"return {self.c_expression(expression)}")
+
+    def c_if_expression(self, node: ast.IfExpression, target: Optional[str]) -> None:
+        self.emit(f"if {self.c_condition(node.condition)}:")
+        self.indent += 1
+        self.c_block(node.consequence.statements, target)
+        self.indent -= 1
+        if node.alternative is not None:
+            self.emit("else:")
+            self.indent += 1
+            self.c_block(node.alternative.statements, target)
+            self.indent -= 1
+        elif target is not None:
+            self.emit("else:")
+            self.indent += 1
+            self.finish(target, "None")
+            self.indent -= 1
+
+    def c_while_expression(self, node: ast.WhileExpression, target: Optional[str]) -> None:
+        """compile while loop, the condition is computed in the loop
+        if it needs statements of its own.
+        """
+        value = target
+        if target == RETURN:
+            value = self.temp()
+        if value is not None:
+            self.emit(f"{value} = None")
+        loop = len(self.lines)
+        self.emit("while True:")
+        self.indent += 1
+        condition = self.c_condition(node.condition)
+        if len(self.lines) == loop + 1:
+            self.lines[loop] = "    " * (self.indent - 1) + f"while {condition}:"
+        else:
+            self.emit(f"if not {condition}:")
+            self.emit("    break")
+        self.c_block(node.body.statements, value)
+        self.indent -= 1
+        if target == RETURN:
+            self.emit(f"return {value}")
+
+    # expressions
+
+    def c_condition(self, node: ast.Expression) -> str:
+        """python expression of the truth value of node."""
+        condition = self.c_expression(node)
+        if self.is_boolean(node):
+            return condition
+        value = self.temp()
+        return f"(({value} := {condition}) is True or ({value} is not False and _truthy({value})))"
+
+    def is_boolean(self, node: ast.Expression) -> bool:
+        if isinstance(node, ast.Boolean):
+            return True
+        if isinstance(node, ast.InfixExpression):
+            return node.operator in BOOLEAN_OPERATORS
+        if isinstance(node, ast.PrefixExpression):
+            return node.operator == "!"
+        return False
+
+    def c_operands(self, nodes: List[ast.Expression]) -> List[str]:
+        """compile operands evaluated from left to right.
+
+        if an operand needs statements, operands before it are stored in
+        temporaries ahead of those statements.
+        """
+        operands = []
+        positions = []
+        for node in nodes:
+            operands.append(self.c_expression(node))
+            positions.append(len(self.lines))
+        for index in range(len(operands) - 2, -1, -1):
+            if len(self.lines) > positions[index] and not self.is_constant(nodes[index]):
+                value = self.temp()
+                self.lines.insert(positions[index], "    " * self.indent + f"{value} = {operands[index]}")
+                operands[index] = value
+        return operands
+
+    def is_constant(self, node: ast.Expression) -> bool:
+        return isinstance(node, (ast.IntegerLiteral, ast.StringLiteral, ast.Boolean))
+
+    def c_expression(self, node: ast.Expression) -> str:
+        if isinstance(node, ast.InfixExpression):
+            return self.c_infix_expression(node)
+        elif isinstance(node, ast.Identifier):
+            return self.c_identifier(node)
+        elif isinstance(node, ast.IntegerLiteral):
+            return f"({node.value!r})" if node.value < 0 else repr(node.value)
+        elif isinstance(node, ast.CallExpression):
+            return self.c_call_expression(node)
+        elif isinstance(node, ast.IfExpression):
+            value = self.temp()
+            self.c_if_expression(node, value)
+            return value
+        elif isinstance(node, ast.WhileExpression):
+            value = self.temp()
+            self.c_while_expression(node, value)
+            return value
+        elif isinstance(node, ast.PrefixExpression):
+            return self.c_prefix_expression(node)
+        elif isinstance(node, ast.Boolean):
+            return "True" if node.value else "False"
+        elif isinstance(node, ast.StringLiteral):
+            return repr(node.value)
+        elif isinstance(node, ast.IndexExpression):
+            left, index = self.c_operands([node.left, node.index])
+            return f"_index({left}, {index})"
+        elif isinstance(node, ast.SliceExpression):
+            bounds = [bound for bound in (node.start, node.end) if bound is not None]
+            operands = iter(self.c_operands([node.left] + bounds))
+            left = next(operands)
+            start = next(operands) if node.start is not None else "None"
+            end = next(operands) if node.end is not None else "None"
+            return f"_slice({left}, {start}, {end})"
+        elif isinstance(node, ast.ArrayLiteral):
+            elements = self.c_operands(node.elements)
+            return f"_array([{', '.join(elements)}])"
+        elif isinstance(node, ast.HashLiteral):
+            items = self.c_operands([item for pair in node.pairs.items() for item in pair])
+            return f"_hash([{', '.join(items)}])"
+        elif isinstance(node, ast.FunctionLiteral):
+            return self.c_function_literal(node)
+        raise TypeError(f"can't transpile expression {node.node_type}")
+
+    def c_infix_expression(self, node: ast.InfixExpression) -> str:
+        left, right = self.c_operands([node.left, node.right])
+        operator = node.operator
+        a, b = self.temp(), self.temp()
+        if operator == "==" or operator == "!=":
+            # values of different types are never equal, 1 != true
+            equal = f"(type({a} := {left}) is type({b} := {right}) and {a} == {b})"
+            return equal if operator == "==" else f"(not {equal})"
+        py_operator = INTEGER_OPERATORS.get(operator)
+        if py_operator is None:
+            return f"_infix({left}, {operator!r}, {right})"
+        return (f"({a} {py_operator} {b} if (type({a} := {left}) is int) & (type({b} := {right}) is int)"
+                f" else _infix({a}, {operator!r}, {b}))")
+
+    def c_prefix_expression(self, node: ast.PrefixExpression) -> str:
+        right = self.c_expression(node.right)
+        if node.operator == "!":
+            if self.is_boolean(node.right):
+                return f"(not {right})"
+            return f"(not _truthy({right}))"
+        if node.operator == "-":
+            a = self.temp()
+            return f"(-{a} if type({a} := {right}) is int else _prefix('-', {a}))"
+        return f"_prefix({node.operator!r}, {right})"
+
+    def c_call_expression(self, node: ast.CallExpression) -> str:
+        """call python functions of matching arity directly, anything
+        else through runtime.adapt.
+        """
+        function, *args = self.c_operands([node.function] + node.arguments)
+        f, result = self.temp(), self.temp()
+        callee = (f"({f} if type({f} := {function}) is _function"
+                  f" and {f}.__code__.co_argcount == {len(args)} else _adapt({f}))")
+        return (f"({result} if type({result} := {callee}({', '.join(args)})) is not _TailCall"
+                f" else _trampoline({result}))")
+
+    def c_function_literal(self, node: ast.FunctionLiteral) -> str:
+        name = f"_fn{self.n_functions}"
+        self.n_functions += 1
+        level = len(self.functions)
+        # a name repeated in the parameters is bound to the last one,
+        # the others are only placeholders named by their position
+        parameters = [f"l{level}_{parameter.name}" if node.scope.names[parameter.name] == slot
+                      else f"_p{level}_{slot}"
+                      for slot, parameter in enumerate(node.parameters)]
+        self.emit(f"def {name}({', '.join(parameters)}):")
+        self.indent += 1
+        self.functions.append(node)
+        for let_name, slot in node.scope.names.items():
+            if slot >= len(node.parameters):
+                self.emit(f"l{level}_{let_name} = _UNSET")
+        self.c_block(node.body.statements, RETURN)
+        self.functions.pop()
+        self.indent -= 1
+        return name
+
+    # names
+
+    def variable(self, node: ast.Identifier) -> str:
+        """python variable of a resolved identifier."""
+        if node.depth is None:
+            return GLOBAL_PREFIX + node.name
+        return f"l{len(self.functions) - 1 - node.depth}_{node.name}"
+
+    def c_identifier(self, node: ast.Identifier) -> str:
+        if node.depth is None:
+            return GLOBAL_PREFIX + node.name
+        return self.read_local(node.name, len(self.functions) - 1 - node.depth)
+
+    def read_local(self, name: str, level: int) -> str:
+        """read name bound in function of given level.
+
+        let bound variables can still be unset, the look up then
+        continues in the enclosing functions and globals.
+        """
+        function = self.functions[level]
+        variable = f"l{level}_{name}"
+        if function.scope.names[name] < len(function.parameters):
+            return variable
+        fallback = GLOBAL_PREFIX + name
+        for outer in range(level - 1, -1, -1):
+            if name in self.functions[outer].scope.names:
+                fallback = self.read_local(name, outer)
+                break
+        value = self.temp()
+        return f"({value} if ({value} := {variable}) is not _UNSET else {fallback})"
+
+def transpile(program: ast.Program) -> str:
+    """return python source of program, see Transpiler."""
+    return Transpiler().transpile(program)
+
+def compile_program(program: ast.Program, filename: str = "<monkey>"):
+    """translate program to a python code object, see runtime.run_code."""
+    return compile(transpile(program), filename, "exec")
+
+def run_program(program: ast.Program, env: Environment) -> mobjects.Object:
+    """translate program to python and execute it in given environment."""
+    return runtime.run_code(compile_program(program), env)
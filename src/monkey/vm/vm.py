@@ -0,0 +1,279 @@
+"""Stack based virtual machine executing Monkey bytecode"""
+
+from typing import List
+
+from monkey.ast import ast
+from monkey.compiler import code
+from monkey.compiler.code import Bytecode
+from monkey.compiler.compiler import Compiler
+from monkey.evaluator import mobjects
+from monkey.evaluator import evaluator
+from monkey.evaluator.builtins import builtins
+from monkey.evaluator.environment import Environment
+
+TRUE = evaluator.TRUE
+FALSE = evaluator.FALSE
+NULL = evaluator.NULL
+
+Integer = mobjects.Integer
+construct_integer = mobjects.construct_integer
+Error = mobjects.Error
+Closure = mobjects.Closure
+Builtin = mobjects.Builtin
+
+OP_CONSTANT = code.OP_CONSTANT
+OP_POP = code.OP_POP
+OP_TRUE = code.OP_TRUE
+OP_FALSE = code.OP_FALSE
+OP_NULL = code.OP_NULL
+OP_ADD = code.OP_ADD
+OP_SUB = code.OP_SUB
+OP_MUL = code.OP_MUL
+OP_DIV = code.OP_DIV
+OP_EQUAL = code.OP_EQUAL
+OP_NOT_EQUAL = code.OP_NOT_EQUAL
+OP_LESS_THAN = code.OP_LESS_THAN
+OP_GREATER_THAN = code.OP_GREATER_THAN
+OP_MINUS = code.OP_MINUS
+OP_NOT = code.OP_NOT
+OP_JUMP = code.OP_JUMP
+OP_JUMP_IF_FALSE = code.OP_JUMP_IF_FALSE
+OP_GET_NAME = code.OP_GET_NAME
+OP_SET_NAME = code.OP_SET_NAME
+OP_ARRAY = code.OP_ARRAY
+OP_INDEX = code.OP_INDEX
+OP_CALL = code.OP_CALL
+OP_RETURN_VALUE = code.OP_RETURN_VALUE
+OP_CLOSURE = code.OP_CLOSURE
+OP_TAIL_CALL = code.OP_TAIL_CALL
+OP_SLICE = code.OP_SLICE
+OP_HASH = code.OP_HASH
+
+# opcode -> operator used by the evaluator for the generic (slow) path
+INFIX_OPERATORS = {
+    OP_ADD: "+",
+    OP_SUB: "-",
+    OP_MUL: "*",
+    OP_DIV: "/",
+    OP_EQUAL: "==",
+    OP_NOT_EQUAL: "!=",
+    OP_LESS_THAN: "<",
+    OP_GREATER_THAN: ">",
+}
+
+class VM:
+    """Virtual machine for Monkey bytecode.
+
+    Monkey function calls don't use the python stack, each call pushes
+    a frame (instructions, instruction pointer, environment, stack base)
+    on to the frames list of the VM.
+    Errors stop the execution and are returned as result like m_eval does.
+    """
+
+    def __init__(self, bytecode: Bytecode, env: Environment) -> None:
+        self.instructions = bytecode.instructions
+        self.constants = bytecode.constants
+        self.env = env
+        self.stack = []
+        self.frames = []
+
+    def run(self) -> mobjects.Object:
+        """execute the bytecode and return the result of the program."""
+        constants = self.constants
+        stack = self.stack
+        push = stack.append
+        pop = stack.pop
+        frames = self.frames
+
+        instructions = self.instructions
+        env = self.env
+        store = env.store
+        base = 0
+        ip = 0
+
+        while True:
+            op = instructions[ip]
+            ip += 1
+
+            if op == OP_GET_NAME:
+                name = constants[instructions[ip]]
+                ip += 1
+                value = store.get(name)
+                if value is None:
+                    value = env.get(name)
+                    if value is None:
+                        value = builtins.get(name)
+                        if value is None:
+                            return evaluator.m_error(f"name '{name}' is not defined")
+                push(value)
+
+            elif op == OP_CONSTANT:
+                push(constants[instructions[ip]])
+                ip += 1
+
+            elif op == OP_SET_NAME:
+                store[constants[instructions[ip]]] = pop()
+                ip += 1
+
+            elif op == OP_JUMP_IF_FALSE:
+                condition = pop()
+                if condition is FALSE:
+                    ip = instructions[ip]
+                elif condition is TRUE or evaluator.m_is_true(condition):
+                    ip += 1
+                else:
+                    ip = instructions[ip]
+
+            elif op == OP_JUMP:
+                ip = instructions[ip]
+
+            elif op <= OP_GREATER_THAN and op >= OP_ADD:
+                right = pop()
+                left = stack[-1]
+                if type(left) is Integer and type(right) is Integer:
+                    left = left.value
+                    right = right.value
+                    if op == OP_ADD:
+                        stack[-1] = construct_integer(left + right)
+                    elif op == OP_SUB:
+                        stack[-1] = construct_integer(left - right)
+                    elif op == OP_LESS_THAN:
+                        stack[-1] = TRUE if left < right else FALSE
+                    elif op == OP_MUL:
+                        stack[-1] = construct_integer(left * right)
+                    elif op == OP_EQUAL:
+                        stack[-1] = TRUE if left == right else FALSE
+                    elif op == OP_GREATER_THAN:
+                        stack[-1] = TRUE if left > right else FALSE
+                    elif op == OP_NOT_EQUAL:
+                        stack[-1] = TRUE if left != right else FALSE
+                    else:
+                        stack[-1] = construct_integer(left // right)
+                else:
+                    result = evaluator.m_eval_infix_expression(
+                        left, INFIX_OPERATORS[op], right)
+                    if type(result) is Error:
+                        return result
+                    stack[-1] = result
+
+            elif op == OP_CALL or op == OP_TAIL_CALL:
+                n_args = instructions[ip]
+                ip += 1
+                function = stack[-1 - n_args]
+                if type(function) is Closure:
+                    compiled = function.function
+                    parameters = compiled.parameters
+                    if len(parameters) != n_args:
+                        msg = f"function expected {len(parameters)} arguments but"
+                        msg += f" {n_args} were given"
+                        return evaluator.m_error(msg)
+                    if op == OP_TAIL_CALL and frames:
+                        # replace the current frame
+                        args = stack[len(stack) - n_args:]
+                        del stack[base:]
+                    else:
+                        frames.append((instructions, ip, env, base))
+                        args = stack[len(stack) - n_args:]
+                        del stack[-1 - n_args:]
+                        base = len(stack)
+                    env = Environment(outer=function.env)
+                    store = env.store
+                    for name, value in zip(parameters, args):
+                        store[name] = value
+                    instructions = compiled.instructions
+                    ip = 0
+                elif type(function) is Builtin:
+                    args = stack[len(stack) - n_args:]
+                    del stack[-1 - n_args:]
+                    result = function.function(*args)
+                    if type(result) is Error:
+                        return result
+                    push(result)
+                else:
+                    return evaluator.m_error(f"{function.type()} is not callable")
+
+            elif op == OP_RETURN_VALUE:
+                value = pop()
+                if not frames:
+                    return value
+                del stack[base:]
+                push(value)
+                instructions, ip, env, base = frames.pop()
+                store = env.store
+
+            elif op == OP_POP:
+                pop()
+
+            elif op == OP_NULL:
+                push(NULL)
+
+            elif op == OP_TRUE:
+                push(TRUE)
+
+            elif op == OP_FALSE:
+                push(FALSE)
+
+            elif op == OP_MINUS:
+                right = pop()
+                if type(right) is Integer:
+                    push(construct_integer(-right.value))
+                else:
+                    return evaluator.m_eval_prefix_sub_operator(right)
+
+            elif op == OP_NOT:
+                push(evaluator.m_eval_not_operator(pop()))
+
+            elif op == OP_INDEX:
+                index = pop()
+                result = evaluator.m_eval_index_expression(pop(), index)
+                if type(result) is Error:
+                    return result
+                push(result)
+
+            elif op == OP_SLICE:
+                end = pop()
+                start = pop()
+                result = evaluator.m_eval_slice_expression(pop(), start, end)
+                if type(result) is Error:
+                    return result
+                push(result)
+
+            elif op == OP_ARRAY:
+                n_elements = instructions[ip]
+                ip += 1
+                elements = stack[len(stack) - n_elements:]
+                del stack[len(stack) - n_elements:]
+                push(mobjects.Array(elements))
+
+            elif op == OP_HASH:
+                n_items = instructions[ip]
+                ip += 1
+                items = stack[len(stack) - n_items:]
+                del stack[len(stack) - n_items:]
+                result = evaluator.m_eval_hash_pairs(items)
+                if type(result) is Error:
+                    return result
+                push(result)
+
+            elif op == OP_CLOSURE:
+                push(Closure(constants[instructions[ip]], env))
+                ip += 1
+
+            else:
+                raise RuntimeError(f"unknown opcode {op}")
+
+def call_closure(closure: mobjects.Closure, args: List[mobjects.Object]) -> mobjects.Object:
+    """call closure from python (builtins) on a VM of its own.
+
+    the number of arguments must be checked by the caller.
+    """
+    compiled = closure.function
+    env = Environment(outer=closure.env)
+    for name, value in zip(compiled.parameters, args):
+        env.store[name] = value
+    return VM(Bytecode(compiled.instructions, compiled.constants), env).run()
+
+def run_program(program: ast.Program, env: Environment) -> mobjects.Object:
+    """compile program and execute it on the VM in given environment."""
+    bytecode = Compiler().compile(program)
+    return VM(bytecode, env).run()
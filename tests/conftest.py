@@ -0,0 +1,72 @@
+"""Engines running the evaluator test suite, see test_evaluator.
+
+Tests asking for the engine fixture run once per engine, the engines
+marker restricts a test to some of them.
+"""
+
+import pytest
+
+from monkey.lexer.lexer import Lexer
+from monkey.ast.parser import Parser
+from monkey.compiler.compiler import Compiler
+from monkey.evaluator import tiering
+from monkey.evaluator.closure_compiler import compile_program
+from monkey.evaluator.environment import Environment
+from monkey.evaluator.evaluator import m_eval
+from monkey.evaluator.stack_evaluator import StackEvaluator
+from monkey.transpiler import transpiler
+from monkey.vm.vm import VM
+
+
+def parse(src, lazy=False):
+    l = Lexer(src)
+    p = Parser(l, lazy=lazy)
+    return p.parse()
+
+def run_tree(src):
+    return m_eval(parse(src), Environment())
+
+def run_lazy(src):
+    return m_eval(parse(src, lazy=True), Environment())
+
+def run_closure(src):
+    return compile_program(parse(src))(Environment())
+
+def run_stack(src):
+    return StackEvaluator(parse(src), Environment()).run()
+
+def run_python(src):
+    return transpiler.run_program(parse(src), Environment())
+
+def run_vm(src):
+    bytecode = Compiler().compile(parse(src))
+    return VM(bytecode, Environment()).run()
+
+# functions running a script and returning its value, tiering runs the
+# tree walker with every function and loop promoted right away
+ENGINES = {
+    "eval": run_tree,
+    "tiering": run_tree,
+    "lazy": run_lazy,
+    "closure": run_closure,
+    "stack": run_stack,
+    "python": run_python,
+    "vm": run_vm,
+}
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "engines(*names): engines running the test, all by default")
+
+def pytest_generate_tests(metafunc):
+    if "engine" in metafunc.fixturenames:
+        marker = metafunc.definition.get_closest_marker("engines")
+        names = marker.args if marker is not None else list(ENGINES)
+        metafunc.parametrize("engine", names, indirect=True)
+
+@pytest.fixture
+def engine(request, monkeypatch):
+    """function running a script with the engine of the test parameter."""
+    if request.param == "tiering":
+        monkeypatch.setattr(tiering, "call_threshold", 1)
+        monkeypatch.setattr(tiering, "loop_threshold", 1)
+    return ENGINES[request.param]
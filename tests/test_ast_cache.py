@@ -0,0 +1,108 @@
+import glob
+import io
+import os.path
+import sys
+
+from monkey.lexer.lexer import Lexer
+from monkey.ast import ast
+from monkey.ast.parser import Parser
+from monkey.ast import cache as cache_module
+from monkey.ast.cache import AstCache, decode, encode
+from monkey.evaluator.environment import Environment
+from monkey.evaluator.evaluator import m_eval
+
+SAMPLES = os.path.join(os.path.dirname(__file__), "..", "samples", "*.mon")
+
+def parse(src):
+    l = Lexer(src)
+    p = Parser(l)
+    return p.parse()
+
+def dump(node):
+    """attributes of the nodes of a tree set by the parser."""
+    if isinstance(node, ast.Node):
+        values = {name: dump(value) for name, value in vars(node).items()}
+        return (type(node).__name__, values)
+    if isinstance(node, list):
+        return [dump(item) for item in node]
+    if isinstance(node, dict):
+        return [(dump(key), dump(value)) for key, value in node.items()]
+    return node
+
+def test_round_trip():
+    sources = [
+        'let h = {"a": [1, 2][0:1], 3: !true}; h["a"]',
+        "let f = fn(x, y) { if (x < y) { return -x; } else { x * y } }; f(2, 3)",
+        "let i = 0; while (i < 10) { let i = i + 1; }; i",
+        "10000000000000000000000 + 1",
+    ]
+    sources += [open(path).read() for path in glob.glob(SAMPLES)]
+    for src in sources:
+        program = parse(src)
+        assert dump(decode(encode(program))) == dump(program)
+
+def test_runtime_state_is_not_stored(tmp_path):
+    cache = AstCache(str(tmp_path))
+    program = parse("let f = fn(n) { let i = 0; while (i < n) { let i = i + 1; }; i }; f(2000)")
+    assert m_eval(program, Environment()).value == 2000
+    key = cache.key(io.BytesIO(b"script"), 0)
+    cache.store(key, program)
+
+    cached = cache.load(key)
+    assert not cached.resolved
+    loop = cached.statements[0].expression.body.statements[1].expression
+    assert loop.iterations == 0 and loop.compiled is None
+    assert loop.condition.specialized is None
+    assert m_eval(cached, Environment()).value == 2000
+
+def test_cache_keys_and_errors(tmp_path, monkeypatch):
+    cache = AstCache(str(tmp_path))
+    key = cache.key(io.BytesIO(b"1 + 2"), 0)
+    assert key == cache.key(io.BytesIO(b"1 + 2"), 0)
+    assert key != cache.key(io.BytesIO(b"1 + 3"), 0)
+    assert key != cache.key(io.BytesIO(b"1 + 2"), 1)
+    monkeypatch.setattr(cache_module, "__version__", "0.0.0")
+    assert key != cache.key(io.BytesIO(b"1 + 2"), 0)
+    monkeypatch.undo()
+    assert cache.path(key).endswith(".monc")
+    assert cache.load(key) is None
+
+    for data in [b"", b"garbage", b"\xe9\x01\x00\x00\x00\x00\x00\x00"]:
+        with open(cache.path(key), "wb") as f:
+            f.write(data)
+        assert cache.load(key) is None
+
+def test_cached_scripts_are_not_parsed(tmp_path, monkeypatch, capsys):
+    from monkey import command_line
+    monkeypatch.setenv("MONKEY_CACHE_DIR", str(tmp_path / "cache"))
+    script = tmp_path / "script.mon"
+    script.write_text("let x = 40; x + 2")
+    command_line.run_script(str(script))
+    assert len(list((tmp_path / "cache").glob("*.monc"))) == 1
+
+    def fail(*args):
+        raise AssertionError("script parsed again")
+    monkeypatch.setattr(command_line, "parse_script", fail)
+    command_line.run_script(str(script), "vm")
+    assert capsys.readouterr().out == "42\n42\n"
+
+def test_deeply_nested_trees_are_not_cached(tmp_path):
+    cache = AstCache(str(tmp_path))
+    expression = ast.ArrayLiteral([])
+    for _ in range(3000):
+        expression = ast.ArrayLiteral([expression])
+    program = ast.Program()
+    program.statements.append(ast.LetStatement(ast.Identifier("x"), expression))
+    key = cache.key(io.BytesIO(b"nested"), 0)
+    # too deep for encode
+    cache.store(key, program)
+    assert cache.load(key) is None
+    # too deep for marshal
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(20000)
+    try:
+        cache.store(key, program)
+    finally:
+        sys.setrecursionlimit(limit)
+    assert cache.load(key) is None
+    assert [path.suffix for path in tmp_path.iterdir()] == []
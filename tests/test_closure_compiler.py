@@ -0,0 +1,47 @@
+"""Tests of the closure compiler, the evaluator test suite runs on it too
+(see conftest)."""
+
+from monkey.lexer.lexer import Lexer
+from monkey.ast.parser import Parser
+from monkey.evaluator import mobjects
+from monkey.evaluator.environment import Environment
+from monkey.evaluator.closure_compiler import compile_program
+
+
+def run_compiled(src):
+    l = Lexer(src)
+    p = Parser(l)
+    program_ast = p.parse()
+    return compile_program(program_ast)(Environment())
+
+def test_compiled_program_is_reusable():
+    program = Parser(Lexer("let x = x + 1; x")).parse()
+    code = compile_program(program)
+    env = Environment()
+    env.set("x", mobjects.Integer(1))
+    assert code(env).value == 2
+    assert code(env).value == 3
+
+def test_closures():
+    src = """
+    let adder = fn(x) { fn(y) { x + y } };
+    let add2 = adder(2);
+    add2(40);
+    """
+    result = run_compiled(src)
+    assert isinstance(result, mobjects.Integer)
+    assert result.value == 42
+
+def test_error_messages():
+    test_cases = [
+        ("1 + true", "unsupported operand type for +: 'INTEGER' and 'BOOLEAN'"),
+        ("-true", "unsupported operand type for -: 'BOOLEAN'"),
+        ("a;", "name 'a' is not defined"),
+        ("1(2)", "INTEGER is not callable"),
+        ("fn(a) { a }()", "function expected 1 arguments but 0 were given"),
+        ("len(1)", "object of type INTEGER has no len()"),
+    ]
+    for src, target in test_cases:
+        result = run_compiled(src)
+        assert isinstance(result, mobjects.Error)
+        assert result.msg == target
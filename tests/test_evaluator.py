@@ -14,6 +14,11 @@ def run_eval(src):
     program_ast = p.parse() 
     return m_eval(program_ast, Environment())
 
+@pytest.fixture(autouse=True)
+def run_with_engine(engine, monkeypatch):
+    """run the tests of this module with every engine, see conftest."""
+    monkeypatch.setitem(globals(), "run_eval", engine)
+
 def assert_integer(integer_obj: mobjects.Object, target):
     assert isinstance(integer_obj, mobjects.Integer)
     assert integer_obj.value == target
@@ -206,8 +211,264 @@ def test_array():
     test_cases = [
         ("let a = [1, 2]; a[1];", 2),
         ("let a = [1*3, 2+3]; a[1]", 5),
-        ("let a = [1, 2]; a[1*2 - 2 + 1];", 2)
+        ("let a = [1, 2]; a[1*2 - 2 + 1];", 2),
+        ("let a = array(3, 7); a[2] + len(a)", 10),
+        ("let a = array(2); append(a, \"x\"); len(a) + a[1]", 3),
+        ("let a = [1, 2]; append(a, 9223372036854775808); a[2] - 9223372036854775807", 1),
+        ("let a = array(2, 9223372036854775808); a[1] - 9223372036854775807", 1),
+        ("len(array(0))", 0),
     ]
     for src, target in test_cases:
         result = run_eval(src)
         assert_integer(result, target)
+
+def test_slices():
+    test_cases = [
+        ("let a = [1, 2, 3, 4]; a[-1]", 4),
+        ("let a = [1, 2, 3, 4]; a[1:3][1]", 3),
+        ("let a = [1, 2, 3, 4]; len(a[:-1]) + len(a[2:]) + len(a[:]) + len(a[9:]) + len(a[3:1])", 9),
+        ("let a = [1, 2, 3, 4]; a[-3:][0:2][-1]", 3),
+        ('len("hello"[1:])', 4),
+        ('"hello"[1] + "hello"[-1:] == "eo"', True),
+        ('"hello"[1:4][1:] == "ll"', True),
+        ("let a = [1, 2]; let b = a[0:1]; append(b, 5); append(a, 7); len(a) * 1000 + len(b) * 100 + b[1] * 10 + a[1]", 3252),
+        ('"abc"[3]', "string index(3) out of range"),
+        ("[1, 2][-3]", "array index(-3) out of range"),
+        ("[1, 2][true:]", "slice indexes must be integers, not BOOLEAN"),
+        ("1[1:]", "INTEGER is not subscriptable"),
+    ]
+    for src, target in test_cases:
+        result = run_eval(src)
+        if isinstance(target, bool):
+            assert_boolean(result, target)
+        elif isinstance(target, int):
+            assert_integer(result, target)
+        else:
+            assert isinstance(result, mobjects.Error)
+            assert result.msg == target
+
+def test_hashes():
+    test_cases = [
+        ('let h = {"a": 1, 2: 3, true: 4}; h["a"] + h[2] + h[true]', 8),
+        ('let h = {"a" + "b": 1, 1 + 1: 2}; h["ab"] + h[2]', 3),
+        ("let h = {1: 1, 1: 2}; h[1] + len(h)", 3),
+        ('len(keys({"a": 1, "b": 2})) + values({"a": 5})[0]', 7),
+        ('has({"a": 1}, "a")', True),
+        ('has({"a": 1}, 1)', False),
+        ('{}["a"] == {1: 2}[3]', True),
+        ("{1: [1, 2]} == {1: [1, 2]}", True),
+        ("{1: 2} == {1: 3}", False),
+        ('[1, [2, "a"], true] == [1, [2, "a"], true]', True),
+        ("[1, 2] == [1, 2, 3]", False),
+        ("[1] != [1]", False),
+        ("[1] == 1", False),
+        ("{[1]: 2}", "unusable as hash key: ARRAY"),
+        ("{1: 2}[fn() {}]", "unusable as hash key: FUNCTION"),
+        ("keys([])", "object of type ARRAY has no keys()"),
+    ]
+    for src, target in test_cases:
+        result = run_eval(src)
+        if isinstance(target, bool):
+            assert_boolean(result, target)
+        elif isinstance(target, int):
+            assert_integer(result, target)
+        else:
+            assert isinstance(result, mobjects.Error)
+            assert result.msg == target
+
+def test_higher_order_builtins():
+    test_cases = [
+        ("sum(map([1, 2, 3], fn(x) { x * x }))", 14),
+        ("sum(filter(range(10), fn(x) { x > 6 }))", 24),
+        ("reduce([1, 2, 3, 4], 1, fn(acc, x) { acc * x })", 24),
+        ('len(reduce(["a", "b"], "", fn(acc, x) { acc + x }))', 2),
+        ('sum(map(["ab", "c", ""], len))', 3),
+        ("let n = 5; sum(map(range(3), fn(x) { x + n }))", 18),
+        ("sum(map(range(4), fn(x) { if (x > 1) { return 10; } x }))", 21),
+        ("let f = fn(x) { x }; let g = fn(x) { return f(x); }; sum(map([1, 2], g))", 3),
+        ("sum(range(10, 0, -3)) + len(range(3, 1))", 22),
+        ("let r = range(100); r[-1] + r[10:20][2] + len(r[90:])", 121),
+        ("let r = range(3); append(r, 7); sum(r) + r[3]", 17),
+        ("range(3) == [0, 1, 2]", True),
+        ("sum([])", 0),
+        ("map([1], fn(a, b) { a })", "function expected 2 arguments but 1 were given"),
+        ("map([1, 2], fn(x) { x + true })", "unsupported operand type for +: 'INTEGER' and 'BOOLEAN'"),
+        ("filter([1], 1)", "INTEGER is not callable"),
+        ("reduce(1, 0, len)", "object of type INTEGER has no reduce()"),
+        ('sum([1, "a"])', "unsupported operand type for +: 'INTEGER' and 'STRING'"),
+        ("range(1, 2, 0)", "range step must not be zero"),
+        ('range("a")', "range arguments must be integers, not STRING"),
+        ("range(0, 10000000000000000000)", "range is too long"),
+    ]
+    for src, target in test_cases:
+        result = run_eval(src)
+        if isinstance(target, bool):
+            assert_boolean(result, target)
+        elif isinstance(target, int):
+            assert_integer(result, target)
+        else:
+            assert isinstance(result, mobjects.Error)
+            assert result.msg == target
+
+def test_ordering_builtins():
+    test_cases = [
+        ("let a = [5, 3, 9, 1]; sort(a); a == [1, 3, 5, 9]", True),
+        ("let a = [5, 3, 9, 1]; let b = a[1:]; sort(a); b == [3, 9, 1]", True),
+        ("let a = [3, 1, 2]; [sorted(a), a] == [[1, 2, 3], [3, 1, 2]]", True),
+        ('sorted(["b", "c", "a"]) == ["a", "b", "c"]', True),
+        ('sorted(["bb", "a", "ccc", "d"], len) == ["a", "d", "bb", "ccc"]', True),
+        ("sorted([[2], [1, 1], [3]], fn(x) { x[0] }) == [[1, 1], [2], [3]]", True),
+        ("sorted(range(10, 0, -3)) == [1, 4, 7, 10]", True),
+        ("bsearch([1, 3, 5, 7], 5)", 2),
+        ("bsearch([1, 3, 5, 7], 4)", -1),
+        ('bsearch(["a", "c"], 1)', -1),
+        ("bsearch(range(0, 100, 2), 42)", 21),
+        ("min([4, 2, 8]) + max([4, 2, 8]) + max(range(5))", 14),
+        ('len(max(["ab", "b", "a"]))', 1),
+        ("unique([3, 1, 3, 2, 1]) == [3, 1, 2]", True),
+        ('unique([[1], "a", [1], "a", 1, true, 1]) == [[1], "a", 1, true]', True),
+        ("let u = unique(range(9223372036854775806, 9223372036854775810)); len(u) + u[3] - u[0]", 7),
+        ('sorted([1, "a"])', "sorted needs all integers or all strings, not STRING"),
+        ("sort([true])", "sort needs all integers or all strings, not BOOLEAN"),
+        ("min([])", "min() of empty array"),
+        ("sorted(1)", "object of type INTEGER can't be sorted"),
+    ]
+    for src, target in test_cases:
+        result = run_eval(src)
+        if isinstance(target, bool):
+            assert_boolean(result, target)
+        elif isinstance(target, int):
+            assert_integer(result, target)
+        else:
+            assert isinstance(result, mobjects.Error)
+            assert result.msg == target
+
+def test_scopes():
+    test_cases = [
+        ("let x = 1; let f = fn() { let y = x; let x = 2; x + y }; f()", 3),
+        ("let x = 1; let f = fn(c) { if (c) { let x = 10; } x }; f(false) + f(true)", 11),
+        ("let f = fn(a) { fn(b) { fn(c) { a + b + c } } }; f(1)(2)(3)", 6),
+        ("let f = fn() { let g = fn(n) { if (n == 0) { return 0; } g(n - 1) + 1 }; g(5) }; f()", 5),
+        ("let len = fn(x) { 42 }; len([1])", 42),
+        ("let a = 1; let f = fn() { a }; let a = 2; f()", 2),
+    ]
+    for src, target in test_cases:
+        result = run_eval(src)
+        assert_integer(result, target)
+
+def test_duplicate_parameters():
+    test_cases = [
+        ("fn(a, a) { a }(1, 2)", 2),
+        ("fn(a, b, a) { a + b }(1, 10, 100)", 110),
+        ("fn(a, a) { let a = a * 2; a }(1, 3)", 6),
+        ("reduce([1, 2, 3], 0, fn(a, a) { a })", 3),
+    ]
+    for src, target in test_cases:
+        result = run_eval(src)
+        assert_integer(result, target)
+
+def test_inline_caches():
+    test_cases = [
+        ("let f = fn(a) { len(a) }; let x = f([1]); let len = fn(a) { 42 }; x + f([1])", 43),
+        ("let g = fn() { puts }; g(); let puts = 5; g()", 5),
+        ("let x = 1; let g = fn() { x }; let y = g(); let x = 2; y + g()", 3),
+        ("""
+        let i = 0;
+        let total = 0;
+        let arr = [1, 2, 3];
+        while (i < len(arr)) {
+            let total = total + arr[i];
+            let i = i + 1;
+        }
+        total
+        """, 6),
+    ]
+    for src, target in test_cases:
+        result = run_eval(src)
+        assert_integer(result, target)
+
+@pytest.mark.engines("eval")
+def test_environment_version():
+    env = Environment()
+    env.set("a", mobjects.Integer(1))
+    version = env.version
+    env.set("a", mobjects.Integer(2))
+    assert env.version == version
+    env.set("len", mobjects.Integer(3))
+    assert env.version != version
+
+def test_quickening():
+    test_cases = [
+        ("let f = fn(a, b) { a + b }; f(1, 2); f(\"a\", \"b\")", "ab"),
+        ("let f = fn(a, b) { a == b }; f(1, 1); f(true, true)", True),
+        ("let f = fn(a, b) { a < b }; f(1, 2); f(true, 2)", "unsupported operand type for <: 'BOOLEAN' and 'INTEGER'"),
+        ("let f = fn(a) { if (a < 3) { 1 } else { 2 } }; f(1) + f(5)", 3),
+        ("let f = fn(a) { if (a != 0) { 1 } else { 2 } }; f(1); f(true)", 1),
+        ("let f = fn(a) { if (a > 0) { 1 } else { 2 } }; f(1); f(-1)", 2),
+        ("let f = fn(a) { if (a) { 1 } else { 2 } }; f(0); f(\"\")", 1),
+    ]
+    for src, target in test_cases:
+        result = run_eval(src)
+        if isinstance(target, bool):
+            assert_boolean(result, target)
+        elif isinstance(target, int):
+            assert_integer(result, target)
+        elif result.type() == mobjects.ERROR_OBJ:
+            assert result.msg == target
+        else:
+            assert_string(result, target)
+
+@pytest.mark.engines("eval")
+def test_quickened_nodes():
+    from monkey.evaluator import evaluator
+    env = Environment()
+    program = Parser(Lexer("let f = fn(a, b) { if (a != b) { a + b } else { 0 } }; f(1, 2)")).parse()
+    assert_integer(m_eval(program, env), 3)
+    if_node = program.statements[0].expression.body.statements[0].expression
+    add_node = if_node.consequence.statements[0].expression
+    assert if_node.specialized is evaluator.INTEGER_CONDITIONS["!="]
+    assert add_node.specialized is evaluator.m_int_add
+    # the guards fail, both nodes fall back to the generic operators
+    assert_string(m_eval(Parser(Lexer('f("a", "b")')).parse(), env), "ab")
+    assert if_node.specialized is False
+    assert add_node.specialized is evaluator.GENERIC_INFIX["+"]
+    assert_integer(m_eval(Parser(Lexer("f(2, 3)")).parse(), env), 5)
+
+def test_tail_calls():
+    test_cases = [
+        ("""
+        let count = fn(n, acc) {
+            if (n == 0) {
+                return acc;
+            }
+            return count(n - 1, acc + 1);
+        };
+        count(10000, 0);
+        """, 10000),
+        ("""
+        let even = fn(n) { if (n == 0) { return true; } return odd(n - 1); };
+        let odd = fn(n) { if (n == 0) { return false; } return even(n - 1); };
+        let f = fn(n) { while (true) { return even(n); } };
+        if (f(5001)) { 0 } else { 1 }
+        """, 1),
+        ("let f = fn(a) { return len(a); }; f([1, 2, 3])", 3),
+        ("return fn(x) { x * 2 }(21);", 42),
+    ]
+    for src, target in test_cases:
+        result = run_eval(src)
+        assert_integer(result, target)
+    result = run_eval("let f = fn(x) { return f(); }; f(1)")
+    assert isinstance(result, mobjects.Error)
+
+def test_error_propagation():
+    test_cases = [
+        ("let f = fn(x) { let y = x + missing; y }; f(1); 2", "name 'missing' is not defined"),
+        ("let f = fn(x) { [1, 2][x] }; let g = fn() { f(5) }; g()", "array index(5) out of range"),
+        ("let i = 0; while (i < true) { let i = i + 1; }", "unsupported operand type for <: 'INTEGER' and 'BOOLEAN'"),
+        ("let f = fn() { return len(1); }; f()", "object of type INTEGER has no len()"),
+        ("let a = if (1 + true) { 1 }; 2", "unsupported operand type for +: 'INTEGER' and 'BOOLEAN'"),
+    ]
+    for src, target in test_cases:
+        result = run_eval(src)
+        assert isinstance(result, mobjects.Error)
+        assert result.msg == target
@@ -0,0 +1,68 @@
+from monkey.lexer.fsm import DEAD, DFA, TokenSpec
+
+DIGITS = "0123456789"
+
+INTEGER = TokenSpec("start", {"digits": "INTEGER"}, {
+    "start": [(DIGITS, "digits")],
+    "digits": [(DIGITS, "digits")],
+})
+
+KEYWORD = TokenSpec("start", {"if": "IF"}, {
+    "start": [("i", "i")],
+    "i": [("f", "if")],
+})
+
+WORD = TokenSpec("start", {"word": "WORD"}, {
+    "start": [(str.isalpha, "word")],
+    "word": [(str.isalpha, "word")],
+})
+
+ARROW = TokenSpec("start", {"minus": "MINUS", "arrow": "ARROW"}, {
+    "start": [("-", "minus"), ("=", "equal")],
+    "minus": [("-", "dash"), (">", "arrow")],
+    "dash": [("-", "dash"), (">", "arrow")],
+})
+
+def test_maximal_munch():
+    dfa = DFA([INTEGER, ARROW])
+    assert dfa.match("123+4") == ("INTEGER", 3, 3)
+    assert dfa.match("x 42", 2) == ("INTEGER", 4, 4)
+    assert dfa.match("->") == ("ARROW", 2, 2)
+    # the longest accepted prefix is the match, not where the DFA stopped
+    assert dfa.match("---x") == ("MINUS", 1, 3)
+    assert dfa.match("=") == (None, 0, 1)
+    assert dfa.match("+") == (None, 0, 0)
+    assert dfa.match("") == (None, 0, 0)
+
+def test_earlier_specs_take_priority():
+    dfa = DFA([KEYWORD, WORD])
+    assert dfa.match("if") == ("IF", 2, 2)
+    assert dfa.match("iff") == ("WORD", 3, 3)
+    assert dfa.match("i") == ("WORD", 1, 1)
+    dfa = DFA([WORD, KEYWORD])
+    assert dfa.match("if") == ("WORD", 2, 2)
+
+def test_table():
+    dfa = DFA([INTEGER, ARROW])
+    assert len(dfa.ascii_classes) == 128
+    # digits, "-", "=", ">" and everything else
+    assert len(dfa.table) == 5
+    assert all(len(row) == len(dfa.states) for row in dfa.table)
+    assert dfa.ascii_classes[ord("1")] == dfa.ascii_classes[ord("9")]
+    other = dfa.ascii_classes[ord("a")]
+    assert all(state == DEAD for state in dfa.table[other])
+
+def test_non_ascii_classes_are_added_lazily():
+    lambda_spec = TokenSpec("start", {"lambda": "LAMBDA"}, {"start": [("λ", "lambda")]})
+    dfa = DFA([lambda_spec, WORD])
+    classes = len(dfa.table)
+    assert "é" not in dfa.classes
+    # letters out of ASCII share the class of ASCII letters
+    assert dfa.match("été1") == ("WORD", 3, 3)
+    assert dfa.classes["é"] == dfa.ascii_classes[ord("e")]
+    assert len(dfa.table) == classes
+    # "λ" is in a character set of its own, its class is new
+    assert dfa.match("λ") == ("LAMBDA", 1, 1)
+    assert dfa.match("λx") == ("WORD", 2, 2)
+    assert len(dfa.table) == classes + 1
+    assert all(len(row) == len(dfa.states) for row in dfa.table)
@@ -0,0 +1,92 @@
+"""Function bodies parsed on their first call, the evaluator test suite
+runs with lazily parsed programs too (see conftest)."""
+
+import pytest
+
+from monkey.exceptions import SyntaxError
+from monkey.lexer.lexer import Lexer
+from monkey.ast import ast
+from monkey.ast.cache import decode, encode
+from monkey.ast.parser import Parser, parse_bodies
+from monkey.evaluator import mobjects
+from monkey.evaluator.environment import Environment
+from monkey.evaluator.evaluator import m_eval
+from monkey.evaluator.closure_compiler import compile_program
+from monkey.optimizer.optimizer import optimize
+
+
+def parse(src, validate=False):
+    l = Lexer(src)
+    p = Parser(l, lazy=True, validate=validate)
+    return p.parse()
+
+def test_bodies_are_parsed_on_first_call():
+    program = parse("let f = fn(x) { let y = x * 2; fn() { y } }; let g = fn() { 1 }; f(3)()")
+    f_body = program.statements[0].expression.body
+    g_body = program.statements[1].expression.body
+    assert f_body.statements == [] and f_body.tokens[0].value == "{"
+    assert m_eval(program, Environment()).value == 6
+    assert f_body.tokens is None and len(f_body.statements) == 2
+    # g was never called
+    assert g_body.tokens is not None
+    inner = f_body.statements[1].expression
+    assert inner.body.tokens is None
+
+def test_syntax_errors_in_bodies():
+    src = "let f = fn(x) { let = x; }; let g = fn() {"
+    with pytest.raises(SyntaxError) as eager:
+        Parser(Lexer(src)).parse()
+    program = parse("let f = fn(x) { let = x; }; 1")
+    assert m_eval(program, Environment()).value == 1
+    with pytest.raises(SyntaxError) as lazy:
+        m_eval(parse("let f = fn(x) { let = x; }; f(1)"), Environment())
+    assert str(lazy.value) == str(eager.value)
+    with pytest.raises(SyntaxError) as validated:
+        parse("let f = fn(x) { let = x; }; 1", validate=True)
+    assert str(validated.value) == str(eager.value)
+    with pytest.raises(SyntaxError, match="expected }"):
+        parse("let g = fn() { 1")
+    with pytest.raises(SyntaxError):
+        parse("let f = fn() { fn() { let = 1; } }", validate=True)
+
+def test_closure_engine():
+    program = parse("let adder = fn(x) { fn(y) { let z = x + y; z } }; let g = fn() { 1 }; adder(2)(3)")
+    code = compile_program(program)
+    adder_body = program.statements[0].expression.body
+    assert adder_body.tokens is not None
+    assert code(Environment()).value == 5
+    assert adder_body.tokens is None
+    # g was never called
+    assert program.statements[1].expression.body.tokens is not None
+    assert code(Environment()).value == 5
+
+def test_memoized_functions_see_nested_bodies():
+    env = Environment()
+    src = "let n = 1; let f = memo(fn(x) { let g = fn() { n }; x + g() }); f(1)"
+    assert m_eval(parse(src), env).value == 2
+    assert m_eval(parse("let n = 10; f(1)"), env).value == 11
+
+def test_cached_lazy_trees():
+    program = parse("let f = fn(x) { x + 1 }; f(1)")
+    cached = decode(encode(program))
+    assert cached.statements[0].expression.body.tokens is not None
+    assert m_eval(cached, Environment()).value == 2
+    parse_bodies(program)
+    assert program.statements[0].expression.body.tokens is None
+    assert m_eval(program, Environment()).value == 2
+
+def test_bodies_are_optimized_when_parsed():
+    program = optimize(parse("let f = fn() { let unused = 5; 1 + 2 }; f()"), 2)
+    body = program.statements[0].expression.body
+    assert body.opt_level == 2
+    assert m_eval(program, Environment()).value == 3
+    assert len(body.statements) == 1
+    assert isinstance(body.statements[0].expression, ast.IntegerLiteral)
+
+def test_lets_read_by_unparsed_functions_are_kept():
+    src = "let f = fn() { let x = 1; let g = fn() { x }; g() }; f()"
+    program = optimize(parse(src), 2)
+    assert m_eval(program, Environment()).value == 1
+    cached = decode(encode(optimize(parse(src), 2)))
+    assert cached.statements[0].expression.body.opt_level == 2
+    assert m_eval(cached, Environment()).value == 1
@@ -0,0 +1,119 @@
+import glob
+import io
+import mmap
+import os.path
+
+import pytest
+
+from monkey.exceptions import LexicalError
+from monkey.lexer.lexer import Lexer, token_dfa
+from monkey.lexer.regex_lexer import RegexLexer
+
+SAMPLES = os.path.join(os.path.dirname(__file__), "..", "samples", "*.mon")
+
+SOURCES = [
+    "",
+    "   ",
+    "\n",
+    "let five = 5;\nlet ten = 10;\n\tlet add = fn(x, y) {\n  x + y;\n};",
+    "a+b-c*d/e",
+    "a +\n b",
+    "1 +",
+    "x == y != !z = <a> [1:2]{}",
+    '"multi\nline" + x\n"unterminated',
+    '""',
+    "1_000_000 0_0 00 01 0",
+    "_private snake_case x1 true false if else return while fn let",
+    "été x٣",
+    "\r\n\tx\x0c\x1cy z",
+]
+
+ERRORS = [
+    "1_",
+    "12_3_",
+    "1__2",
+    "0_1",
+    "00_",
+    "1a",
+    "0x",
+    "a $ b",
+    "½",
+    "\n  #",
+]
+
+class TrickleStream:
+    """binary stream returning at most 3 bytes per read, like a slow pipe."""
+    def __init__(self, data):
+        self.file = io.BytesIO(data)
+
+    def read(self, size):
+        return self.file.read(min(size, 3))
+
+def dfa_lexer(src):
+    return Lexer(src, token_dfa())
+
+def tokens(lexer_class, src):
+    return [(token.type, token.value, token.line, token.column)
+            for token in lexer_class(src).tokenize()]
+
+def error(lexer_class, src):
+    with pytest.raises(LexicalError) as info:
+        lexer_class(src).tokenize()
+    return str(info.value)
+
+@pytest.mark.parametrize("lexer_class", [RegexLexer, dfa_lexer])
+def test_same_tokens(lexer_class):
+    sources = SOURCES + [open(path).read() for path in glob.glob(SAMPLES)]
+    for src in sources:
+        assert tokens(lexer_class, src) == tokens(Lexer, src)
+
+@pytest.mark.parametrize("lexer_class", [RegexLexer, dfa_lexer])
+def test_same_errors(lexer_class):
+    for src in ERRORS:
+        assert error(lexer_class, src) == error(Lexer, src)
+
+@pytest.mark.parametrize("lexer_class", [Lexer, RegexLexer, dfa_lexer])
+def test_streams(lexer_class):
+    sources = SOURCES + ["x\r\ny\rz", '"a\r\nb"']
+    for src in sources:
+        # files are read like text files, newlines are translated
+        text = src.replace("\r\n", "\n").replace("\r", "\n")
+        assert tokens(lexer_class, TrickleStream(src.encode())) == tokens(Lexer, text)
+    for src in ERRORS:
+        assert error(lexer_class, TrickleStream(src.encode())) == error(Lexer, src)
+
+@pytest.mark.parametrize("lexer_class", [Lexer, RegexLexer, dfa_lexer])
+def test_streams_are_read_incrementally(lexer_class, tmp_path):
+    src = "let x = 1;\n" * 50000
+    stream = io.BytesIO(src.encode())
+    lexer = lexer_class(stream)
+    assert lexer.get_next_token().value == "let"
+    assert stream.tell() < len(src) // 2
+    path = tmp_path / "script.mon"
+    path.write_text(src)
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as source:
+            result = lexer_class(source).tokenize()
+    assert len(result) == 5 * 50000 + 1
+    assert (result[-2].line, result[-2].column) == (50000, 10)
+    assert (result[-1].line, result[-1].column) == (50001, 0)
+
+def test_positions():
+    result = tokens(RegexLexer, 'x = "a\nb" + 1\ny')
+    assert result == [
+        ("IDENTIFIER", "x", 1, 1),
+        ("=", "=", 1, 3),
+        ("STRING", "a\nb", 1, 5),
+        # newlines in strings don't start lines, + takes the next column
+        ("+", "+", 1, 12),
+        ("INTEGER", 1, 1, 13),
+        ("IDENTIFIER", "y", 2, 1),
+        ("EOF", "EOF", 2, 1),
+    ]
+
+def test_tokens_are_produced_lazily():
+    lexer = RegexLexer("let x = 1; $")
+    assert lexer.get_next_token().value == "let"
+    assert lexer.get_next_token().value == "x"
+    with pytest.raises(LexicalError):
+        lexer.tokenize()
@@ -0,0 +1,120 @@
+from monkey.lexer.lexer import Lexer
+from monkey.ast.parser import Parser
+from monkey.evaluator.environment import Environment
+from monkey.evaluator.evaluator import m_eval
+from monkey.evaluator import closure_compiler
+from monkey.evaluator import stack_evaluator
+from monkey.evaluator import memo
+from monkey.evaluator import mobjects
+
+ENGINES = [m_eval, closure_compiler.run_program, stack_evaluator.run_program]
+
+
+def run(src, engine=m_eval):
+    l = Lexer(src)
+    p = Parser(l)
+    return engine(p.parse(), Environment())
+
+def stats(result):
+    return [element.value for element in result.elements]
+
+def test_memo_builtin():
+    src = """
+    let fib = memo(fn(n) {
+        if (n < 2) { return n; }
+        fib(n - 1) + fib(n - 2)
+    });
+    let result = fib(60);
+    [result, memo_stats(fib)]
+    """
+    for engine in ENGINES:
+        result = run(src, engine)
+        value, counters = result.elements
+        assert value.value == 1548008755920
+        hits, misses, evictions, size = stats(counters)
+        assert misses == 61
+        assert hits == 58
+        assert evictions == 0
+        assert size == 61
+
+def test_lru_eviction():
+    src = """
+    let square = memo(fn(n) { n * n }, 2);
+    square(1); square(2); square(1); square(3); square(2);
+    memo_stats(square)
+    """
+    for engine in ENGINES:
+        # 1, 2 miss; 1 hit; 3 evicts 2; 2 misses again and evicts 1
+        assert stats(run(src, engine)) == [1, 4, 2, 2]
+
+def test_impure_calls_are_not_cached():
+    tests = [
+        # side effects
+        ("let f = memo(fn(x) { puts(x); x }); f(1); f(1); memo_stats(f)", [0, 0, 0, 0]),
+        ("let p = puts; let f = memo(fn(x) { p(x); x }); f(1); f(1); memo_stats(f)", [0, 0, 0, 0]),
+        # mutable arguments and state
+        ("let f = memo(fn(a) { len(a) }); f([1]); f([1]); memo_stats(f)", [0, 0, 0, 0]),
+        ("let a = [1]; let f = memo(fn() { len(a) }); f(); f(); memo_stats(f)", [0, 0, 0, 0]),
+        # calls to impure functions
+        ("let g = fn(x) { puts(x) }; let f = memo(fn(x) { g(x) }); f(1); f(1); memo_stats(f)", [0, 0, 0, 0]),
+        # results which aren't immutable
+        ("let f = memo(fn(x) { [x] }); f(1); f(1); memo_stats(f)", [0, 2, 0, 0]),
+        # pure
+        ("let g = fn(x) { len(x) }; let f = memo(fn(x) { g(x) }); f(\"a\"); f(\"a\"); memo_stats(f)", [1, 1, 0, 1]),
+    ]
+    for src, target in tests:
+        for engine in ENGINES:
+            assert stats(run(src, engine)) == target
+
+def test_memoized_callbacks():
+    for engine in ENGINES:
+        assert run("sum(map(range(1, 4), memo(fn(x) { x * 2 })))", engine).value == 12
+
+def test_rebound_names_are_part_of_the_key():
+    src = """
+    let scale = 2;
+    let f = memo(fn(x) { x * scale });
+    let a = f(3);
+    let scale = 10;
+    [a, f(3), f(3)]
+    """
+    for engine in ENGINES:
+        result = run(src, engine)
+        assert [element.value for element in result.elements] == [6, 30, 30]
+
+def test_memoized_tail_calls():
+    src = """
+    let count = memo(fn(n, acc) {
+        if (n == 0) { return acc; }
+        return count(n - 1, acc + 1);
+    });
+    let result = count(5000, 0);
+    [result, count(10, 4990)]
+    """
+    for engine in [m_eval, closure_compiler.run_program]:
+        result = run(src, engine)
+        assert [element.value for element in result.elements] == [5000, 5000]
+
+def test_auto_memo():
+    src = """
+    let fib = fn(n) { if (n < 2) { return n; } fib(n - 1) + fib(n - 2) };
+    [fib(50), memo_stats(fib)]
+    """
+    memo.enable_auto_memo(16)
+    try:
+        for engine in ENGINES:
+            result = run(src, engine)
+            assert result.elements[0].value == 12586269025
+            hits, misses, evictions, size = stats(result.elements[1])
+            assert misses == 51
+            assert size == 16
+    finally:
+        memo.disable_auto_memo()
+    assert run("let f = fn(x) { x }; memo_stats(f)").type() == mobjects.ERROR_OBJ
+
+def test_stats():
+    before = memo.stats()
+    run("let f = memo(fn(x) { x }); f(1); f(1); f(2);")
+    after = memo.stats()
+    assert after["hits"] - before["hits"] == 1
+    assert after["misses"] - before["misses"] == 2
@@ -0,0 +1,133 @@
+from monkey.lexer.lexer import Lexer
+from monkey.ast.parser import Parser
+from monkey.evaluator import mobjects
+from monkey.evaluator.environment import Environment
+from monkey.evaluator.evaluator import m_eval
+
+
+def test_objects_have_no_dict():
+    objects = [
+        mobjects.Integer(1),
+        mobjects.Boolean(True),
+        mobjects.String("s"),
+        mobjects.Null(),
+        mobjects.Error("e"),
+        mobjects.Array([]),
+    ]
+    for obj in objects:
+        assert not hasattr(obj, "__dict__")
+
+def test_type_tags():
+    assert mobjects.Integer(1).tag == mobjects.INTEGER_OBJ
+    assert mobjects.String("s").tag == mobjects.STRING_OBJ
+    assert mobjects.Array([]).type() == mobjects.ARRAY_OBJ
+
+def test_small_integer_cache():
+    assert mobjects.construct_integer(-5) is mobjects.construct_integer(-5)
+    assert mobjects.construct_integer(256) is mobjects.construct_integer(256)
+    assert mobjects.construct_integer(257) is not mobjects.construct_integer(257)
+    assert mobjects.construct_integer(1000).value == 1000
+
+def test_literals_are_materialized_once():
+    program = Parser(Lexer('fn() { [1000, "str"] }')).parse()
+    env = Environment()
+    function = m_eval(program, env)
+    body = function.body
+    first = m_eval(body, env)
+    second = m_eval(body, env)
+    assert first.elements[0] is second.elements[0]
+    assert first.elements[1] is second.elements[1]
+
+def test_string_builder():
+    base = mobjects.String("x" * mobjects.String.MIN_BUILDER_LENGTH)
+    a = base.concat(mobjects.String("a"))
+    ab = a.concat(mobjects.String("b"))
+    assert ab.parts is a.parts
+    # a doesn't own the fragments anymore, it copies
+    parts = ab.parts
+    ac = a.concat(mobjects.String("c"))
+    assert ac.parts is not parts
+    assert ab.value == base.value + "ab"
+    assert ac.value == base.value + "ac"
+    assert a.value == base.value + "a"
+    assert str(ab) == ab.value
+    assert mobjects.String("a").concat(mobjects.String("b")).parts is None
+
+def test_string_concatenation_in_loops():
+    src = """
+    let s = "";
+    let i = 0;
+    while (i < 1000) { let s = s + "ab"; let i = i + 1; }
+    let t = s + "!";
+    [len(s), s == t, t == s + "!", len(t)]
+    """
+    result = m_eval(Parser(Lexer(src)).parse(), Environment())
+    assert [str(element) for element in result.elements] == ["2000", "false", "true", "2001"]
+
+def test_packed_arrays():
+    array = mobjects.Array([mobjects.Integer(1), mobjects.Integer(2 ** 40)])
+    assert array.packed is not None
+    assert array.length() == 2
+    assert array.get(1).value == 2 ** 40
+    assert str(array) == f"[1, {2 ** 40}]"
+    array.append(mobjects.Integer(3))
+    assert array.packed is not None
+    array.append(mobjects.Integer(2 ** 64))
+    assert array.packed is None
+    assert [element.value for element in array.elements] == [1, 2 ** 40, 3, 2 ** 64]
+
+    mixed = mobjects.Array([mobjects.Integer(1), mobjects.String("a")])
+    assert mixed.packed is None
+    assert str(mixed) == "[1, a]"
+
+    array = mobjects.Array([mobjects.Integer(1)])
+    array.append(mobjects.String("a"))
+    assert array.packed is None
+    assert str(array) == "[1, a]"
+    # reading elements unpacks
+    array = mobjects.Array([mobjects.Integer(1)])
+    assert array.elements[0].value == 1
+    assert array.packed is None
+
+def test_array_views():
+    array = mobjects.Array([mobjects.Integer(value) for value in range(5)])
+    view = array.slice(1, 4)
+    assert view.view[0] is array.packed
+    inner = view.slice(1, 2)
+    assert inner.view == (array.packed, 2, 3)
+    assert inner.get(0).value == 2
+    assert str(view) == "[1, 2, 3]"
+    # appending to the parent keeps the views, appending to a view copies
+    array.append(mobjects.Integer(5))
+    assert view.length() == 3
+    view.append(mobjects.Integer(9))
+    assert view.view is None
+    assert str(view) == "[1, 2, 3, 9]"
+    assert str(array) == "[0, 1, 2, 3, 4, 5]"
+
+def test_range_arrays():
+    array = mobjects.Array()
+    array.view = (range(0, 10, 2), 0, 5)
+    assert array.get(4).value == 8
+    assert array.integers() == range(0, 10, 2)
+    assert [element.value for element in array.slice(1, 3).objects()] == [2, 4]
+    assert str(array) == "[0, 2, 4, 6, 8]"
+    array.append(mobjects.Integer(10))
+    assert array.packed.tolist() == [0, 2, 4, 6, 8, 10]
+
+def test_string_views():
+    string = mobjects.String("hello world")
+    view = string.slice(6, 11)
+    assert view.length() == 5
+    assert view.get(0).value == "w"
+    assert view.slice(1, 3).view == ("hello world", 7, 9)
+    assert view.value == "world"
+    assert view.view is None
+
+def test_hash_keys():
+    string = mobjects.String("key")
+    assert string.hash_key() is string.hash_key()
+    assert string.hash_key() == mobjects.String("key").hash_key()
+    assert mobjects.Integer(1).hash_key() != mobjects.Boolean(True).hash_key()
+    assert mobjects.Integer(1).hash_key() != mobjects.String("1").hash_key()
+    assert not isinstance(mobjects.Array([]), mobjects.Hashable)
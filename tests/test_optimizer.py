@@ -0,0 +1,123 @@
+from monkey.lexer.lexer import Lexer
+from monkey.ast.parser import Parser
+from monkey.ast import ast
+from monkey.evaluator.environment import Environment
+from monkey.evaluator.evaluator import m_eval
+from monkey.optimizer.optimizer import optimize, PassManager
+from monkey.optimizer import passes
+
+
+def parse(src):
+    l = Lexer(src)
+    p = Parser(l)
+    return p.parse()
+
+def run(program):
+    return m_eval(program, Environment())
+
+def assert_same_result(src, level=2):
+    expected = run(parse(src))
+    result = run(optimize(parse(src), level))
+    assert result.type() == expected.type()
+    assert str(result) == str(expected)
+
+def test_constant_folding():
+    tests = [
+        ("80 * 2 + 1", ast.IntegerLiteral, 161),
+        ("-(3 - 10) / 2", ast.IntegerLiteral, 3),
+        ("1 < 2 == true", ast.Boolean, True),
+        ("!0", ast.Boolean, True),
+        ('"foo" + "bar"', ast.StringLiteral, "foobar"),
+        ('"a" != "a"', ast.Boolean, False),
+    ]
+    for src, node_type, value in tests:
+        program = optimize(parse(src), 1)
+        expression = program.statements[0].expression
+        assert isinstance(expression, node_type)
+        assert expression.value == value
+
+def test_constant_folding_keeps_failing_expressions():
+    for src in ["1 / 0", "1 + true", '-"a"', "x * (2 + 3)"]:
+        program = optimize(parse(src), 1)
+        assert not isinstance(program.statements[0].expression, passes.LITERALS)
+    for src in ["1 + true", '-"a"', "x * (2 + 3)"]:
+        assert_same_result(src, 1)
+
+def test_branch_pruning():
+    program = optimize(parse("let x = if (1 < 2) { 10 } else { 20 }; x"), 1)
+    assert isinstance(program.statements[0].expression, ast.IntegerLiteral)
+
+    program = optimize(parse("if (false) { puts(1); } else { let y = 2; y * 3 }"), 1)
+    assert [stmt.node_type for stmt in program.statements] == [
+        "LetStatement", "ExpressionStatement"]
+
+    program = optimize(parse("if (0) { 1 }; 5"), 1)
+    assert len(program.statements) == 1
+
+    assert_same_result("if (0) { 1 }")
+    assert_same_result("let f = fn() { if (true) { let a = 3; } a }; f()")
+
+def test_dead_code_elimination():
+    program = optimize(parse("fn() { return 1; puts(2); 3 }"), 1)
+    body = program.statements[0].expression.body
+    assert len(body.statements) == 1
+    assert_same_result("let f = fn(x) { if (x) { return 1; x } return 2; 3 }; [f(true), f(false)]")
+
+def test_unused_let_elimination():
+    program = optimize(parse("""
+    fn(a) {
+        let unused = [1, fn() { 2 }];
+        let called = f();
+        let used = 2;
+        let captured = 3;
+        fn() { captured };
+        a + used
+    }
+    """), 2)
+    body = program.statements[0].expression.body
+    names = [stmt.identifier.name for stmt in body.statements
+             if isinstance(stmt, ast.LetStatement)]
+    assert names == ["called", "used", "captured"]
+
+    # globals are kept for later programs in the same environment
+    program = optimize(parse("let g = 1; 2"), 2)
+    assert len(program.statements) == 2
+
+def test_levels():
+    src = "1 + 2"
+    assert isinstance(optimize(parse(src), 0).statements[0].expression, ast.InfixExpression)
+    assert isinstance(optimize(parse(src), 1).statements[0].expression, ast.IntegerLiteral)
+
+    manager = PassManager().add(passes.DeadCodeElimination())
+    program = manager.run(parse("return 1 + 2; 3"))
+    assert len(program.statements) == 1
+    assert isinstance(program.statements[0].expression, ast.InfixExpression)
+
+def test_optimized_programs():
+    tests = [
+        """
+        let scale = 2 * 3;
+        let fib = fn(n) {
+            let limit = 1 + 1;
+            let debug = false;
+            if (debug) { puts(n); }
+            if (n < limit) { return n; }
+            return fib(n - 1) + fib(n - 2);
+            puts("unreachable");
+        };
+        fib(10) * scale
+        """,
+        """
+        let i = 0;
+        let total = 0;
+        while (i < 10 * 10) {
+            let step = 4 / 2;
+            let total = total + step - 1;
+            let i = i + 1;
+        }
+        total
+        """,
+    ]
+    for src in tests:
+        assert_same_result(src, 1)
+        assert_same_result(src, 2)
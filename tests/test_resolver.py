@@ -0,0 +1,55 @@
+from monkey.lexer.lexer import Lexer
+from monkey.ast.parser import Parser
+from monkey.ast.resolver import resolve
+
+
+def resolve_src(src):
+    l = Lexer(src)
+    p = Parser(l)
+    return resolve(p.parse())
+
+def test_global_names():
+    program = resolve_src("let x = 1; x;")
+    let_stmt, expr_stmt = program.statements
+    assert program.resolved
+    assert let_stmt.slot is None
+    assert expr_stmt.expression.depth is None
+
+def test_function_slots():
+    program = resolve_src("""
+    fn(a, b) {
+        if (a) {
+            let c = a;
+        }
+        while (b) {
+            let d = b;
+        }
+        fn(e) { a + e + g };
+    }
+    """)
+    function = program.statements[0].expression
+    assert function.scope.names == {"a": 0, "b": 1, "c": 2, "d": 3}
+
+    inner = function.body.statements[2].expression
+    assert inner.scope.names == {"e": 0}
+    left, g = inner.body.statements[0].expression.left, inner.body.statements[0].expression.right
+    a, e = left.left, left.right
+    assert (a.depth, a.slot) == (1, 0)
+    assert (e.depth, e.slot) == (0, 0)
+    assert (g.depth, g.slot) == (None, None)
+
+def test_let_slot():
+    program = resolve_src("fn(a) { let b = a; let a = b; }")
+    function = program.statements[0].expression
+    let_b, let_a = function.body.statements
+    assert let_b.slot == 1
+    assert let_a.slot == 0
+    assert (let_b.expression.depth, let_b.expression.slot) == (0, 0)
+
+def test_duplicate_parameters():
+    program = resolve_src("fn(a, b, a) { let c = a; a + b }")
+    function = program.statements[0].expression
+    assert function.scope.names == {"a": 2, "b": 1, "c": 3}
+    assert function.scope.size == 4
+    let_c, expr_stmt = function.body.statements
+    assert let_c.expression.slot == 2
@@ -0,0 +1,58 @@
+"""Tests of the non recursive evaluator, the evaluator test suite runs on
+it too (see conftest)."""
+
+import sys
+
+from monkey.lexer.lexer import Lexer
+from monkey.ast.parser import Parser
+from monkey.evaluator import mobjects
+from monkey.evaluator.environment import Environment
+from monkey.evaluator.stack_evaluator import StackEvaluator
+
+
+def parse(src):
+    l = Lexer(src)
+    p = Parser(l)
+    return p.parse()
+
+def run_stack(src):
+    return StackEvaluator(parse(src), Environment()).run()
+
+def test_deep_recursion():
+    src = """
+    let count = fn(n) {
+        if (n == 0) {
+            return 0;
+        }
+        1 + count(n - 1)
+    };
+    count(%d);
+    """ % (sys.getrecursionlimit() * 10)
+    result = run_stack(src)
+    assert isinstance(result, mobjects.Integer)
+    assert result.value == sys.getrecursionlimit() * 10
+
+def test_pause_and_resume():
+    src = """
+    let fib = fn(n) { if (n < 2) { return n; } fib(n - 1) + fib(n - 2) };
+    fib(10);
+    """
+    pauses = []
+    def hook(machine):
+        pauses.append(machine.steps)
+        return True
+    machine = StackEvaluator(parse(src), Environment(), hook=hook, hook_interval=100)
+    result = machine.run()
+    while result is None:
+        assert machine.paused
+        assert not machine.finished
+        result = machine.run()
+    assert machine.finished
+    assert result.value == 55
+    assert len(pauses) > 1
+
+def test_step():
+    machine = StackEvaluator(parse("let a = 1; a + 2"), Environment())
+    while not machine.step():
+        pass
+    assert machine.result.value == 3
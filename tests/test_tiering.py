@@ -0,0 +1,93 @@
+"""Tiered execution of m_eval, the evaluator test suite runs with every
+function and loop promoted right away too (see conftest)."""
+
+import pytest
+
+from monkey.lexer.lexer import Lexer
+from monkey.ast.parser import Parser
+from monkey.evaluator import mobjects
+from monkey.evaluator import tiering
+from monkey.evaluator.environment import Environment
+from monkey.evaluator.evaluator import m_eval
+
+
+def parse(src):
+    l = Lexer(src)
+    p = Parser(l)
+    return p.parse()
+
+def run(src, env=None):
+    return m_eval(parse(src), env or Environment())
+
+@pytest.fixture(autouse=True)
+def thresholds(monkeypatch):
+    monkeypatch.setattr(tiering, "call_threshold", 1)
+    monkeypatch.setattr(tiering, "loop_threshold", 1)
+
+def test_function_promotion(monkeypatch):
+    monkeypatch.setattr(tiering, "call_threshold", 3)
+    env = Environment()
+    before = tiering.stats()["functions"]
+    run("let f = fn(x) { x * 2 }; f(1); f(2);", env)
+    f = env.get("f")
+    assert f.code is None
+    assert f.calls == 2
+    assert run("f(3)", env).value == 6
+    assert f.code is not None
+    assert run("f(4)", env).value == 8
+    assert f.calls == 3
+    assert tiering.stats()["functions"] == before + 1
+    # functions of the same literal share the compiled body
+    run("let make = fn() { fn(x) { x } }; let g = make(); g(1); g(1); g(1); let h = make();", env)
+    assert env.get("h").code is env.get("g").code
+
+def test_loop_promotion(monkeypatch):
+    monkeypatch.setattr(tiering, "loop_threshold", 10)
+    before = tiering.stats()["loops"]
+    src = """
+    let i = 0;
+    let total = 0;
+    while (i < 100) {
+        let total = total + i;
+        let i = i + 1;
+        total
+    }
+    """
+    program = parse(src)
+    assert m_eval(program, Environment()).value == 4950
+    loop = program.statements[2].expression
+    assert loop.compiled is not None
+    assert loop.iterations == 10
+    assert tiering.stats()["loops"] == before + 1
+
+def test_loops_in_functions(monkeypatch):
+    monkeypatch.setattr(tiering, "call_threshold", 0)
+    monkeypatch.setattr(tiering, "loop_threshold", 5)
+    src = """
+    let count = fn(n) {
+        let i = 0;
+        while (i < n) { let i = i + 1; }
+        if (i == n) { return i; }
+    };
+    count(2) + count(2) + count(2) + count(10)
+    """
+    assert run(src).value == 16
+
+def test_disabled(monkeypatch):
+    monkeypatch.setattr(tiering, "call_threshold", 0)
+    monkeypatch.setattr(tiering, "loop_threshold", 0)
+    program = parse("let f = fn(n) { n }; let i = 0; while (i < 5) { let i = f(i + 1); }; f")
+    f = m_eval(program, Environment())
+    assert f.code is None
+    assert program.statements[2].expression.compiled is None
+
+def test_promoted_errors():
+    tests = [
+        ("let f = fn(x) { x + true }; f(1)", "unsupported operand type for +: 'INTEGER' and 'BOOLEAN'"),
+        ("let i = 0; while (i < 3) { let i = i + 1; if (i == 2) { y } }", "name 'y' is not defined"),
+        ("let f = fn(a, b) { a }; f(1)", "function expected 2 arguments but 1 were given"),
+    ]
+    for src, target in tests:
+        result = run(src)
+        assert isinstance(result, mobjects.Error)
+        assert result.msg == target
@@ -0,0 +1,124 @@
+"""Tests of the python transpiler, the evaluator test suite runs on it too
+(see conftest)."""
+
+import pytest
+
+from monkey.lexer.lexer import Lexer
+from monkey.ast.parser import Parser
+from monkey.evaluator import mobjects
+from monkey.evaluator.environment import Environment
+from monkey.evaluator.evaluator import m_eval
+from monkey.transpiler import transpiler
+from monkey.transpiler.cache import CodeCache
+
+
+def parse(src):
+    l = Lexer(src)
+    p = Parser(l)
+    return p.parse()
+
+def run_transpiled(src):
+    return transpiler.run_program(parse(src), Environment())
+
+def assert_same_as_eval(src):
+    expected = m_eval(parse(src), Environment())
+    result = run_transpiled(src)
+    assert result.type() == expected.type()
+    assert str(result) == str(expected)
+
+def test_values():
+    tests = [
+        "1 == true",
+        "true == true",
+        '"a" == "a"',
+        "[1] == [1]",
+        "let a = [1]; a == a",
+        'if ("") { 1 } else { 2 }',
+        "!0",
+        '!""',
+        "let f = fn() {}; f()",
+        "fn(x) { x }",
+        '[1, "a", true, fn() { 1 }][3]()',
+        'puts("a", [1, 2], true)',
+        "if (false) { 1 }",
+        "while (false) { 1 }",
+        "fn(a, a) { a }",
+        "fn(a, a) { fn(a) { a } }(1, 2)(3)",
+    ]
+    for src in tests:
+        assert_same_as_eval(src)
+
+def test_evaluation_order():
+    tests = [
+        "let x = 1; x + if (true) { let x = 5; 1 } else { 0 }",
+        "let x = 1; [x, if (true) { let x = 2; x }, x]",
+        "let f = fn() { let i = 0; let j = while (i < 3) { let i = i + 1; i * 10 }; j + i }; f()",
+        "let g = fn(a, b) { a - b }; let x = 10; g(x, if (x > 5) { let x = 3; x } else { 0 })",
+    ]
+    for src in tests:
+        assert_same_as_eval(src)
+
+def test_error_messages():
+    test_cases = [
+        ("1 + true", "unsupported operand type for +: 'INTEGER' and 'BOOLEAN'"),
+        ("-true", "unsupported operand type for -: 'BOOLEAN'"),
+        ("a;", "name 'a' is not defined"),
+        ("let f = fn() { b }; f()", "name 'b' is not defined"),
+        ("1(2)", "INTEGER is not callable"),
+        ("fn(a) { a }()", "function expected 1 arguments but 0 were given"),
+        ("len(1)", "object of type INTEGER has no len()"),
+        ("[1][true]", "ARRAY is not subscriptable"),
+    ]
+    for src, target in test_cases:
+        result = run_transpiled(src)
+        assert isinstance(result, mobjects.Error)
+        assert result.msg == target
+
+def test_shared_environment():
+    env = Environment()
+    env.set("x", mobjects.Integer(1))
+    program = parse("let x = x + 1; x")
+    assert transpiler.run_program(program, env).value == 2
+    assert transpiler.run_program(program, env).value == 3
+
+def test_code_cache(tmp_path):
+    cache = CodeCache(str(tmp_path))
+    src = "let f = fn(n) { if (n < 2) { return n; } f(n - 1) + f(n - 2) }; f(15)"
+    key = cache.key(src, 0)
+    assert key != cache.key(src, 1)
+    assert cache.load(key) is None
+    cache.store(key, transpiler.compile_program(parse(src)))
+
+    code = cache.load(key)
+    from monkey.transpiler.runtime import run_code
+    assert run_code(code, Environment()).value == 610
+
+    with open(cache.path(key), "wb") as f:
+        f.write(b"garbage")
+    assert cache.load(key) is None
+
+def test_cached_scripts_are_not_parsed(tmp_path, monkeypatch):
+    from monkey import command_line
+    monkeypatch.setenv("MONKEY_CACHE_DIR", str(tmp_path))
+    src = "let x = 40; x + 2"
+    code = command_line.load_python_code(src, "test.mon")
+    assert len(list(tmp_path.iterdir())) == 1
+
+    def fail(*args):
+        raise AssertionError("script parsed again")
+    monkeypatch.setattr(command_line, "parse_script", fail)
+    cached = command_line.load_python_code(src, "test.mon")
+    assert cached == code
+    from monkey.transpiler.runtime import run_code
+    assert run_code(cached, Environment()).value == 42
+
+def test_python_name_errors_are_not_monkey_errors():
+    from monkey.transpiler.runtime import run_code
+    code = compile("_result = undefined_helper()", "test.mon", "exec")
+    with pytest.raises(NameError):
+        run_code(code, Environment())
+
+def test_memo_is_unsupported():
+    result = run_transpiled("let f = memo(fn(x) { x }); f(1)")
+    assert isinstance(result, mobjects.Error)
+    assert "memo" in result.msg
@@ -0,0 +1,81 @@
+import sys
+
+import pytest
+
+from monkey.lexer.lexer import Lexer
+from monkey.ast.parser import Parser
+from monkey.evaluator import mobjects
+from monkey.evaluator import vec
+from monkey.evaluator.environment import Environment
+from monkey.evaluator.evaluator import m_eval
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+requires_numpy = pytest.mark.skipif(numpy is None, reason="numpy is not installed")
+
+
+def parse(src):
+    l = Lexer(src)
+    p = Parser(l)
+    return p.parse()
+
+def run(src):
+    return m_eval(parse(src), Environment())
+
+@requires_numpy
+def test_vector_operations():
+    test_cases = [
+        ('vec["add"]([1, 2, 3], [10, 20, 30])', "[11, 22, 33]"),
+        ('vec["sub"](range(3), 1)', "[-1, 0, 1]"),
+        ('vec["mul"]([1, 2, 3], 2)', "[2, 4, 6]"),
+        ('vec["div"]([7, -7], 2)', "[3, -4]"),
+        ('vec["lt"]([1, 5], [2, 2])', "[true, false]"),
+        ('vec["eq"]([1, 2], 2)', "[false, true]"),
+        ('vec["ne"]([1, 2], 2)', "[true, false]"),
+        ('let v = [1, 5, 3, 8]; vec["mask"](v, vec["gt"](v, 2))', "[5, 3, 8]"),
+        ('vec["sum"](range(101))', "5050"),
+        ('vec["min"]([4, 2, 9]) + vec["max"]([4, 2, 9])', "11"),
+        ('vec["dot"]([1, 2, 3], [4, 5, 6])', "32"),
+        ('vec["sum"](vec["gt"]([1, 5, 7], 4))', "2"),
+        ('let a = [1, 2, 3, 4]; vec["add"](a[1:3], a[:2])', "[3, 5]"),
+    ]
+    for src, target in test_cases:
+        result = run(src)
+        assert str(result) == target
+
+@requires_numpy
+def test_results_are_packed():
+    packed = mobjects.Array([mobjects.Integer(value) for value in range(4)])
+    result = vec.module.get(mobjects.String("mul")).function(packed, mobjects.Integer(3))
+    assert result.packed is not None
+    assert result.packed.tolist() == [0, 3, 6, 9]
+    # the argument doesn't keep exporting its buffer
+    packed.append(mobjects.Integer(4))
+    assert packed.length() == 5
+
+@requires_numpy
+def test_vector_errors():
+    test_cases = [
+        ('vec["add"]([1], [1, 2])', "vec add needs arrays of the same length"),
+        ('vec["div"]([1, 2], [1, 0])', "division by zero"),
+        ('vec["add"](["a"], 1)', "vec needs arrays of integers or booleans, not STRING"),
+        ('vec["add"]("a", 1)', "vec needs arrays or integers, not STRING"),
+        ('vec["mul"]([1], 100000000000000000000)', "vec needs integers of 64 bits"),
+        ('vec["mask"]([1, 2], [1, 0])', "vec mask needs an array and an array of booleans"),
+        ('vec["min"]([])', "min() of empty array"),
+        ('vec["sum"]([1], [2])', "vec sum takes exactly 1 arguments (2 given)"),
+    ]
+    for src, target in test_cases:
+        result = run(src)
+        assert isinstance(result, mobjects.Error)
+        assert result.msg == target
+
+def test_numpy_is_imported_lazily(monkeypatch):
+    monkeypatch.setattr(vec, "numpy", None)
+    monkeypatch.setitem(sys.modules, "numpy", None)
+    result = run('vec["sum"]([1, 2])')
+    assert isinstance(result, mobjects.Error)
+    assert result.msg == "vec needs numpy, install it with: pip install numpy"
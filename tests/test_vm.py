@@ -0,0 +1,132 @@
+import pytest
+
+from monkey.lexer.lexer import Lexer
+from monkey.ast.parser import Parser
+from monkey.compiler.compiler import Compiler
+from monkey.evaluator import mobjects
+from monkey.evaluator.environment import Environment
+from monkey.evaluator.evaluator import m_eval
+from monkey.vm.vm import VM
+
+
+def parse(src):
+    l = Lexer(src)
+    p = Parser(l)
+    return p.parse()
+
+def run_vm(src):
+    bytecode = Compiler().compile(parse(src))
+    return VM(bytecode, Environment()).run()
+
+def assert_same_as_eval(src):
+    expected = m_eval(parse(src), Environment())
+    result = run_vm(src)
+    assert result.type() == expected.type()
+    assert str(result) == str(expected)
+
+def test_integer_arithmetic():
+    test_cases = [
+        ("1", 1),
+        ("-100", -100),
+        ("--123", 123),
+        ("1 + 2 * 3", 7),
+        ("5 / 2 * 2", 4),
+        ("(1 + 2) - ((3 * 4) / 5)", 1),
+    ]
+    for src, target in test_cases:
+        result = run_vm(src)
+        assert isinstance(result, mobjects.Integer)
+        assert result.value == target
+
+def test_parity_with_evaluator():
+    test_cases = [
+        "0 < 1 == 1 < 2",
+        "true != false",
+        "!0",
+        "!!true",
+        "if (false) {1;}",
+        "if (1 > 2) {1;} else {2;};",
+        "if (true) { if (true) { return 2; } return 1; }",
+        "1; return 2*3; 4;",
+        "let x = 1; let y = x; let z = x + y; z",
+        "let a = 0; let res = 1; while (a < 5) { let res = res * 2; let a = a + 1; } res;",
+        "let a = 0; while (a < 5) { let a = a + 1; a * 10 }",
+        "let a = 0; while (a < 5) { let a = a + 1; }",
+        "let f = fn(a) { let i = 1; let res = 0; while (true) { let res = res + i; if (i == a) { return res; } let i = i + 1; } }; f(10);",
+        "let max = fn(a, b) { if (a > b) { a; } else { b; };}; max(1*3, 2)",
+        "fn(a, b) {a - b}(2, 1)",
+        "let adder = fn(x) { fn(y) { x + y } }; let add2 = adder(2); add2(40)",
+        '"String" + " " + "Concatenation"',
+        '"a" == "a"',
+        "let a = [1, 2]; a[1*2 - 2 + 1];",
+        "let a = [1, 2]; append(a, 3); len(a)",
+        "let a = [1, 2, 3]; [a[1:], a[:-1], a[:], a[-1]]",
+        '"hello"[1:3] + "hello"[0]',
+        'let h = {"a": 1, 2: [3]}; [h["a"], h[2], h[5], h == {2: [3], "a": 1}]',
+        "let n = 2; [map(range(4), fn(x) { x * n }), filter([1, 2, 3], fn(x) { x > 1 }), sum(range(5))]",
+        "reduce([1, 2, 3], 0, fn(acc, x) { if (x == 2) { return acc; } acc + x })",
+        "let a = [3, 1, 2]; sort(a); [a, sorted(a, fn(x) { -x }), bsearch(a, 2), min(a), unique([1, 1])]",
+        "[1, true, \"three\", fn(x) { x }]",
+        "let f = fn() {}; f",
+    ]
+    for src in test_cases:
+        assert_same_as_eval(src)
+
+def test_errors():
+    test_cases = [
+        "1 + true",
+        "false * true",
+        "-true",
+        "-false; 1",
+        "a;",
+        "let a = [1]; a[1]",
+        "len(1)",
+        "map([1], fn(x) { x + true })",
+        "1(2)",
+        "fn(a) { a }()",
+        "let f = fn(x) { x + missing }; f(1); 2",
+    ]
+    for src in test_cases:
+        result = run_vm(src)
+        assert isinstance(result, mobjects.Error)
+        assert_same_as_eval(src)
+
+def test_deep_recursion():
+    src = """
+    let count = fn(n) {
+        if (n == 0) {
+            return 0;
+        }
+        return 1 + count(n - 1);
+    };
+    count(20000);
+    """
+    result = run_vm(src)
+    assert isinstance(result, mobjects.Integer)
+    assert result.value == 20000
+
+def test_tail_calls():
+    src = """
+    let count = fn(n, acc) {
+        if (n == 0) {
+            return acc;
+        }
+        return count(n - 1, acc + 1);
+    };
+    count(10000, 0);
+    """
+    result = run_vm(src)
+    assert result.value == 10000
+    assert_same_as_eval("let f = fn(a) { return len(a); }; f([1, 2, 3])")
+    assert_same_as_eval("let f = fn(x) { return f(); }; f(1)")
+
+def test_environment_is_shared():
+    env = Environment()
+    VM(Compiler().compile(parse("let x = 40;")), env).run()
+    result = VM(Compiler().compile(parse("x + 2")), env).run()
+    assert result.value == 42
+
+def test_memo_is_unsupported():
+    result = run_vm("let f = memo(fn(x) { x }); f(1)")
+    assert isinstance(result, mobjects.Error)
+    assert "memo" in result.msg